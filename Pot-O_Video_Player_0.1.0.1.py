@@ -1,15 +1,45 @@
+import os
+import time
+_startup_time = time.perf_counter()  # Reference point for --startup-profile
 import sys
-import gi
 import threading
-from PyQt5.QtCore import QEvent, Qt, pyqtSlot, QStandardPaths, QPoint, QTimer
-from PyQt5.QtGui import QIcon, QKeySequence, QCursor
-from PyQt5.QtWidgets import QMainWindow, QFileDialog, QSizePolicy, QToolBar, QAction, QSlider, QStyle, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QApplication, QDialog
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent, QAudioOutput
+import bisect
+import random
+import math
+import hashlib
+import json
+import sqlite3
+from collections import deque, OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from array import array
+import argparse
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QCoreApplication, QLibraryInfo, QEvent, Qt, pyqtSlot, pyqtSignal, QObject, QStandardPaths, QTimer, QPoint, QRect, QUrl, QMimeDatabase, QT_VERSION_STR
+from PyQt5.QtGui import QFont, QIcon, QKeySequence, QImage, QPainter, QPixmap
+from PyQt5.QtWidgets import QMainWindow, QFileDialog, QSizePolicy, QToolBar, QAction, QActionGroup, QSlider, QStyle, QLabel, QVBoxLayout, QHBoxLayout, QGridLayout, QWidget, QStackedWidget, QApplication, QDialog, QInputDialog, QListView, QDockWidget
+from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
+from PyQt5 import sip
 
-# Initialize GStreamer
-gi.require_version('Gst', '1.0')
-from gi.repository import Gst
+# GStreamer is imported and initialised by load_gstreamer() on first use
+GLib = Gst = GstVideo = GstPbutils = None
+_gstreamer_lock = threading.Lock()
+
+def load_gstreamer():
+	global GLib, Gst, GstVideo, GstPbutils
+	if Gst is None:
+		with _gstreamer_lock:
+			if Gst is None:
+				# Initialize GStreamer
+				import gi
+				gi.require_version('Gst', '1.0')
+				gi.require_version('GstVideo', '1.0')
+				gi.require_version('GstPbutils', '1.0')
+				from gi.repository import GLib as _GLib, Gst as _Gst, GstVideo as _GstVideo, GstPbutils as _GstPbutils
+				_Gst.init(None)
+				GLib, GstVideo, GstPbutils = _GLib, _GstVideo, _GstPbutils
+				Gst = _Gst  # Assigned last; the check above runs without the lock
+	return Gst
 
 AVI = "video/x-msvideo"  # AVI
 MP4 = "video/mp4"
@@ -17,105 +47,3153 @@ TS = "video/mp2t"
 FLV = "video/x-flv"
 _3GP = "video/3gpp"
 
-def get_supported_mime_types():
-	result = [AVI, MP4, TS, FLV, _3GP]
-	supported_mime_types = QMediaPlayer.supportedMimeTypes()
-	for mime_type in supported_mime_types:
-		result.append(mime_type)
-	return result
+# Seconds of decoded media each GStreamer queue may hold before it blocks upstream
+BUFFER_TARGET_SECONDS = 2
+# Bounds for the byte limit derived from the decoded stream bitrate
+QUEUE_MIN_BYTES = 2 * 1024 * 1024  # 2MB
+QUEUE_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+
+# How long a seek may stay unconfirmed before the next target is issued anyway
+SEEK_LATENCY_BUDGET_MS = 250
+
+# Time labels and the seek slider are refreshed at this rate while playing
+UI_REFRESH_HZ = 4
+
+# --startup-profile reports idle RSS this long after the first paint
+STARTUP_IDLE_MS = 1000
+
+# Longest the GUI thread may go without returning to the event loop (one frame at 60 Hz)
+EVENT_LOOP_BUDGET_MS = 16
+EVENT_LOOP_PROBE_MS = 4
+
+# Supported MIME types and their extensions are cached here between runs
+MIME_CACHE_NAME = "mime-types.json"
+MIME_CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600  # Recomputed at least this often, for plugin changes the key misses
+
+# Hover previews are decoded at this width and kept in memory up to this many bytes
+THUMBNAIL_WIDTH = 160
+THUMBNAIL_CACHE_BYTES = 32 * 1024 * 1024  # 32MB
+THUMBNAIL_DISK_BYTES = 256 * 1024 * 1024  # 256MB of JPEGs on disk, least recently used pruned first
+# Without a keyframe index, previews are bucketed into this many slots per file
+THUMBNAIL_SLOTS = 200
+
+# Open and pause the next playlist entry this long before the current one ends
+PREROLL_LEAD_MS = 3000
+# While a gapless switch is timed, QMediaPlayer reports its position this often instead of the default
+SWITCH_PROBE_INTERVAL_MS = 5
+QT_NOTIFY_INTERVAL_MS = 1000
+
+# Background media probing
+PROBE_WORKERS = 4
+PROBE_TIMEOUT_SECONDS = 10
+# Keyframes to demux when measuring a file's keyframe interval, and how far to look for them at most
+KEYFRAME_PROBE_COUNT = 5
+KEYFRAME_PROBE_MS = 60000
+
+# Background work classes for WorkerPool, highest priority first, and how many of each may run at once.
+# Every class has its own slots, so long index builds or scans never hold up the store writer
+WORK_INTERACTIVE = 0  # Backend opens, seeks and state changes
+WORK_STORE = 1  # Resume position and session writes; the last one must finish before the process exits
+WORK_THUMBNAIL = 2
+WORK_PROBE = 3
+WORK_INDEX = 4  # Whole-file keyframe index builds
+WORK_BACKGROUND = 5  # Folder scans, session restore
+WORK_LIMITS = {WORK_INTERACTIVE: 4, WORK_STORE: 1, WORK_THUMBNAIL: 1, WORK_PROBE: PROBE_WORKERS, WORK_INDEX: 1,
+	WORK_BACKGROUND: 2}
+WORKER_SHUTDOWN_SECONDS = 5
+INDEX_CANCEL_POLL_MS = 100  # How often a cancellable keyframe index build checks its token
+
+# Persistent probe/keyframe/resume cache, keyed by path, size and mtime
+METADATA_DB_NAME = "media-cache.sqlite3"
+METADATA_MAX_ENTRIES = 100000
+METADATA_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+METADATA_EVICT_EVERY = 500  # Writes between eviction passes
+
+# Resume positions and the last session are written in the background, debounced
+STORE_WRITE_DELAY_SECONDS = 2.0
+RESUME_SAVE_INTERVAL_MS = 5000  # How often the playing position is handed to the writer
+RESUME_MIN_MS = 5000  # Positions this close to the start are not worth resuming
+RESUME_END_MARGIN_MS = 10000  # ... nor this close to the end
+
+# Folder scans hand files to the playlist in batches of this size, or at least this often
+SCAN_BATCH_SIZE = 256
+SCAN_BATCH_SECONDS = 0.2
+
+# Decoder threading and what GstPlayer does when video falls behind the clock
+DECODER_THREAD_PROPERTIES = ("max-threads", "n-threads", "threads")  # libav, dav1d, vpx
+LATE_FRAME_POLICIES = ("drop", "keyframe", "degrade")
+MAX_LATENESS_MS = 20  # Sinks drop frames later than this
+LATE_FRAME_THRESHOLD_MS = 250  # QoS jitter at which playback counts as falling behind
+LATE_FRAME_COOLDOWN_MS = 2000  # Minimum time between two policy actions
+
+# Pipeline telemetry sampling (--metrics-log, --metrics-port)
+TELEMETRY_INTERVAL_MS = 1000
+TELEMETRY_RING_SIZE = 600  # Ten minutes of samples
+TELEMETRY_EVENT_RING_SIZE = 200
+DECODE_LATENCY_WINDOW = 256  # Per-frame decode times kept between samples
+
+# How GstPlayer reads local files (--source-mode, --read-block-size)
+SOURCE_MODES = ("filesrc", "blocks", "mmap")
+READ_BLOCK_SIZE = 1024 * 1024  # 1MB
+READAHEAD_MAX_BYTES = 32 * 1024 * 1024  # 32MB
+INDEX_PREFETCH_BYTES = 1024 * 1024  # Read ahead at both ends of a file, where container indexes live
+
+# Recently read and bookmarked byte ranges kept in RAM by the blocks and mmap source modes
+SEGMENT_CACHE_BYTES = 128 * 1024 * 1024  # 128MB
+# Around the keyframe before a bookmark; its recorded offset may trail its data by what the demuxer reads ahead,
+# and playback from the bookmark reads on through the rest of the GOP
+BOOKMARK_PIN_BEFORE_BYTES = 4 * 1024 * 1024
+BOOKMARK_PIN_AFTER_BYTES = 8 * 1024 * 1024
+
+# Network playback on the GStreamer backends: HTTP progressive, HLS and DASH (--network-buffer, --max-bitrate)
+NETWORK_SCHEMES = ("http", "https")
+NETWORK_BUFFER_SECONDS = 10  # Media buffered ahead before playback starts, or resumes after a stall
+NETWORK_RING_BUFFER_BYTES = 64 * 1024 * 1024  # How far a progressive download may run ahead of playback
+BANDWIDTH_EWMA_WEIGHT = 0.3  # Weight of the newest throughput sample in the bandwidth estimate
+ADAPTIVE_BANDWIDTH_USAGE = 0.8  # Share of the estimated bandwidth an HLS/DASH rendition may use
+RENDITION_HISTORY = 64
+
+# Multi-view grid: playlist entries played side by side on one pipeline clock
+MULTIVIEW_MAX_TILES = 16
+# How playback degrades as the grid grows: (up to N tiles, fps cap or 0, skip non-reference frames)
+MULTIVIEW_QUALITY_STEPS = ((4, 0, False), (9, 15, False), (MULTIVIEW_MAX_TILES, 10, True))
+MULTIVIEW_DEFAULT_TILE_SIZE = (480, 270)  # Until the grid has been laid out
+MULTIVIEW_TILE_SPACING = 2
+MULTIVIEW_RESIZE_DELAY_MS = 200
+MULTIVIEW_STATS_INTERVAL_MS = 1000
+
+# How long the window must stay minimised or hidden before video decoding stops
+VIDEO_MODE_DELAY_MS = 1000
+
+# Playlist storage and playback order
+PLAYLIST_LOCAL = 1  # Entry flag: the location is a local path rather than a URL
+PLAYLIST_FETCH_BATCH = 1024  # Rows the playlist view is handed at a time
+REPEAT_MODES = ("off", "all", "one")
+
+def get_supported_mime_types():
+	result = [AVI, MP4, TS, FLV, _3GP]
+	supported_mime_types = QMediaPlayer.supportedMimeTypes()
+	for mime_type in supported_mime_types:
+		result.append(mime_type)
+	return result
+
+class MimeRegistry:
+	# Supported MIME types and an extension index, computed once per process and cached on disk
+	_instance = None
+
+	def __init__(self, cache_path=None):
+		self.cache_path = cache_path or os.path.join(
+			QStandardPaths.writableLocation(QStandardPaths.CacheLocation), MIME_CACHE_NAME)
+		self.mime_types = frozenset()
+		self.extensions = {}  # Lower-case extension without the dot -> MIME type
+		self._dialog_filters = []
+		if not self._load():
+			self._compute()
+			self._save()
+
+	@classmethod
+	def instance(cls):
+		if cls._instance is None:
+			cls._instance = cls()
+		return cls._instance
+
+	def _cache_key(self):
+		# Backend capabilities change with the Qt build and platform, and with the installed plugins
+		return f"{QT_VERSION_STR}/{sys.platform}/{self._plugin_fingerprint()}"
+
+	@staticmethod
+	def _plugin_fingerprint():
+		# Sizes and mtimes of Qt's media service plugins and of GStreamer's plugin directories
+		# and registry cache, which GStreamer rewrites whenever its plugin set changes. Only
+		# stat() calls, so a cache hit still never loads GStreamer or a Qt backend
+		paths = [os.path.join(QLibraryInfo.location(QLibraryInfo.PluginsPath), "mediaservice")]
+		for variable in ("GST_PLUGIN_PATH_1_0", "GST_PLUGIN_PATH", "GST_PLUGIN_SYSTEM_PATH_1_0", "GST_PLUGIN_SYSTEM_PATH"):
+			paths.extend(path for path in os.environ.get(variable, "").split(os.pathsep) if path)
+		registry = os.environ.get("GST_REGISTRY_1_0") or os.environ.get("GST_REGISTRY")
+		if registry:
+			paths.append(registry)
+		else:
+			registry_dir = os.path.join(
+				os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "gstreamer-1.0")
+			try:
+				paths.extend(os.path.join(registry_dir, name) for name in os.listdir(registry_dir)
+					if name.startswith("registry."))
+			except OSError:
+				pass
+		stamps = []
+		for path in sorted(set(paths)):
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			stamps.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+		return hashlib.sha1("\n".join(stamps).encode("utf-8", "surrogatepass")).hexdigest()[:16]
+
+	def _load(self):
+		try:
+			with open(self.cache_path, encoding="utf-8") as cache_file:
+				cached = json.load(cache_file)
+		except (OSError, ValueError):
+			return False
+		if cached.get("key") != self._cache_key() \
+				or not 0 <= time.time() - cached.get("saved", 0) < MIME_CACHE_MAX_AGE_SECONDS:
+			return False
+		self._dialog_filters = cached["mime_types"]
+		self.mime_types = frozenset(self._dialog_filters)
+		self.extensions = cached["extensions"]
+		return True
+
+	def _compute(self):
+		# Keep the backend's order for the dialog, but without duplicates
+		extras = [AVI] if sys.platform == 'win32' else [MP4]
+		self._dialog_filters = list(dict.fromkeys(get_supported_mime_types() + extras + [TS, FLV, _3GP]))
+		self.mime_types = frozenset(self._dialog_filters)
+		mime_database = QMimeDatabase()
+		extensions = {}
+		for name in self._dialog_filters:
+			for suffix in mime_database.mimeTypeForName(name).suffixes():
+				extensions.setdefault(suffix.lower(), name)
+		self.extensions = extensions
+
+	def _save(self):
+		try:
+			os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+			with open(self.cache_path, "w", encoding="utf-8") as cache_file:
+				json.dump({"key": self._cache_key(), "saved": time.time(), "mime_types": self._dialog_filters,
+					"extensions": self.extensions}, cache_file)
+		except OSError:
+			pass
+
+	def dialog_filters(self):
+		return list(self._dialog_filters)
+
+	def mime_type_for(self, path):
+		return self.extensions.get(os.path.splitext(path)[1][1:].lower())
+
+	def is_supported(self, path):
+		return os.path.splitext(path)[1][1:].lower() in self.extensions
+
+@lru_cache(maxsize=8192)
+def format_seconds(total_seconds):
+	# The one place playback times are formatted; cached because labels repeat the same values
+	hours, remainder = divmod(total_seconds, 3600)
+	minutes, seconds = divmod(remainder, 60)
+	return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def format_time(milliseconds):
+	return format_seconds(max(0, milliseconds) // 1000)
+
+def queue_limit_bytes(bytes_per_second, seconds=BUFFER_TARGET_SECONDS):
+	# Size a queue so it holds `seconds` of the decoded stream, within sane bounds
+	if bytes_per_second <= 0:
+		return QUEUE_MIN_BYTES
+	return max(QUEUE_MIN_BYTES, min(QUEUE_MAX_BYTES, int(bytes_per_second * seconds)))
+
+def decoded_bytes_per_second(caps):
+	# Estimate the bitrate of a raw decoded stream from its negotiated caps
+	structure = caps.get_structure(0)
+	name = structure.get_name()
+	if name.startswith("video/"):
+		info = GstVideo.VideoInfo()
+		if not info.from_caps(caps):
+			return 0
+		fps = info.fps_n / info.fps_d if info.fps_n > 0 and info.fps_d > 0 else 30
+		return int(info.size * fps)
+	if name.startswith("audio/"):
+		_, rate = structure.get_int("rate")
+		_, channels = structure.get_int("channels")
+		# Assume 32-bit samples, the widest format audioconvert is likely to see
+		return rate * channels * 4
+	return 0
+
+def is_network_url(media_url):
+	scheme, separator, _ = media_url.partition("://")
+	return bool(separator) and scheme.lower() in NETWORK_SCHEMES
+
+@lru_cache(maxsize=None)
+def video_decoder_factories():
+	load_gstreamer()
+	return Gst.ElementFactory.list_get_elements(
+		Gst.ELEMENT_FACTORY_TYPE_DECODER | Gst.ELEMENT_FACTORY_TYPE_MEDIA_VIDEO, Gst.Rank.MARGINAL)
+
+def is_encoded_video(caps):
+	# An elementary video stream a decoder would take; container formats such as
+	# video/quicktime or video/x-matroska also start with "video/" but no decoder accepts them
+	if caps is None or caps.is_empty() or caps.is_any():
+		return False
+	name = caps.get_structure(0).get_name()
+	if not name.startswith("video/") or name == "video/x-raw":
+		return False
+	return bool(Gst.ElementFactory.list_filter(video_decoder_factories(), caps, Gst.PadDirection.SINK, False))
+
+def element_klass(element):
+	factory = element.get_factory()
+	return factory.get_metadata("klass") if factory is not None else ""
+
+def set_decoder_threads(decoder, threads):
+	# Decoders name the setting differently; 0 leaves the decoder's own default (usually one per core)
+	if threads <= 0:
+		return
+	for name in DECODER_THREAD_PROPERTIES:
+		if decoder.find_property(name) is not None:
+			decoder.set_property(name, threads)
+			return
+
+def configure_video_sink(sink):
+	# Drop frames that miss their slot and send QoS upstream so decoders skip work too
+	if sink.find_property("max-lateness") is not None:
+		sink.set_property("qos", True)
+		sink.set_property("max-lateness", MAX_LATENESS_MS * Gst.MSECOND)
+
+class KeyframeIndex:
+	def __init__(self, timestamps, offsets=None):
+		self.timestamps = timestamps  # Sorted video keyframe times in milliseconds
+		self.offsets = offsets  # File byte offset of each keyframe, or None if not recorded
+
+	def __len__(self):
+		return len(self.timestamps)
+
+	def keyframe_before(self, position):
+		i = bisect.bisect_right(self.timestamps, position)
+		return self.timestamps[i - 1] if i else 0
+
+	def nearest(self, position):
+		i = bisect.bisect_left(self.timestamps, position)
+		if i == 0:
+			return self.timestamps[0] if self.timestamps else 0
+		if i == len(self.timestamps):
+			return self.timestamps[-1]
+		before, after = self.timestamps[i - 1], self.timestamps[i]
+		return before if position - before <= after - position else after
+
+	def offset_before(self, position):
+		# Where in the file a seek to position starts reading, or None without recorded offsets
+		if not self.offsets:
+			return None
+		i = bisect.bisect_right(self.timestamps, position)
+		return self.offsets[i - 1] if i else 0
+
+	@classmethod
+	def build(cls, media_path, limit_ms=None, limit_keyframes=None, cancel=None):
+		# Demux the container without decoding and record the video buffers that are
+		# not delta units; this reads the file once but costs no decoder time.
+		# Each keyframe's offset is the last file offset read before it left the demuxer.
+		# With limit_ms or limit_keyframes, stop once that much of the stream has been seen.
+		# cancel: a threading.Event; once set, the build stops and returns None
+		load_gstreamer()
+		pipeline = Gst.Pipeline.new("keyframe-index")
+		filesrc = Gst.ElementFactory.make("filesrc", "file-source")
+		filesrc.set_property("location", media_path)
+		parsebin = Gst.ElementFactory.make("parsebin", "parse-bin")
+		pipeline.add(filesrc)
+		pipeline.add(parsebin)
+		filesrc.link(parsebin)
+
+		timestamps = array("q")
+		offsets = array("q")
+		read_offset = [0]
+		probed = []
+
+		def on_read(pad, info):
+			buffer = info.get_buffer()
+			if buffer is not None and buffer.offset != Gst.BUFFER_OFFSET_NONE:
+				read_offset[0] = buffer.offset
+			return Gst.PadProbeReturn.OK
+
+		def stop():
+			pipeline.post_message(Gst.Message.new_application(pipeline, Gst.Structure.new_empty("index-limit")))
+			return Gst.PadProbeReturn.REMOVE
+
+		def on_buffer(pad, info):
+			buffer = info.get_buffer()
+			if buffer.pts == Gst.CLOCK_TIME_NONE:
+				return Gst.PadProbeReturn.OK
+			if limit_ms is not None and buffer.pts // Gst.MSECOND > limit_ms:
+				return stop()
+			if not buffer.has_flags(Gst.BufferFlags.DELTA_UNIT):
+				timestamps.append(buffer.pts // Gst.MSECOND)
+				offsets.append(read_offset[0])
+				if limit_keyframes is not None and len(timestamps) >= limit_keyframes:
+					return stop()
+			return Gst.PadProbeReturn.OK
+
+		def on_pad_added(element, pad):
+			# Every stream must be linked or the demuxer stops with not-linked
+			sink = Gst.ElementFactory.make("fakesink", None)
+			sink.set_property("sync", False)
+			pipeline.add(sink)
+			sink.sync_state_with_parent()
+			pad.link(sink.get_static_pad("sink"))
+			caps = pad.get_current_caps() or pad.query_caps(None)
+			if caps[0].get_name().startswith("video/") and not probed:
+				probed.append(pad)
+				pad.add_probe(Gst.PadProbeType.BUFFER, on_buffer)
+
+		filesrc.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_read)
+		parsebin.connect("pad-added", on_pad_added)
+		pipeline.set_state(Gst.State.PLAYING)
+		bus = pipeline.get_bus()
+		wait = Gst.CLOCK_TIME_NONE if cancel is None else INDEX_CANCEL_POLL_MS * Gst.MSECOND
+		message = None
+		while message is None and (cancel is None or not cancel.is_set()):
+			message = bus.timed_pop_filtered(wait, Gst.MessageType.EOS | Gst.MessageType.ERROR | Gst.MessageType.APPLICATION)
+		pipeline.set_state(Gst.State.NULL)
+		if message is None or message.type == Gst.MessageType.ERROR or not timestamps:
+			return None
+		order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+		return cls(array("q", (timestamps[i] for i in order)), array("q", (offsets[i] for i in order)))
+
+class MediaInfo:
+	# One compact record per playlist entry; 0 or "" means unknown
+	__slots__ = ("duration_ms", "container", "video_codec", "audio_codec", "width", "height",
+		"frame_rate", "bitrate", "keyframe_interval_ms")
+
+	def __init__(self, duration_ms=0, container="", video_codec="", audio_codec="", width=0, height=0,
+			frame_rate=0.0, bitrate=0, keyframe_interval_ms=0):
+		self.duration_ms = duration_ms
+		self.container = container
+		self.video_codec = video_codec
+		self.audio_codec = audio_codec
+		self.width = width
+		self.height = height
+		self.frame_rate = frame_rate
+		self.bitrate = bitrate  # Bits per second over the whole file
+		self.keyframe_interval_ms = keyframe_interval_ms
+
+	@property
+	def has_video(self):
+		return self.width > 0
+
+def codec_description(caps):
+	return GstPbutils.pb_utils_get_codec_description(caps) if caps is not None else ""
+
+def probe_media(media_path, discoverer):
+	info = discoverer.discover_uri(Gst.filename_to_uri(media_path))
+	media_info = MediaInfo(duration_ms=info.get_duration() // Gst.MSECOND)
+	stream_info = info.get_stream_info()
+	if isinstance(stream_info, GstPbutils.DiscovererContainerInfo):
+		media_info.container = codec_description(stream_info.get_caps())
+	video_streams = info.get_video_streams()
+	if video_streams:
+		video = video_streams[0]
+		media_info.video_codec = codec_description(video.get_caps())
+		media_info.width = video.get_width()
+		media_info.height = video.get_height()
+		if video.get_framerate_denom() > 0:
+			media_info.frame_rate = video.get_framerate_num() / video.get_framerate_denom()
+	audio_streams = info.get_audio_streams()
+	if audio_streams:
+		media_info.audio_codec = codec_description(audio_streams[0].get_caps())
+	if media_info.duration_ms > 0:
+		media_info.bitrate = os.path.getsize(media_path) * 8000 // media_info.duration_ms
+	if media_info.has_video:
+		# The discoverer does not report GOP length; demux just the first few keyframes to measure it
+		index = KeyframeIndex.build(media_path, limit_ms=KEYFRAME_PROBE_MS, limit_keyframes=KEYFRAME_PROBE_COUNT)
+		if index is not None and len(index) > 1:
+			media_info.keyframe_interval_ms = (index.timestamps[-1] - index.timestamps[0]) // (len(index) - 1)
+	return media_info
+
+class WorkerPool:
+	# One bounded set of threads for all background media work. Queued tasks start
+	# highest priority first, and each priority class is capped so a burst of probes
+	# or scans never takes the threads an interactive seek needs
+	_instance = None
+
+	def __init__(self, limits=WORK_LIMITS):
+		self._limits = dict(limits)
+		self._queues = {priority: deque() for priority in self._limits}
+		self._running = dict.fromkeys(self._limits, 0)
+		self._condition = threading.Condition()
+		self._threads = []
+		self._idle = 0
+		self._closed = False
+
+	@classmethod
+	def instance(cls):
+		if cls._instance is None:
+			cls._instance = cls()
+		return cls._instance
+
+	def submit(self, function, priority, token=None):
+		# token: a threading.Event; once set, the task is skipped if it has not started
+		future = Future()
+		with self._condition:
+			if self._closed:
+				future.cancel()
+				return future
+			self._queues[priority].append((function, token, future))
+			# Threads are started on demand, up to one per slot across all classes
+			if self._idle == 0 and len(self._threads) < sum(self._limits.values()):
+				thread = threading.Thread(target=self._run, name=f"media-worker-{len(self._threads)}", daemon=True)
+				self._threads.append(thread)
+				thread.start()
+			self._condition.notify()
+		return future
+
+	def _next_task(self):
+		# Call with the condition held
+		for priority in sorted(self._queues):
+			queue = self._queues[priority]
+			if queue and self._running[priority] < self._limits[priority]:
+				return priority, queue.popleft()
+		return None
+
+	def _run(self):
+		while True:
+			with self._condition:
+				self._idle += 1
+				task = self._next_task()
+				while task is None and not (self._closed and not any(self._queues.values())):
+					self._condition.wait()
+					task = self._next_task()
+				self._idle -= 1
+				if task is None:
+					return
+				priority, (function, token, future) = task
+				self._running[priority] += 1
+			try:
+				if token is not None and token.is_set():
+					future.cancel()
+				if future.set_running_or_notify_cancel():
+					try:
+						future.set_result(function())
+					except BaseException as error:
+						future.set_exception(error)
+			finally:
+				with self._condition:
+					self._running[priority] -= 1
+					self._condition.notify_all()
+
+	def shutdown(self, timeout=WORKER_SHUTDOWN_SECONDS):
+		# Finish what is queued (tasks whose token is set are skipped), then stop the threads;
+		# callers cancel their tokens first. Threads still busy after the timeout are daemons.
+		# A shut-down process-wide pool is let go, so instance() builds a fresh one for later work
+		with self._condition:
+			self._closed = True
+			self._condition.notify_all()
+			threads = list(self._threads)
+		if type(self)._instance is self:
+			type(self)._instance = None
+		deadline = time.monotonic() + timeout
+		for thread in threads:
+			thread.join(max(0.0, deadline - time.monotonic()))
+
+class SerialQueue:
+	# Runs tasks on a WorkerPool one at a time, in submission order
+	def __init__(self, pool, priority):
+		self._pool = pool
+		self._priority = priority
+		self._lock = threading.Lock()
+		self._tasks = deque()
+		self._active = False  # A drain task is queued or running
+
+	def submit(self, function):
+		with self._lock:
+			self._tasks.append(function)
+			if self._active:
+				return
+			self._active = True
+		if self._pool.submit(self._drain, self._priority).cancelled():
+			# The pool is shut down and will run nothing more
+			with self._lock:
+				self._tasks.clear()
+				self._active = False
+
+	def _drain(self):
+		while True:
+			with self._lock:
+				if not self._tasks:
+					self._active = False
+					return
+				function = self._tasks.popleft()
+			try:
+				function()
+			except Exception:
+				sys.excepthook(*sys.exc_info())
+
+class ProbeService(QObject):
+	# Emitted from a pool thread with a MediaInfo, or None if the file could not be probed
+	probed = pyqtSignal(str, object)
+
+	def __init__(self, store=None, pool=None, parent=None):
+		super().__init__(parent)
+		self._store = store
+		self._pool = pool or WorkerPool.instance()
+		self._cancel = threading.Event()
+		self._local = threading.local()
+		self._lock = threading.Lock()
+		self._pending = set()  # Paths queued or being probed; a later request for one is a duplicate
+
+	def probe(self, media_paths):
+		for media_path in media_paths:
+			with self._lock:
+				if not media_path or media_path in self._pending:
+					continue
+				self._pending.add(media_path)
+			self._pool.submit(lambda media_path=media_path: self._run(media_path), WORK_PROBE, self._cancel)
+
+	def _run(self, media_path):
+		try:
+			load_gstreamer()
+			# Discoverer instances are not shared between threads
+			discoverer = getattr(self._local, "discoverer", None)
+			if discoverer is None:
+				discoverer = self._local.discoverer = GstPbutils.Discoverer.new(PROBE_TIMEOUT_SECONDS * Gst.SECOND)
+			try:
+				media_info = probe_media(media_path, discoverer)
+			except GLib.Error:
+				media_info = None
+			if media_info is not None and self._store is not None:
+				self._store.store(media_path, media_info=media_info)
+		finally:
+			# Done with this version of the file; a changed file can be probed again
+			with self._lock:
+				self._pending.discard(media_path)
+		self.probed.emit(media_path, media_info)
+
+	def shutdown(self):
+		# Probes that have not started are skipped
+		self._cancel.set()
+
+def file_identity(media_path):
+	# A file is "known" only while its path, size and mtime all match
+	try:
+		stat = os.stat(media_path)
+	except OSError:
+		return None
+	return stat.st_size, stat.st_mtime_ns
+
+class MetadataStore:
+	def __init__(self, path=None, max_entries=METADATA_MAX_ENTRIES, max_bytes=METADATA_MAX_BYTES):
+		if path is None:
+			path = os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), METADATA_DB_NAME)
+		self.path = path
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		# Probe workers and the indexing thread write here too
+		self._lock = threading.Lock()
+		self._connection = None
+		self._closed = False
+		self._writes = 0
+
+	def _connect(self):
+		# Opened on first use so startup never touches the disk; call with the lock held.
+		# A worker still running after close() gets an error rather than a reopened database
+		if self._closed:
+			raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+		if self._connection is not None:
+			return self._connection
+		os.makedirs(os.path.dirname(self.path), exist_ok=True)
+		self._connection = sqlite3.connect(self.path, check_same_thread=False)
+		self._connection.execute("PRAGMA journal_mode=WAL")
+		self._connection.execute("""CREATE TABLE IF NOT EXISTS media (
+			path TEXT PRIMARY KEY,
+			size INTEGER NOT NULL,
+			mtime_ns INTEGER NOT NULL,
+			info TEXT,
+			keyframes BLOB,
+			keyframe_offsets BLOB,
+			resume_ms INTEGER NOT NULL DEFAULT 0,
+			bytes INTEGER NOT NULL DEFAULT 0,
+			accessed REAL NOT NULL)""")
+		if "keyframe_offsets" not in {row[1] for row in self._connection.execute("PRAGMA table_info(media)")}:
+			# Stores written before keyframe offsets were recorded
+			self._connection.execute("ALTER TABLE media ADD COLUMN keyframe_offsets BLOB")
+		self._connection.execute("CREATE INDEX IF NOT EXISTS media_accessed ON media (accessed)")
+		self._connection.execute("""CREATE TABLE IF NOT EXISTS session (
+			id INTEGER PRIMARY KEY CHECK (id = 0),
+			playlist TEXT NOT NULL,
+			playlist_index INTEGER NOT NULL,
+			saved REAL NOT NULL)""")
+		self._connection.commit()
+		self._evict()
+		return self._connection
+
+	def lookup_many(self, media_paths, identities=None):
+		# One query for the whole batch; identities may be supplied by a caller that already stat'ed the files
+		if identities is None:
+			identities = {media_path: file_identity(media_path) for media_path in media_paths}
+		wanted = [media_path for media_path in media_paths if identities.get(media_path) is not None]
+		if not wanted:
+			return {}
+		with self._lock:
+			rows = self._connect().execute(
+				"SELECT path, size, mtime_ns, info, keyframes, keyframe_offsets, resume_ms FROM media "
+				"WHERE path IN (SELECT value FROM json_each(?))", (json.dumps(wanted),)).fetchall()
+			results = {}
+			for media_path, size, mtime_ns, info, keyframes, offsets, resume_ms in rows:
+				if identities[media_path] != (size, mtime_ns):
+					continue  # The file changed since it was probed
+				media_info = MediaInfo(**json.loads(info)) if info else None
+				index = KeyframeIndex(array("q", keyframes), array("q", offsets) if offsets else None) if keyframes else None
+				results[media_path] = (media_info, index, resume_ms)
+			if results:
+				self._connection.execute(
+					"UPDATE media SET accessed = ? WHERE path IN (SELECT value FROM json_each(?))",
+					(time.time(), json.dumps(list(results))))
+				self._connection.commit()
+		return results
+
+	def store(self, media_path, media_info=None, keyframe_index=None):
+		identity = file_identity(media_path)
+		if identity is None:
+			return
+		info = json.dumps({name: getattr(media_info, name) for name in MediaInfo.__slots__}) if media_info else None
+		keyframes = keyframe_index.timestamps.tobytes() if keyframe_index else None
+		offsets = keyframe_index.offsets.tobytes() if keyframe_index and keyframe_index.offsets else None
+		with self._lock:
+			# Keep whichever half of the record is not being written, unless the file changed
+			self._connect().execute(
+				"""INSERT INTO media (path, size, mtime_ns, info, keyframes, keyframe_offsets, bytes, accessed)
+				VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+				ON CONFLICT (path) DO UPDATE SET
+					info = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+						THEN coalesce(excluded.info, info) ELSE excluded.info END,
+					keyframes = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+						THEN coalesce(excluded.keyframes, keyframes) ELSE excluded.keyframes END,
+					keyframe_offsets = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+						AND excluded.keyframes IS NULL THEN keyframe_offsets ELSE excluded.keyframe_offsets END,
+					resume_ms = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+						THEN resume_ms ELSE 0 END,
+					size = excluded.size,
+					mtime_ns = excluded.mtime_ns,
+					accessed = excluded.accessed""",
+				(media_path, identity[0], identity[1], info, keyframes, offsets, time.time()))
+			self._connection.execute(
+				"UPDATE media SET bytes = length(path) + coalesce(length(info), 0) + coalesce(length(keyframes), 0) "
+				"+ coalesce(length(keyframe_offsets), 0) "
+				"WHERE path = ?", (media_path,))
+			self._connection.commit()
+			self._writes += 1
+			if self._writes % METADATA_EVICT_EVERY == 0:
+				self._evict()
+
+	def store_resume_many(self, positions):
+		# positions: {path: milliseconds}; a file that changed keeps nothing but the new position
+		rows = []
+		now = time.time()
+		for media_path, position in positions.items():
+			identity = file_identity(media_path)
+			if identity is not None:
+				rows.append((media_path, identity[0], identity[1], position, now))
+		if not rows:
+			return
+		with self._lock:
+			self._connect().executemany(
+				"""INSERT INTO media (path, size, mtime_ns, resume_ms, bytes, accessed)
+				VALUES (?, ?, ?, ?, 0, ?)
+				ON CONFLICT (path) DO UPDATE SET
+					info = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns THEN info END,
+					keyframes = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns THEN keyframes END,
+					keyframe_offsets = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+						THEN keyframe_offsets END,
+					size = excluded.size,
+					mtime_ns = excluded.mtime_ns,
+					resume_ms = excluded.resume_ms,
+					accessed = excluded.accessed""", rows)
+			self._connection.execute(
+				"UPDATE media SET bytes = length(path) + coalesce(length(info), 0) + coalesce(length(keyframes), 0) "
+				"+ coalesce(length(keyframe_offsets), 0) "
+				"WHERE path IN (SELECT value FROM json_each(?))", (json.dumps([row[0] for row in rows]),))
+			self._connection.commit()
+
+	def save_session(self, playlist, index):
+		# playlist: URL strings
+		with self._lock:
+			self._connect().execute(
+				"INSERT OR REPLACE INTO session (id, playlist, playlist_index, saved) VALUES (0, ?, ?, ?)",
+				(json.dumps(playlist), index, time.time()))
+			self._connection.commit()
+
+	def load_session(self):
+		# (URL strings, index) of the last session, or None
+		with self._lock:
+			row = self._connect().execute("SELECT playlist, playlist_index FROM session WHERE id = 0").fetchone()
+		if row is None:
+			return None
+		return json.loads(row[0]), row[1]
+
+	def evict(self):
+		with self._lock:
+			self._connect()
+			self._evict()
+
+	def _evict(self):
+		# Drop least recently used records until both caps are met; call with the lock held
+		count, total_bytes = self._connection.execute("SELECT count(*), coalesce(sum(bytes), 0) FROM media").fetchone()
+		excess = max(0, count - self.max_entries)
+		if total_bytes > self.max_bytes and count:
+			# Records are roughly uniform in size; remove enough of the oldest to get under the cap
+			excess = max(excess, int(count * (1 - self.max_bytes / total_bytes)) + 1)
+		if excess:
+			self._connection.execute(
+				"DELETE FROM media WHERE path IN (SELECT path FROM media ORDER BY accessed LIMIT ?)", (excess,))
+			self._connection.commit()
+
+	def close(self):
+		with self._lock:
+			self._closed = True
+			if self._connection is not None:
+				self._connection.close()
+				self._connection = None
+
+class StoreWriter(QObject):
+	# Coalesces resume positions and the playlist session and writes them to the
+	# MetadataStore on the worker pool, so the GUI never waits on SQLite
+	def __init__(self, store, pool=None, delay=STORE_WRITE_DELAY_SECONDS, parent=None):
+		super().__init__(parent)
+		self._store = store
+		self._lock = threading.Lock()
+		self._resume = {}  # Local file path -> position in milliseconds
+		self._session = None  # (playlist of QUrl, index); the list is copied on the worker
+		# One write at a time, so an older position can never overwrite a newer one
+		self._queue = SerialQueue(pool or WorkerPool.instance(), WORK_STORE)
+		# Debounce: the first change starts the timer, later ones ride along
+		self._timer = QTimer(self)
+		self._timer.setSingleShot(True)
+		self._timer.setInterval(int(delay * 1000))
+		self._timer.timeout.connect(lambda: self._queue.submit(self._flush))
+
+	def set_resume(self, media_path, position):
+		with self._lock:
+			self._resume[media_path] = position
+		if not self._timer.isActive():
+			self._timer.start()
+
+	def set_session(self, playlist, index):
+		# playlist: URL strings, iterated on the writer's thread (see PlaylistModel.snapshot)
+		with self._lock:
+			self._session = (playlist, index)
+		if not self._timer.isActive():
+			self._timer.start()
+
+	def _flush(self):
+		with self._lock:
+			resume, self._resume = self._resume, {}
+			session, self._session = self._session, None
+		if resume:
+			self._store.store_resume_many(resume)
+		if session is not None:
+			playlist, index = session
+			self._store.save_session(list(playlist), index)
+
+	def close(self):
+		# Queue whatever is still pending; WorkerPool.shutdown waits for it
+		self._timer.stop()
+		self._queue.submit(self._flush)
+
+class FolderScanner(QObject):
+	# Emitted from a pool thread with the scan's generation and lists of (path, size, mtime_ns)
+	found = pyqtSignal(int, list)
+	finished = pyqtSignal(int, int)  # Generation, file count
+
+	def __init__(self, pool=None, parent=None):
+		super().__init__(parent)
+		self._pool = pool or WorkerPool.instance()
+		self._cancel = None
+		# Bumped by every scan and cancel; batches of an abandoned scan may already be queued
+		# for the GUI thread, so receivers drop anything not tagged with the current generation
+		self.generation = 0
+
+	def scan(self, roots, registry):
+		# Only one scan runs at a time; starting another abandons the previous one
+		self.cancel()
+		cancel = self._cancel = threading.Event()
+		roots = list(roots)
+		generation = self.generation
+		self._pool.submit(lambda: self._run(roots, registry, cancel, generation), WORK_BACKGROUND, cancel)
+
+	def cancel(self):
+		self.generation += 1
+		if self._cancel is not None:
+			self._cancel.set()
+
+	def _run(self, roots, registry, cancel, generation):
+		batch = []
+		flushed_at = time.monotonic()
+		count = 0
+		for entry in iter_media_files(roots, registry, cancel):
+			batch.append(entry)
+			count += 1
+			# Hand over the first file at once so playback can start, then batch the rest
+			if count == 1 or len(batch) >= SCAN_BATCH_SIZE or time.monotonic() - flushed_at >= SCAN_BATCH_SECONDS:
+				self.found.emit(generation, batch)
+				batch = []
+				flushed_at = time.monotonic()
+		if batch and not cancel.is_set():
+			self.found.emit(generation, batch)
+		if not cancel.is_set():
+			self.finished.emit(generation, count)
+
+def iter_media_files(roots, registry, cancel):
+	# Walk directory trees lazily (depth first, sorted per directory) and yield playable files
+	stack = [root for root in reversed(roots)]
+	while stack and not cancel.is_set():
+		path = stack.pop()
+		if not os.path.isdir(path):
+			if registry.is_supported(path):
+				identity = file_identity(path)
+				if identity is not None:
+					yield (path,) + identity
+			continue
+		try:
+			with os.scandir(path) as entries:
+				entries = sorted(entries, key=lambda entry: entry.name.lower())
+		except OSError:
+			continue
+		directories = []
+		for entry in entries:
+			if cancel.is_set():
+				return
+			try:
+				if entry.is_dir(follow_symlinks=False):
+					directories.append(entry.path)
+				elif entry.is_file() and registry.is_supported(entry.name):
+					stat = entry.stat()
+					yield entry.path, stat.st_size, stat.st_mtime_ns
+			except OSError:
+				continue
+		stack.extend(reversed(directories))
+
+class SegmentCache:
+	# Block-aligned byte ranges of media files, shared by every BlockFileSource in the
+	# process so seeking back to a recent or bookmarked point is served from RAM
+	_instance = None
+
+	def __init__(self, max_bytes=SEGMENT_CACHE_BYTES):
+		self.max_bytes = max_bytes
+		self._segments = OrderedDict()  # (file_key, index) -> bytes, least recently used first
+		self._bytes = 0
+		self._pins = OrderedDict()  # (file_key, first, last) -> None, oldest first
+		self._pinned = set()
+		self._lock = threading.Lock()  # Sources read on their own streaming threads
+		self.hits = 0
+		self.misses = 0
+
+	@classmethod
+	def instance(cls):
+		if cls._instance is None:
+			cls._instance = cls()
+		return cls._instance
+
+	def get(self, file_key, index):
+		with self._lock:
+			data = self._segments.get((file_key, index))
+			if data is None:
+				self.misses += 1
+				return None
+			self._segments.move_to_end((file_key, index))
+			self.hits += 1
+			return data
+
+	def put(self, file_key, index, data):
+		with self._lock:
+			key = (file_key, index)
+			if key in self._segments:
+				return
+			self._segments[key] = data
+			self._bytes += len(data)
+			self._evict()
+
+	def pin(self, file_key, first, last):
+		# Keep segments first..last (inclusive) once read; pins never take more than half the cache
+		with self._lock:
+			self._pins[(file_key, first, last)] = None
+			while len(self._pins) > 1 and self._pinned_bytes(file_key[2]) > self.max_bytes // 2:
+				self._pins.popitem(last=False)
+			self._update_pinned()
+			self._evict()
+
+	def unpin(self, file_key, first, last):
+		with self._lock:
+			if (file_key, first, last) in self._pins:
+				del self._pins[(file_key, first, last)]
+				self._update_pinned()
+
+	def forget_stale(self, file_key):
+		# A file rewritten since its segments were cached gets a new key; drop the old segments and pins
+		path = file_key[0]
+		with self._lock:
+			for key in [key for key in self._pins if key[0][0] == path and key[0] != file_key]:
+				del self._pins[key]
+			for key in [key for key in self._segments if key[0][0] == path and key[0] != file_key]:
+				self._bytes -= len(self._segments.pop(key))
+			self._update_pinned()
+
+	def _update_pinned(self):
+		self._pinned = {(key, index) for key, start, end in self._pins for index in range(start, end + 1)}
+
+	def _pinned_bytes(self, segment_size):
+		return sum(end - start + 1 for _, start, end in self._pins) * segment_size
+
+	def _evict(self):
+		if self._bytes <= self.max_bytes:
+			return
+		for key in list(self._segments):
+			if key in self._pinned:
+				continue
+			self._bytes -= len(self._segments.pop(key))
+			if self._bytes <= self.max_bytes:
+				break
+
+class BlockFileSource:
+	# Feeds an appsrc from a local or network-mounted file in large blocks, read with
+	# pread or served from an mmap, with sequential readahead hints to the page cache
+	def __init__(self, path, block_size=READ_BLOCK_SIZE, use_mmap=False, cache=None):
+		self.path = path
+		self.block_size = block_size
+		self._fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+		stat = os.fstat(self._fd)
+		self.size = stat.st_size
+		self._cache = cache
+		self._file_key = (path, stat.st_mtime_ns, block_size)  # A rewritten file gets new segments
+		if cache is not None:
+			cache.forget_stale(self._file_key)
+		self._map = None
+		if use_mmap and self.size > 0:
+			import mmap
+			self._map = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+		self._lock = threading.Lock()  # need-data/seek-data run on the streaming thread, close() on the GUI thread
+		self._offset = 0
+		self._block = None  # (index, bytes) of the block read last; demuxers read a block in many small pieces
+		self._window = block_size  # Readahead; doubles while reads stay sequential
+		self._advised_until = 0
+		self.reads = 0
+		self.bytes_read = 0
+		self.cache_hits = 0
+		self.seeks = 0
+		self.read_seconds = 0.0
+
+		self._advise(0, 0, "POSIX_FADV_SEQUENTIAL")
+		# MP4 (moov), Matroska (Cues) and AVI (idx1) keep their index at the start or the
+		# end; the demuxer reads it before anything else, so fetch both ends up front
+		self._advise(0, INDEX_PREFETCH_BYTES, "POSIX_FADV_WILLNEED")
+		self._advise(max(0, self.size - INDEX_PREFETCH_BYTES), INDEX_PREFETCH_BYTES, "POSIX_FADV_WILLNEED")
+
+	def _advise(self, offset, length, advice):
+		# Page cache hints are best effort and unavailable on Windows and macOS
+		if hasattr(os, "posix_fadvise"):
+			try:
+				os.posix_fadvise(self._fd, offset, length, getattr(os, advice))
+			except OSError:
+				pass
+
+	def attach(self, appsrc):
+		appsrc.set_property("format", Gst.Format.BYTES)
+		appsrc.set_property("stream-type", 2)  # GST_APP_STREAM_TYPE_RANDOM_ACCESS
+		appsrc.set_property("size", self.size)
+		appsrc.connect("need-data", self._need_data)
+		appsrc.connect("seek-data", self._seek_data)
+
+	def read(self, offset, count):
+		# Also used by callers that want bytes without an appsrc (e.g. the benchmark)
+		started = time.perf_counter()
+		if self._map is not None:
+			data = self._map[offset:offset + count]
+		else:
+			data = os.pread(self._fd, count, offset)
+		self.read_seconds += time.perf_counter() - started
+		self.reads += 1
+		self.bytes_read += len(data)
+		return data
+
+	def read_segment(self, offset, count=None):
+		# Up to count bytes (default: the rest) of the block-aligned segment holding offset,
+		# from the last block read or the cache when possible
+		index = offset // self.block_size
+		if self._block is not None and self._block[0] == index:
+			data = self._block[1]
+		else:
+			data = self._cache.get(self._file_key, index) if self._cache is not None else None
+			if data is None:
+				data = self.read(index * self.block_size, self.block_size)
+				if self._cache is not None:
+					self._cache.put(self._file_key, index, data)
+			else:
+				self.cache_hits += 1
+			self._block = (index, data)
+		start = offset - index * self.block_size
+		return data[start:] if count is None else data[start:start + count]
+
+	def _pin_range(self, offset):
+		first = max(0, offset - BOOKMARK_PIN_BEFORE_BYTES) // self.block_size
+		last = min(self.size, offset + BOOKMARK_PIN_AFTER_BYTES) // self.block_size
+		return self._file_key, first, last
+
+	def pin_around(self, offset):
+		# Keep the segments around a byte offset cached, e.g. a bookmark's keyframe
+		if self._cache is not None:
+			self._cache.pin(*self._pin_range(offset))
+
+	def unpin_around(self, offset):
+		if self._cache is not None:
+			self._cache.unpin(*self._pin_range(offset))
+
+	def _need_data(self, appsrc, length):
+		with self._lock:
+			if self._fd is None:
+				return
+			if self._offset >= self.size:
+				appsrc.emit("end-of-stream")
+				return
+			# Demuxers ask for small lengths; the disk is read a whole block at a time and the
+			# block kept in the segment cache, but appsrc gets exactly what was asked for, since
+			# in random-access mode it moves its offset on by the pushed size
+			if 0 < length < 0xFFFFFFFF:  # -1 (any size) arrives as the unsigned maximum
+				data = self.read_segment(self._offset, length)
+				while len(data) < length and self._offset + len(data) < self.size:
+					data += self.read_segment(self._offset + len(data), length - len(data))
+			else:
+				data = self.read_segment(self._offset)
+			self._offset += len(data)
+			if self._offset + self.block_size > self._advised_until:
+				start = max(self._offset, self._advised_until)
+				self._advised_until = self._offset + self._window
+				self._advise(start, self._advised_until - start, "POSIX_FADV_WILLNEED")
+				self._window = min(self._window * 2, READAHEAD_MAX_BYTES)
+		appsrc.emit("push-buffer", Gst.Buffer.new_wrapped(data))
+
+	def _seek_data(self, appsrc, offset):
+		with self._lock:
+			if offset != self._offset:
+				# A jump (index lookup or user seek) restarts readahead from one block
+				self.seeks += 1
+				self._window = self.block_size
+				self._advised_until = offset
+			self._offset = offset
+		return True
+
+	def stats(self):
+		return {
+			"mode": "mmap" if self._map is not None else "blocks",
+			"block_size": self.block_size,
+			"reads": self.reads,
+			"bytes": self.bytes_read,
+			"cache_hits": self.cache_hits,
+			"seeks": self.seeks,
+			"read_seconds": self.read_seconds,
+			"mb_per_second": self.bytes_read / self.read_seconds / 1e6 if self.read_seconds else None,
+		}
+
+	def close(self):
+		with self._lock:
+			if self._map is not None:
+				self._map.close()
+				self._map = None
+			if self._fd is not None:
+				os.close(self._fd)
+				self._fd = None
+			self._block = None
+
+# Pixel formats QImage can wrap without conversion, most preferred first
+if sys.byteorder == "little":
+	QIMAGE_FORMATS = {"BGRx": QImage.Format_RGB32, "BGRA": QImage.Format_ARGB32}
+else:
+	QIMAGE_FORMATS = {"xRGB": QImage.Format_RGB32, "ARGB": QImage.Format_ARGB32}
+QIMAGE_FORMATS.update({"RGBx": QImage.Format_RGBX8888, "RGBA": QImage.Format_RGBA8888, "RGB": QImage.Format_RGB888})
+
+class VideoFrameWidget(QWidget):
+	# Paints frames handed over by a FrameSink. It overlays its parent (e.g. the window's
+	# QVideoWidget) below the parent's other children and lets mouse events through
+	_frame_pending = pyqtSignal()
+	presented = pyqtSignal()
+
+	def __init__(self, parent):
+		super().__init__(parent)
+		self.setAttribute(Qt.WA_TransparentForMouseEvents)
+		self.setAttribute(Qt.WA_OpaquePaintEvent)
+		self._lock = threading.Lock()
+		self._pending = None  # Newest (QImage, release) not shown yet
+		self._current = None  # (QImage, release) being painted
+		self.frames_presented = 0
+		self.frames_skipped = 0  # Replaced before the GUI thread got to them
+		self._frame_pending.connect(self._present)
+		parent.installEventFilter(self)
+		self.setGeometry(parent.rect())
+		self.lower()
+		self.show()
+
+	def submit(self, image, release):
+		# Streaming thread; release() hands the buffer back to its pool once the frame is done with
+		with self._lock:
+			previous, self._pending = self._pending, (image, release)
+		if previous is not None:
+			previous[1]()
+			self.frames_skipped += 1
+			return
+		try:
+			self._frame_pending.emit()
+		except RuntimeError:
+			self.clear()  # The widget was deleted under us
+
+	def _present(self):
+		with self._lock:
+			frame, self._pending = self._pending, None
+		if frame is None:
+			return
+		if self._current is not None:
+			self._current[1]()
+		self._current = frame
+		self.frames_presented += 1
+		self.update()
+		self.presented.emit()
+
+	def clear(self):
+		with self._lock:
+			frames, self._pending = [self._pending, self._current], None
+			self._current = None
+		for frame in frames:
+			if frame is not None:
+				frame[1]()
+
+	def paintEvent(self, event):
+		painter = QPainter(self)
+		painter.fillRect(self.rect(), Qt.black)
+		if self._current is not None:
+			image = self._current[0]
+			size = image.size().scaled(self.size(), Qt.KeepAspectRatio)
+			origin = QPoint((self.width() - size.width()) // 2, (self.height() - size.height()) // 2)
+			painter.drawImage(QRect(origin, size), image)
+		painter.end()
+
+	def eventFilter(self, obj, event):
+		if obj is self.parent() and event.type() == QEvent.Resize:
+			self.setGeometry(obj.rect())
+		return False
+
+class FrameSink:
+	# Drives an appsink that negotiates a QImage-compatible format and hands frames to a
+	# VideoFrameWidget. Each QImage wraps the mapped buffer memory; the buffer stays mapped
+	# until the widget releases it and then returns to the upstream pool for reuse.
+	# Mapping in place needs the gst-python overrides, which expose the mapping as a memoryview;
+	# plain PyGObject returns a copy, which is then used as such and the buffer unmapped at once
+	_copy_reported = False  # The fallback is reported once per process
+
+	def __init__(self, appsink, view, copy=False):
+		self._view = view
+		self._copy = copy  # Copy each frame out, as sample_to_image does; a baseline for --benchmark
+		self._info = None
+		self._format = None
+		self.copied_bytes = 0
+		self.zero_copy = None  # Whether frames are wrapped in place; known after the first mapped frame
+		appsink.set_property("caps", Gst.Caps.from_string(
+			"video/x-raw,format={ %s }" % ", ".join(QIMAGE_FORMATS)))
+		appsink.set_property("emit-signals", True)
+		# Holding at most a couple of samples keeps the pool small and its buffers recycled
+		appsink.set_property("max-buffers", 2)
+		appsink.set_property("drop", True)
+		appsink.connect("new-sample", self._new_sample)
+		appsink.get_static_pad("sink").connect("notify::caps", self._caps_changed)
+
+	def _caps_changed(self, pad, param):
+		caps = pad.get_current_caps()
+		info = GstVideo.VideoInfo()
+		if caps is not None and info.from_caps(caps):
+			self._format = QIMAGE_FORMATS.get(info.finfo.name)
+			self._info = info
+
+	def _new_sample(self, appsink):
+		# Streaming thread
+		sample = appsink.emit("pull-sample")
+		info = self._info
+		if sample is None or info is None or self._format is None:
+			return Gst.FlowReturn.OK
+		buffer = sample.get_buffer()
+		meta = GstVideo.buffer_get_video_meta(buffer)
+		stride = meta.stride[0] if meta is not None else info.stride[0]
+		if self._copy:
+			data = buffer.extract_dup(0, buffer.get_size())
+			self.copied_bytes += len(data)
+			image = QImage(data, info.width, info.height, stride, self._format).copy()
+			self._view.submit(image, lambda: None)
+			return Gst.FlowReturn.OK
+		ok, map_info = buffer.map(Gst.MapFlags.READ)
+		if not ok:
+			return Gst.FlowReturn.OK
+		if not isinstance(map_info.data, memoryview):
+			data = bytes(map_info.data)
+			buffer.unmap(map_info)
+			self.zero_copy = False
+			self.copied_bytes += len(data)
+			if not FrameSink._copy_reported:
+				FrameSink._copy_reported = True
+				print("gst-python overrides not found; video frames are copied out of their buffers", file=sys.stderr)
+			image = QImage(data, info.width, info.height, stride, self._format)
+			# The image wraps data without owning it; hold it until the widget is done
+			self._view.submit(image, lambda: data)
+			return Gst.FlowReturn.OK
+		self.zero_copy = True
+		image = QImage(sip.voidptr(map_info.data), info.width, info.height, stride, self._format)
+
+		def release():
+			# Keep sample (and so the buffer) alive until here
+			sample.get_buffer().unmap(map_info)
+		self._view.submit(image, release)
+		return Gst.FlowReturn.OK
+
+class GstPlayer(QObject):
+	# Mirror the QMediaPlayer signals MainWindow listens to, so either backend can drive the UI
+	stateChanged = pyqtSignal(QMediaPlayer.State)
+	mediaStatusChanged = pyqtSignal(QMediaPlayer.MediaStatus)
+	positionChanged = pyqtSignal('qint64')
+	durationChanged = pyqtSignal('qint64')
+	error = pyqtSignal(QMediaPlayer.Error)
+	# Emitted when the first frame after a flushing seek has reached the sink
+	seekFinished = pyqtSignal()
+	# A frame reached the window (render_to_widget only)
+	framePresented = pyqtSignal()
+	# Every message popped from the pipeline bus, delivered on the GUI thread
+	busMessage = pyqtSignal(object)
+	# Carries EOS and ASYNC_DONE from the streaming thread to the GUI thread
+	_streaming_message = pyqtSignal(object, object)
+	# Carries (callback, result) from the state worker to the GUI thread
+	_task_done = pyqtSignal(object, object)
+
+	# Sink factories; the benchmarks' HeadlessGstPlayer swaps in fake sinks
+	video_sink_factory = "autovideosink"
+	audio_sink_factory = "autoaudiosink"
+	# Paint into the widget given to setVideoOutput through an appsink, instead of
+	# letting video_sink_factory open a window of its own
+	render_to_widget = True
+	copy_frames = False  # FrameSink baseline that copies every frame out of its buffer
+
+	def __init__(self, parent=None, decoder_threads=0, late_frame_policy="drop", source_mode="filesrc",
+			read_block_size=READ_BLOCK_SIZE, network_buffer_seconds=NETWORK_BUFFER_SECONDS, max_bitrate=0):
+		super().__init__(parent)
+		load_gstreamer()
+
+		self._network_buffer_seconds = network_buffer_seconds
+		self._max_bitrate = max_bitrate  # Bits/s cap on HLS/DASH renditions; 0 for none
+		self._network = False  # The current media is streamed over HTTP
+		self._stalled = False  # Held in PAUSED until the network buffer refills
+		self._playback_started = False  # The initial buffer has filled; later stalls count as rebuffers
+		self.rebuffers = 0
+		# Bits/s, smoothed; kept across media so the next stream can start at a sensible rendition
+		self.bandwidth_bps = None
+		self.rendition_switches = 0
+		self.renditions = deque(maxlen=RENDITION_HISTORY)  # (perf_counter time, width, height) per video resolution
+
+		self._source_mode = source_mode  # One of SOURCE_MODES
+		self._read_block_size = read_block_size
+		self._file_source = None  # BlockFileSource behind the appsrc in "blocks" and "mmap" modes
+		self._filesrc_stats = None  # Reads counted at the filesrc pad in "filesrc" mode
+
+		self._decoder_threads = decoder_threads
+		self._late_frame_policy = late_frame_policy  # One of LATE_FRAME_POLICIES
+		self._pipeline = None
+		self._video_decoder = None
+		self._qos_dropped = {}  # Frames dropped so far, per element posting QoS
+		self._last_late_action = 0.0
+		self._decode_started = {}  # (stream, buffer PTS) -> time it entered a video decoder
+		self.late_frame_actions = 0
+		self.late_frames = 0
+		self.buffering_percent = 100
+		self.decode_latencies = deque(maxlen=DECODE_LATENCY_WINDOW)  # Milliseconds, drained by PipelineTelemetry
+		self._video_queue = None
+		self._audio_queue = None
+		self._volume = None
+		self._media_url = None
+		self._state = QMediaPlayer.StoppedState
+		self._media_status = QMediaPlayer.NoMedia
+		self._duration = 0
+		self._last_position = 0
+		self._volume_level = 50
+		self._muted = False
+		self._error_string = ""
+		self._video_output = None
+		self._frame_view = None  # VideoFrameWidget over the video output
+		self._frame_sink = None
+		self._seeking = False
+		self._video_enabled = True  # False leaves video undecoded (see set_video_enabled)
+		self._video_discard = None  # fakesink taking the encoded video while it is disabled
+		self._has_video = False  # The current pipeline's decodebin has exposed a video stream
+		self._reattach = None  # (position, started, seek issued) while a rebuilt pipeline catches up
+		self.last_reattach_ms = None  # Rebuild to first frame back at the old position
+
+		# Opening files and state changes can block (slow mounts, decoder startup, teardown);
+		# they run in submission order on the worker pool and never on the GUI thread
+		self._worker = SerialQueue(WorkerPool.instance(), WORK_INTERACTIVE)
+		self._generation = 0  # Bumped by setMedia; queued work for older media is skipped
+		self._task_done.connect(self._on_task_done)
+
+		# Poll the pipeline bus from the Qt event loop; a GLib main loop is not
+		# guaranteed to run under Qt (e.g. on Windows), so signal watches may never fire
+		self._bus_timer = QTimer(self)
+		self._bus_timer.setInterval(100)
+		self._bus_timer.timeout.connect(self.poll_bus)
+		self._streaming_message.connect(self._on_streaming_message)
+
+	def create_buffering_pipeline(self, media_url):
+		# Create a GStreamer pipeline for buffering video
+		pipeline = self.new_pipeline("buffered-player")
+
+		if is_network_url(media_url):
+			# uridecodebin brings its own HTTP source
+			filesrc = None
+			decodebin = self.make_network_decoder(media_url)
+		else:
+			# Define the source element
+			filesrc = self.make_source(media_url)
+
+			# Define the decodebin element
+			decodebin = Gst.ElementFactory.make("decodebin", "decode-bin")
+
+		if self._video_enabled:
+			video_elements = self.make_video_output()
+		else:
+			# Leave video undecoded: decodebin stops at the encoded stream, which a fakesink swallows
+			decodebin.connect("autoplug-continue", self._autoplug_continue)
+			video_discard = Gst.ElementFactory.make("fakesink", "video-sink")
+			# Not synced to the clock, but it still prerolls, so video-only files report ASYNC_DONE
+			video_discard.set_property("sync", False)
+			self._video_discard = video_discard
+			video_elements = [video_discard]
+
+		# Create a GStreamer audio sink element
+		audio_sink = self.make_sink(self.audio_sink_factory, "audio-sink")
+
+		# Create a GStreamer audio convert element
+		audio_convert = Gst.ElementFactory.make("audioconvert", "audio-convert")
+
+		# Create a GStreamer volume element so volume and mute work like QMediaPlayer
+		volume = Gst.ElementFactory.make("volume", "audio-volume")
+		volume.set_property("volume", self._volume_level / 100.0)
+		volume.set_property("mute", self._muted)
+
+		# Create a GStreamer queue element
+		audio_queue = self.make_queue("audio-queue")
+
+		# Add GStreamer elements to the pipeline
+		for element in [decodebin, audio_queue, audio_convert, volume, audio_sink] + video_elements:
+			pipeline.add(element)
+
+		# Link the GStreamer elements
+		if filesrc is not None:
+			pipeline.add(filesrc)
+			filesrc.link(decodebin)
+		decodebin.connect("pad-added", self.on_pad_added)
+		for upstream, downstream in zip(video_elements, video_elements[1:]):
+			upstream.link(downstream)
+		audio_queue.link(audio_convert)
+		audio_convert.link(volume)
+		volume.link(audio_sink)
+
+		if self._video_enabled:
+			self._video_queue = video_elements[0]
+		self._audio_queue = audio_queue
+		self._volume = volume
+
+		# Set the GStreamer pipeline to the "paused" state
+		pipeline.set_state(Gst.State.PAUSED)
+
+		return pipeline
+
+	def make_video_output(self):
+		# queue ! videoconvert ! sink, not yet added to a pipeline
+		video_queue = self.make_queue("video-queue")
+
+		# Create a GStreamer video convert element
+		video_convert = Gst.ElementFactory.make("videoconvert", "video-convert")
+		# Passthrough when the decoder already produces a format the sink accepts; otherwise
+		# convert on all cores (n-threads needs GStreamer 1.20)
+		if video_convert.find_property("n-threads") is not None:
+			video_convert.set_property("n-threads", 0)
+
+		# Create a GStreamer video sink element
+		if self._frame_view is not None:
+			video_sink = Gst.ElementFactory.make("appsink", "video-sink")
+			video_sink.set_property("sync", True)
+			self._frame_sink = FrameSink(video_sink, self._frame_view, copy=self.copy_frames)
+		else:
+			video_sink = self.make_sink(self.video_sink_factory, "video-sink")
+		configure_video_sink(video_sink)
+		return [video_queue, video_convert, video_sink]
+
+	def _autoplug_continue(self, decodebin, pad, caps):
+		# Runs on a streaming thread; False exposes the pad as it is instead of plugging a decoder
+		return not is_encoded_video(caps)
+
+	def new_pipeline(self, name):
+		pipeline = Gst.Pipeline.new(name)
+
+		# Deliver EOS and ASYNC_DONE straight from the streaming thread; waiting for the
+		# next bus poll would add up to one poll interval to track switches and seeks
+		bus = pipeline.get_bus()
+		bus.enable_sync_message_emission()
+		bus.connect("sync-message::eos", self._on_sync_message)
+		bus.connect("sync-message::async-done", self._on_sync_message)
+
+		# Configure decoders and sinks as decodebin and autovideosink plug them
+		pipeline.connect("deep-element-added", self._on_element_added)
+		return pipeline
+
+	def make_queue(self, name):
+		# Bounded by time; the byte limit is a placeholder until the pad-added
+		# handler knows the decoded bitrate
+		queue = Gst.ElementFactory.make("queue", name)
+		queue.set_property("max-size-buffers", 0)  # Use 0 for an unlimited number of buffers
+		queue.set_property("max-size-time", BUFFER_TARGET_SECONDS * Gst.SECOND)
+		queue.set_property("max-size-bytes", QUEUE_MIN_BYTES)
+		return queue
+
+	def make_sink(self, factory, name):
+		return Gst.ElementFactory.make(factory, name)
+
+	def make_source(self, media_url):
+		if self._source_mode != "filesrc":
+			try:
+				self._file_source = BlockFileSource(media_url, self._read_block_size,
+					use_mmap=self._source_mode == "mmap", cache=SegmentCache.instance())
+			except (OSError, ValueError):
+				self._file_source = None  # Let filesrc report the error on the bus
+			else:
+				appsrc = Gst.ElementFactory.make("appsrc", "file-source")
+				self._file_source.attach(appsrc)
+				return appsrc
+		filesrc = Gst.ElementFactory.make("filesrc", "file-source")
+		filesrc.set_property("location", media_url)
+		# Only used when the demuxer runs in push mode; in pull mode it asks for exact ranges
+		filesrc.set_property("blocksize", self._read_block_size)
+		stats = self._filesrc_stats = {"mode": "filesrc", "block_size": self._read_block_size, "reads": 0, "bytes": 0}
+
+		def count_read(pad, info):
+			stats["reads"] += 1
+			stats["bytes"] += info.get_buffer().get_size()
+			return Gst.PadProbeReturn.OK
+
+		filesrc.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, count_read)
+		return filesrc
+
+	def make_network_decoder(self, media_url):
+		# uridecodebin plugs queue2 for progressive streams and the HLS/DASH demuxer for
+		# manifests, and posts BUFFERING messages that handle_buffering acts on
+		decodebin = Gst.ElementFactory.make("uridecodebin", "decode-bin")
+		decodebin.set_property("uri", media_url)
+		decodebin.set_property("use-buffering", True)
+		decodebin.set_property("buffer-duration", self._network_buffer_seconds * Gst.SECOND)
+		# Progressive downloads keep fetching into a temporary ring buffer file, well past the
+		# playback buffer; adaptive demuxers prefetch segments up to buffer-duration instead
+		decodebin.set_property("ring-buffer-max-size", NETWORK_RING_BUFFER_BYTES)
+		decodebin.connect("source-setup", self._on_source_setup)
+		return decodebin
+
+	def _on_source_setup(self, decodebin, source):
+		# Count what the HTTP source downloads; for HLS/DASH that is only the manifest
+		stats = self._filesrc_stats = {"mode": "http", "block_size": None, "reads": 0, "bytes": 0}
+
+		def count_read(pad, info):
+			stats["reads"] += 1
+			stats["bytes"] += info.get_buffer().get_size()
+			return Gst.PadProbeReturn.OK
+
+		pad = source.get_static_pad("src")
+		if pad is not None:
+			pad.add_probe(Gst.PadProbeType.BUFFER, count_read)
+
+	def configure_adaptive_demuxer(self, demuxer):
+		# hlsdemux/dashdemux estimate bandwidth per fragment and switch renditions themselves;
+		# these bound their choice. start-bitrate and max-buffering-time need adaptivedemux2
+		properties = {"bandwidth-usage": ADAPTIVE_BANDWIDTH_USAGE,
+			"max-buffering-time": self._network_buffer_seconds * Gst.SECOND}
+		if self._max_bitrate:
+			properties["max-bitrate"] = self._max_bitrate
+		if self.bandwidth_bps:
+			properties["start-bitrate"] = int(self.bandwidth_bps * ADAPTIVE_BANDWIDTH_USAGE)
+		for name, value in properties.items():
+			if demuxer.find_property(name) is not None:
+				demuxer.set_property(name, value)
+
+	def update_bandwidth(self, bits_per_second):
+		if self.bandwidth_bps is None:
+			self.bandwidth_bps = bits_per_second
+		else:
+			self.bandwidth_bps += BANDWIDTH_EWMA_WEIGHT * (bits_per_second - self.bandwidth_bps)
+
+	@property
+	def stalled(self):
+		return self._stalled
+
+	def network_stats(self):
+		if not self._network:
+			return None
+		rendition = self.renditions[-1] if self.renditions else None
+		return {
+			"bandwidth_bps": self.bandwidth_bps,
+			"rebuffers": self.rebuffers,
+			"stalled": self._stalled,
+			"rendition": [rendition[1], rendition[2]] if rendition is not None else None,
+			"rendition_switches": self.rendition_switches,
+		}
+
+	def pin_offset(self, offset, pinned=True):
+		# Keep (or stop keeping) the bytes around a file offset of the current media cached.
+		# Only the blocks and mmap source modes go through the segment cache; filesrc does not
+		if self._file_source is not None:
+			if pinned:
+				self._file_source.pin_around(offset)
+			else:
+				self._file_source.unpin_around(offset)
+
+	def source_stats(self):
+		if self._file_source is not None:
+			return self._file_source.stats()
+		return dict(self._filesrc_stats) if self._filesrc_stats is not None else None
+
+	def _on_element_added(self, pipeline, sub_bin, element):
+		# Runs on a streaming thread
+		klass = element_klass(element)
+		if "Demuxer/Adaptive" in klass:
+			self.configure_adaptive_demuxer(element)
+			return
+		if "Video" not in klass:
+			return
+		if "Decoder" in klass:
+			set_decoder_threads(element, self._decoder_threads)
+			self._decoder_added(element)
+		elif "Sink" in klass:
+			configure_video_sink(element)
+
+	def _decoder_added(self, decoder):
+		# Streaming thread
+		self._watch_decode_latency(decoder)
+		self._video_decoder = decoder
+
+	def _watch_decode_latency(self, decoder, stream=0, stream_latencies=None):
+		# Time from a compressed buffer entering the decoder to the frame with the same PTS leaving it.
+		# Decoders of several streams (multi-view tiles) share _decode_started, so starts are keyed by
+		# (stream, PTS); stream_latencies, if given, also collects this decoder's own measurements
+		started = self._decode_started
+		latencies = self.decode_latencies
+
+		def buffer_in(pad, info):
+			pts = info.get_buffer().pts
+			if pts != Gst.CLOCK_TIME_NONE:
+				if len(started) > DECODE_LATENCY_WINDOW:
+					started.clear()  # Frames the decoder skipped never come out
+				started[(stream, pts)] = time.perf_counter()
+			return Gst.PadProbeReturn.OK
+
+		def buffer_out(pad, info):
+			begun = started.pop((stream, info.get_buffer().pts), None)
+			if begun is not None:
+				latency = (time.perf_counter() - begun) * 1000
+				latencies.append(latency)
+				if stream_latencies is not None:
+					stream_latencies.append(latency)
+			return Gst.PadProbeReturn.OK
+
+		decoder.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, buffer_in)
+		decoder.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, buffer_out)
+
+	def queue_levels(self):
+		levels = {}
+		for name, queue in (("video", self._video_queue), ("audio", self._audio_queue)):
+			if queue is not None:
+				levels[name] = {
+					"bytes": queue.get_property("current-level-bytes"),
+					"max_bytes": queue.get_property("max-size-bytes"),
+					"buffers": queue.get_property("current-level-buffers"),
+					"time_ms": queue.get_property("current-level-time") // Gst.MSECOND,
+				}
+		return levels
+
+	def on_pad_added(self, decodebin, pad):
+		# Handle dynamic pad linking when decoding begins
+		caps = pad.get_current_caps() or pad.query_caps(None)
+		pad_link = caps[0].get_name()
+		if "video" in pad_link:
+			self._has_video = True
+		if "video" in pad_link and self._video_queue is None:
+			# Video disabled: the encoded stream goes to the discarding fakesink
+			if self._video_discard is not None:
+				sink_pad = self._video_discard.get_static_pad("sink")
+				if not sink_pad.is_linked():
+					pad.link(sink_pad)
+			return
+		if "video" in pad_link:
+			queue = self._video_queue
+		elif "audio" in pad_link:
+			queue = self._audio_queue
+		else:
+			return
+		# Size the queue from the decoded bitrate, so a 4K stream gets room for
+		# whole frames and a low-bitrate stream does not reserve more than it needs
+		queue.set_property("max-size-bytes", queue_limit_bytes(decoded_bytes_per_second(caps)))
+		sink_pad = queue.get_static_pad("sink")
+		if not sink_pad.is_linked():
+			pad.link(sink_pad)
+			if queue is self._video_queue:
+				# A resolution change on an HLS/DASH stream is a rendition switch
+				sink_pad.connect("notify::caps", self._on_video_caps)
+
+	def _on_video_caps(self, pad, param):
+		# Runs on a streaming thread
+		caps = pad.get_current_caps()
+		if caps is None:
+			return
+		structure = caps.get_structure(0)
+		_, width = structure.get_int("width")
+		_, height = structure.get_int("height")
+		if self.renditions and self.renditions[-1][1:] == (width, height):
+			return
+		if self.renditions:
+			self.rendition_switches += 1
+		self.renditions.append((time.perf_counter(), width, height))
+
+	def _submit(self, function, callback=None):
+		# Queue function() on the state worker; callback(result) then runs on the GUI thread
+		def run():
+			try:
+				result = function()
+			except Exception as error:
+				self._emit_task_done(self._task_failed, error)
+			else:
+				if callback is not None:
+					self._emit_task_done(callback, result)
+		self._worker.submit(run)
+
+	def _emit_task_done(self, callback, result):
+		try:
+			self._task_done.emit(callback, result)
+		except RuntimeError:
+			pass  # The player was deleted while the task ran
+
+	def _on_task_done(self, callback, result):
+		callback(result)
+
+	def _task_failed(self, error):
+		self._error_string = f"Error: {error}"
+		self._set_state(QMediaPlayer.StoppedState)
+		self._set_media_status(QMediaPlayer.InvalidMedia)
+		self.error.emit(QMediaPlayer.ResourceError)
+
+	def _submit_to_pipeline(self, function, callback=None):
+		# Like _submit, for function(pipeline) on the pipeline of the current media
+		generation = self._generation
+
+		def run():
+			pipeline = self._pipeline
+			if generation != self._generation or pipeline is None:
+				return None
+			return function(pipeline)
+		self._submit(run, callback)
+
+	def _open(self, media_url, generation):
+		# State worker: replace the pipeline and start prerolling the new media
+		self._teardown()
+		if generation == self._generation:
+			self._pipeline = self.create_buffering_pipeline(media_url)
+
+	def close(self):
+		# Release the pipeline on the worker; anything queued for the current media is skipped
+		self._generation += 1
+		self._bus_timer.stop()
+		self._submit(self._teardown)
+		self._remove_frame_view()
+
+	def _teardown(self):
+		# State worker; setting NULL waits for the streaming threads to stop
+		pipeline = self._pipeline
+		self._pipeline = None
+		if pipeline is not None:
+			pipeline.set_state(Gst.State.NULL)
+		self._video_queue = None
+		self._audio_queue = None
+		self._volume = None
+		if self._file_source is not None:
+			self._file_source.close()
+		self._file_source = None
+		self._filesrc_stats = None
+		self._video_decoder = None
+		self._frame_sink = None
+		self._video_discard = None
+		self._has_video = False
+		self._qos_dropped = {}
+		self._decode_started = {}
+		self.late_frames = 0
+		self.buffering_percent = 100
+		self.renditions.clear()
+
+	def _set_state(self, state):
+		if state != self._state:
+			self._state = state
+			self.stateChanged.emit(state)
+
+	def _set_media_status(self, status):
+		if status != self._media_status:
+			self._media_status = status
+			self.mediaStatusChanged.emit(status)
+
+	def setMedia(self, content):
+		# Build a fresh pipeline per file so nothing from the previous one stays referenced;
+		# returns at once, LoadingMedia turns into BufferedMedia when the first frame is ready
+		self._generation += 1
+		self._duration = 0
+		self._last_position = 0
+		self._error_string = ""
+		self._seeking = False
+		self._reattach = None
+		self._set_state(QMediaPlayer.StoppedState)
+		url = content.canonicalUrl()
+		if url.isEmpty():
+			self._media_url = None
+			self._bus_timer.stop()
+			self._submit(self._teardown)
+			self._set_media_status(QMediaPlayer.NoMedia)
+			return
+		self._media_url = url.toLocalFile() if url.isLocalFile() else url.toString()
+		self._network = is_network_url(self._media_url)
+		self._stalled = False
+		self._playback_started = False
+		self._set_media_status(QMediaPlayer.LoadingMedia)
+		media_url, generation = self._media_url, self._generation
+		self._submit(lambda: self._open(media_url, generation))
+		self._bus_timer.start()
+
+	def setVideoOutput(self, output):
+		# Takes effect for the next setMedia
+		self._video_output = output
+		self._remove_frame_view()
+		if output is not None and self.render_to_widget:
+			self._frame_view = VideoFrameWidget(output)
+			self._frame_view.presented.connect(self.framePresented)
+
+	@property
+	def video_enabled(self):
+		return self._video_enabled
+
+	def set_video_enabled(self, enabled):
+		# With video disabled only audio is decoded. Open media is rebuilt at once and put back
+		# where it was (see _continue_reattach); otherwise this applies from the next setMedia.
+		# Media that has opened without a video stream has nothing to detach and is left alone
+		if enabled == self._video_enabled:
+			return
+		self._video_enabled = enabled
+		if self._media_url is None or self._media_status in (QMediaPlayer.NoMedia, QMediaPlayer.EndOfMedia,
+				QMediaPlayer.InvalidMedia):
+			return
+		if not self._has_video and self._media_status != QMediaPlayer.LoadingMedia:
+			return
+		position = self.position() if self._state != QMediaPlayer.StoppedState else 0
+		self._reattach = (position, time.perf_counter(), False)
+		self._stalled = False
+		self._generation += 1
+		media_url, generation = self._media_url, self._generation
+		self._submit(lambda: self._open(media_url, generation))
+
+	def _continue_reattach(self):
+		# ASYNC_DONE from the rebuilt pipeline: seek back and restore the state, then wait for the
+		# seek's own ASYNC_DONE. Returns True while that is pending. Detaching video seeks back
+		# exactly, so audio carries on where it was; reattaching snaps to the nearest keyframe,
+		# which shows a frame at once instead of decoding up to the old position
+		position, started, seek_issued = self._reattach
+		if not seek_issued:
+			if position > 0:
+				if self._video_enabled:
+					flags = Gst.SeekFlags.FLUSH | Gst.SeekFlags.KEY_UNIT | Gst.SeekFlags.SNAP_NEAREST
+				else:
+					flags = Gst.SeekFlags.FLUSH | Gst.SeekFlags.ACCURATE
+				self._submit_to_pipeline(
+					lambda pipeline: pipeline.seek_simple(Gst.Format.TIME, flags, position * Gst.MSECOND))
+			if self._state == QMediaPlayer.PlayingState:
+				self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.PLAYING))
+			elif self._state == QMediaPlayer.StoppedState:
+				self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.READY))
+			if position > 0:
+				self._reattach = (position, started, True)
+				return True
+		self._reattach = None
+		self.last_reattach_ms = (time.perf_counter() - started) * 1000
+		return False
+
+	def _remove_frame_view(self):
+		if self._frame_view is not None:
+			self._frame_view.clear()
+			self._frame_view.deleteLater()
+		self._frame_view = None
+
+	def play(self):
+		# State changes are queued behind any open still in progress; the reported
+		# state changes at once, like QMediaPlayer's
+		if self._media_url is None:
+			return
+		if not self._stalled:  # Otherwise handle_buffering starts playback once the buffer is full
+			self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.PLAYING))
+		self._bus_timer.start()
+		self._set_state(QMediaPlayer.PlayingState)
+
+	def pause(self):
+		if self._media_url is None:
+			return
+		self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.PAUSED))
+		self._set_state(QMediaPlayer.PausedState)
+
+	def stop(self):
+		if self._media_url is None:
+			return
+		# READY drops decoded data and rewinds; decodebin re-adds its pads on the next play
+		self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.READY))
+		self._stalled = False  # Network streams buffer again from scratch
+		self._last_position = 0
+		self.positionChanged.emit(0)
+		self._set_state(QMediaPlayer.StoppedState)
+
+	def state(self):
+		return self._state
+
+	def mediaStatus(self):
+		return self._media_status
+
+	def duration(self):
+		return self._duration
+
+	def position(self):
+		if self._reattach is not None:
+			return self._reattach[0]  # The rebuilt pipeline starts at zero until the seek back lands
+		if self._pipeline is not None:
+			ok, position = self._pipeline.query_position(Gst.Format.TIME)
+			if ok:
+				self._last_position = position // Gst.MSECOND
+		return self._last_position
+
+	def setPosition(self, position):
+		self.seek(position, accurate=True)
+
+	def seek(self, position, accurate):
+		if self._media_url is None:
+			return
+		# Fast seeks stop at the nearest keyframe and decode at most one GOP;
+		# accurate seeks decode forward from it to the exact frame
+		flags = Gst.SeekFlags.FLUSH
+		if accurate:
+			flags |= Gst.SeekFlags.ACCURATE
+		else:
+			flags |= Gst.SeekFlags.KEY_UNIT | Gst.SeekFlags.SNAP_NEAREST
+		self._seeking = True
+		self._submit_to_pipeline(lambda pipeline: pipeline.seek_simple(Gst.Format.TIME, flags, position * Gst.MSECOND))
+		self._last_position = position
+		self.positionChanged.emit(position)
+
+	def volume(self):
+		return self._volume_level
+
+	def setVolume(self, volume):
+		self._volume_level = volume
+		if self._volume is not None:
+			self._volume.set_property("volume", volume / 100.0)
+
+	def isMuted(self):
+		return self._muted
+
+	def setMuted(self, muted):
+		self._muted = muted
+		if self._volume is not None:
+			self._volume.set_property("mute", muted)
+
+	def errorString(self):
+		return self._error_string
+
+	def poll_bus(self):
+		if self._pipeline is None:
+			return
+		bus = self._pipeline.get_bus()
+		while True:
+			message = bus.pop()
+			if message is None:
+				break
+			self.busMessage.emit(message)
+			if message.type == Gst.MessageType.ERROR:
+				self.handle_error(bus, message)
+				return
+			elif message.type == Gst.MessageType.DURATION_CHANGED:
+				self._duration = 0
+			elif message.type == Gst.MessageType.QOS:
+				self.handle_qos(message)
+			elif message.type == Gst.MessageType.BUFFERING:
+				self.handle_buffering(message)
+			elif message.type == Gst.MessageType.ELEMENT:
+				self.handle_element_message(message)
+
+		if self._duration <= 0:
+			ok, duration = self._pipeline.query_duration(Gst.Format.TIME)
+			if ok and duration > 0:
+				self._duration = duration // Gst.MSECOND
+				self.durationChanged.emit(self._duration)
+		if self._state == QMediaPlayer.PlayingState:
+			self.positionChanged.emit(self.position())
+
+	def handle_buffering(self, message):
+		# Network streams: hold the pipeline in PAUSED while the buffer refills, as
+		# uridecodebin's use-buffering expects of the application
+		percent = message.parse_buffering()
+		self.buffering_percent = percent
+		_, average_in, _, _ = message.parse_buffering_stats()
+		if average_in > 0:  # Bytes/s into queue2; -1 where the buffering element cannot tell
+			self.update_bandwidth(average_in * 8)
+		if not self._network:
+			return
+		if percent < 100 and not self._stalled:
+			self._stalled = True
+			if self._state == QMediaPlayer.PlayingState:
+				if self._playback_started and not self._seeking:
+					self.rebuffers += 1
+					self._set_media_status(QMediaPlayer.StalledMedia)
+				self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.PAUSED))
+		elif percent >= 100:
+			self._playback_started = True
+			if not self._stalled:
+				return
+			self._stalled = False
+			if self._media_status == QMediaPlayer.StalledMedia:
+				self._set_media_status(QMediaPlayer.BufferedMedia)
+			if self._state == QMediaPlayer.PlayingState:
+				self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.PLAYING))
+
+	def handle_element_message(self, message):
+		# Adaptive demuxers report each fragment download
+		structure = message.get_structure()
+		if structure is None or structure.get_name() != "adaptive-streaming-statistics":
+			return
+		size = structure.get_value("fragment-size")
+		download_time = structure.get_value("fragment-download-time")
+		if size and download_time:
+			self.update_bandwidth(size * 8 * Gst.SECOND / download_time)
+
+	@property
+	def dropped_frames(self):
+		return sum(self._qos_dropped.values())
+
+	@property
+	def zero_copy_frames(self):
+		# Whether frames reach the widget without a copy; None until one has, or without render_to_widget
+		return self._frame_sink.zero_copy if self._frame_sink is not None else None
+
+	def handle_qos(self, message):
+		# Sinks and decoders post QoS when they drop a late frame
+		stats_format, _, dropped = message.parse_qos_stats()
+		if stats_format == Gst.Format.BUFFERS:
+			self._qos_dropped[message.src.get_name()] = dropped
+		jitter, _, _ = message.parse_qos_values()
+		if jitter > 0:
+			self.late_frames += 1
+		if jitter < LATE_FRAME_THRESHOLD_MS * Gst.MSECOND or self._late_frame_policy == "drop":
+			return
+		now = time.perf_counter()
+		if (now - self._last_late_action) * 1000 < LATE_FRAME_COOLDOWN_MS:
+			return
+		self._last_late_action = now
+		self.late_frame_actions += 1
+		if self._late_frame_policy == "degrade":
+			self.degrade_decoding()
+		self.skip_to_keyframe(jitter // Gst.MSECOND)
+
+	def skip_to_keyframe(self, lateness_ms):
+		# Jump past the backlog to the next keyframe instead of decoding frames that would be dropped
+		target = self.position() + lateness_ms
+		flags = Gst.SeekFlags.FLUSH | Gst.SeekFlags.KEY_UNIT | Gst.SeekFlags.SNAP_AFTER
+		self._submit_to_pipeline(lambda pipeline: pipeline.seek_simple(Gst.Format.TIME, flags, target * Gst.MSECOND))
+
+	def degrade_decoding(self):
+		# Trade smoothness for decode time: libav decoders skip B-frames until the next setMedia.
+		# Resolution is left alone; libav only reads "lowres" when the codec opens, and the
+		# H.264/HEVC decoders do not support it
+		decoder = self._video_decoder
+		if decoder is not None and decoder.find_property("skip-frame") is not None:
+			decoder.set_property("skip-frame", 1)
+
+	def _on_sync_message(self, bus, message):
+		# Runs on a streaming thread; hand over to the GUI thread
+		self._streaming_message.emit(message.src, message.type)
+
+	def _on_streaming_message(self, source, message_type):
+		# Ignore messages from a pipeline that has since been replaced
+		if self._pipeline is None or source != self._pipeline:
+			return
+		if message_type == Gst.MessageType.EOS:
+			self.handle_eos()
+		elif message_type == Gst.MessageType.ASYNC_DONE:
+			if self._reattach is not None and self._continue_reattach():
+				return
+			# The sinks have prerolled: the first frame (after open or a seek) is there
+			self._set_media_status(QMediaPlayer.BufferedMedia)
+			if self._seeking:
+				self._seeking = False
+				self.seekFinished.emit()
+
+	def handle_eos(self):
+		# Handle End-of-Stream (EOS) message from GStreamer
+		self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.NULL))
+		self._bus_timer.stop()
+		self._set_state(QMediaPlayer.StoppedState)
+		self._set_media_status(QMediaPlayer.EndOfMedia)
+
+	def handle_error(self, bus, message):
+		# Handle error messages from GStreamer
+		error, debug_info = message.parse_error()
+		self._error_string = f"Error: {error.message} - {debug_info if debug_info else 'No debug info'}"
+		self._submit_to_pipeline(lambda pipeline: pipeline.set_state(Gst.State.NULL))
+		self._bus_timer.stop()
+		self._set_state(QMediaPlayer.StoppedState)
+		self._set_media_status(QMediaPlayer.InvalidMedia)
+		self.error.emit(QMediaPlayer.ResourceError)
+
+class PipelineTelemetry(QObject):
+	# Periodic GstPlayer health samples and notable bus events, kept in ring buffers
+	def __init__(self, interval_ms=TELEMETRY_INTERVAL_MS, log_path=None, parent=None):
+		super().__init__(parent)
+		self.samples = deque(maxlen=TELEMETRY_RING_SIZE)
+		self.events = deque(maxlen=TELEMETRY_EVENT_RING_SIZE)
+		self._lock = threading.Lock()  # The metrics endpoint reads the rings from its own thread
+		self._player = None
+		self._qos_messages = 0  # Since the last sample
+		self._log = open(log_path, "a", buffering=1) if log_path else None  # JSON lines
+		self._server = None
+		self._timer = QTimer(self)
+		self._timer.setInterval(interval_ms)
+		self._timer.timeout.connect(self.sample)
+
+	def attach(self, player):
+		# Subscribe once per backend; GstPlayer forwards messages from whichever pipeline it has
+		self._player = player
+		player.busMessage.connect(self.handle_message)
+		self._timer.start()
+
+	def detach(self, player):
+		if player is not self._player:
+			return
+		player.busMessage.disconnect(self.handle_message)
+		self._player = None
+		self._timer.stop()
+
+	def handle_message(self, message):
+		if message.type == Gst.MessageType.ERROR:
+			error, debug_info = message.parse_error()
+			self.record("error", source=message.src.get_name(), message=error.message, debug=debug_info)
+		elif message.type == Gst.MessageType.WARNING:
+			warning, debug_info = message.parse_warning()
+			self.record("warning", source=message.src.get_name(), message=warning.message, debug=debug_info)
+		elif message.type == Gst.MessageType.QOS:
+			self._qos_messages += 1
+
+	def record(self, kind, **fields):
+		event = {"time": time.time(), "event": kind, **fields}
+		with self._lock:
+			self.events.append(event)
+		self._write(event)
+
+	def sample(self):
+		player = self._player
+		if player is None or player.mediaStatus() == QMediaPlayer.NoMedia:
+			return
+		latencies = []
+		while True:
+			try:
+				latencies.append(player.decode_latencies.popleft())
+			except IndexError:
+				break
+		sample = {
+			"time": time.time(),
+			"event": "sample",
+			"state": int(player.state()),
+			"position_ms": player.position(),
+			"buffering_percent": player.buffering_percent,
+			"queues": player.queue_levels(),
+			"dropped_frames": player.dropped_frames,
+			"late_frames": player.late_frames,
+			"zero_copy_frames": player.zero_copy_frames,
+			"video_enabled": player.video_enabled,
+			"qos_messages": self._qos_messages,
+			"source": player.source_stats(),
+			"network": player.network_stats(),
+			"decode_latency_ms": {
+				"count": len(latencies),
+				"mean": sum(latencies) / len(latencies) if latencies else None,
+				"max": max(latencies, default=None),
+			},
+		}
+		self._qos_messages = 0
+		with self._lock:
+			self.samples.append(sample)
+		self._write(sample)
+
+	def snapshot(self):
+		with self._lock:
+			return {
+				"latest": self.samples[-1] if self.samples else None,
+				"samples": list(self.samples),
+				"events": list(self.events),
+			}
+
+	def _write(self, entry):
+		if self._log is not None:
+			self._log.write(json.dumps(entry) + "\n")
+
+	def serve(self, port):
+		# Read-only JSON snapshot at http://127.0.0.1:<port>/metrics
+		from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+		telemetry = self
+
+		class MetricsHandler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				if self.path.rstrip("/") not in ("", "/metrics"):
+					self.send_error(404)
+					return
+				body = json.dumps(telemetry.snapshot()).encode()
+				self.send_response(200)
+				self.send_header("Content-Type", "application/json")
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, format, *args):
+				pass
+
+		self._server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+		threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+
+	def close(self):
+		self._timer.stop()
+		if self._server is not None:
+			self._server.shutdown()
+			self._server.server_close()
+			self._server = None
+		if self._log is not None:
+			self._log.close()
+			self._log = None
+
+class SeekScheduler(QObject):
+	def __init__(self, seek_function, latency_budget=SEEK_LATENCY_BUDGET_MS, parent=None):
+		super().__init__(parent)
+		self._seek_function = seek_function  # Called as seek_function(position, accurate)
+		self._pending = None  # Newest (position, accurate, requested_at) not yet issued
+		self._in_flight = None  # The one seek the backend is working on
+		self._budget_timer = QTimer(self)
+		self._budget_timer.setSingleShot(True)
+		self._budget_timer.setInterval(latency_budget)
+		self._budget_timer.timeout.connect(self._budget_expired)
+		self.latencies = deque(maxlen=256)  # Milliseconds from request to first frame
+		self.dropped = 0
+		self.timeouts = 0
+
+	def set_latency_budget(self, latency_budget):
+		self._budget_timer.setInterval(latency_budget)
+
+	def request(self, position, accurate):
+		# Keep only the newest target; anything still waiting is superseded
+		if self._pending is not None:
+			self.dropped += 1
+		self._pending = (position, accurate, time.perf_counter())
+		if self._in_flight is None:
+			self._issue()
+
+	def _issue(self):
+		self._in_flight, self._pending = self._pending, None
+		position, accurate, _ = self._in_flight
+		self._seek_function(position, accurate)
+		self._budget_timer.start()
+
+	def frame_ready(self, *args):
+		# The backend presented the first frame after the in-flight seek
+		if self._in_flight is None:
+			return
+		self._budget_timer.stop()
+		self.latencies.append((time.perf_counter() - self._in_flight[2]) * 1000)
+		self._in_flight = None
+		if self._pending is not None:
+			self._issue()
+
+	def _budget_expired(self):
+		# Do not let a slow backend hold newer targets back indefinitely
+		self.timeouts += 1
+		self._in_flight = None
+		if self._pending is not None:
+			self._issue()
+
+	def reset(self):
+		self._budget_timer.stop()
+		self._pending = None
+		self._in_flight = None
+
+	def stats(self):
+		latencies = sorted(self.latencies)
+		if not latencies:
+			return {"count": 0, "dropped": self.dropped, "timeouts": self.timeouts}
+		return {
+			"count": len(latencies),
+			"mean_ms": sum(latencies) / len(latencies),
+			"p50_ms": latencies[len(latencies) // 2],
+			"p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+			"max_ms": latencies[-1],
+			"dropped": self.dropped,
+			"timeouts": self.timeouts,
+		}
+
+def sample_to_image(sample):
+	# Copy a decoded RGB sample into a QImage that owns its pixels
+	info = GstVideo.VideoInfo()
+	if not info.from_caps(sample.get_caps()):
+		return None
+	buffer = sample.get_buffer()
+	data = buffer.extract_dup(0, buffer.get_size())
+	return QImage(data, info.width, info.height, info.stride[0], QImage.Format_RGB888).copy()
+
+class FrameGrabber:
+	def __init__(self, media_path, width=THUMBNAIL_WIDTH):
+		self.media_path = media_path
+		load_gstreamer()
+		self._pipeline = Gst.Pipeline.new("frame-grabber")
+
+		filesrc = Gst.ElementFactory.make("filesrc", "file-source")
+		filesrc.set_property("location", media_path)
+		decodebin = Gst.ElementFactory.make("decodebin", "decode-bin")
+		video_convert = Gst.ElementFactory.make("videoconvert", "video-convert")
+		# Scale before conversion to RGB so only the small frame is converted
+		video_scale = Gst.ElementFactory.make("videoscale", "video-scale")
+		capsfilter = Gst.ElementFactory.make("capsfilter", "thumbnail-caps")
+		capsfilter.set_property("caps", Gst.Caps.from_string(
+			f"video/x-raw,format=RGB,width={width},pixel-aspect-ratio=1/1"))
+		self._appsink = Gst.ElementFactory.make("appsink", "thumbnail-sink")
+		self._appsink.set_property("sync", False)
+		self._appsink.set_property("max-buffers", 1)
+		self._appsink.set_property("drop", True)
+
+		for element in (filesrc, decodebin, video_scale, video_convert, capsfilter, self._appsink):
+			self._pipeline.add(element)
+		filesrc.link(decodebin)
+		video_scale.link(video_convert)
+		video_convert.link(capsfilter)
+		capsfilter.link(self._appsink)
+		self._video_scale = video_scale
+
+		decodebin.connect("autoplug-continue", self._autoplug_continue)
+		decodebin.connect("pad-added", self._on_pad_added)
+		self._pipeline.set_state(Gst.State.PAUSED)
+		self.ok = self._wait_async()
+
+	def _autoplug_continue(self, decodebin, pad, caps):
+		# Leave audio undecoded; thumbnails only need pictures
+		return not caps[0].get_name().startswith("audio/")
+
+	def _on_pad_added(self, decodebin, pad):
+		caps = pad.get_current_caps() or pad.query_caps(None)
+		sink_pad = self._video_scale.get_static_pad("sink")
+		if caps[0].get_name().startswith("video/x-raw") and not sink_pad.is_linked():
+			pad.link(sink_pad)
+
+	def _wait_async(self):
+		message = self._pipeline.get_bus().timed_pop_filtered(
+			5 * Gst.SECOND, Gst.MessageType.ASYNC_DONE | Gst.MessageType.ERROR)
+		return message is not None and message.type == Gst.MessageType.ASYNC_DONE
+
+	def grab(self, position):
+		# Land on the keyframe at or near position; a key-unit seek decodes a single frame
+		if not self.ok:
+			return None
+		flags = Gst.SeekFlags.FLUSH | Gst.SeekFlags.KEY_UNIT | Gst.SeekFlags.SNAP_NEAREST
+		if not self._pipeline.seek_simple(Gst.Format.TIME, flags, position * Gst.MSECOND) or not self._wait_async():
+			return None
+		sample = self._appsink.emit("pull-preroll")
+		return sample_to_image(sample) if sample is not None else None
+
+	def duration(self):
+		ok, duration = self._pipeline.query_duration(Gst.Format.TIME)
+		return duration // Gst.MSECOND if ok else 0
+
+	def close(self):
+		self._pipeline.set_state(Gst.State.NULL)
+
+class ThumbnailCache:
+	def __init__(self, max_bytes=THUMBNAIL_CACHE_BYTES, directory=None, max_disk_bytes=THUMBNAIL_DISK_BYTES):
+		self.max_bytes = max_bytes
+		self.max_disk_bytes = max_disk_bytes
+		self.directory = directory or os.path.join(
+			QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "thumbnails")
+		self._images = OrderedDict()  # (media_path, timestamp) -> QImage, oldest first
+		self._bytes = 0
+		self._disk_lock = threading.Lock()
+		self._files = None  # File name -> size on disk, oldest first; read from the directory on first use
+		self._disk_bytes = 0
+
+	def get(self, media_path, timestamp):
+		image = self._images.get((media_path, timestamp))
+		if image is not None:
+			self._images.move_to_end((media_path, timestamp))
+		return image
+
+	def put(self, media_path, timestamp, image):
+		key = (media_path, timestamp)
+		if key in self._images:
+			self._bytes -= self._images.pop(key).sizeInBytes()
+		self._images[key] = image
+		self._bytes += image.sizeInBytes()
+		while self._bytes > self.max_bytes and len(self._images) > 1:
+			_, evicted = self._images.popitem(last=False)
+			self._bytes -= evicted.sizeInBytes()
+
+	def disk_path(self, media_path, timestamp):
+		# Size and mtime are part of the name so an edited file never reuses stale frames
+		try:
+			stat = os.stat(media_path)
+		except OSError:
+			return None
+		key = f"{media_path}|{stat.st_size}|{stat.st_mtime_ns}|{timestamp}"
+		return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+	def _disk_index(self):
+		# Call with _disk_lock held. File mtimes carry the use order across runs
+		if self._files is None:
+			entries = []
+			try:
+				with os.scandir(self.directory) as it:
+					for entry in it:
+						if entry.name.endswith(".jpg"):
+							stat = entry.stat()
+							entries.append((stat.st_mtime_ns, entry.name, stat.st_size))
+			except OSError:
+				pass
+			entries.sort()
+			self._files = OrderedDict((name, size) for _, name, size in entries)
+			self._disk_bytes = sum(self._files.values())
+		return self._files
+
+	def load(self, media_path, timestamp):
+		# Called from the loader thread
+		path = self.disk_path(media_path, timestamp)
+		if path is None or not os.path.exists(path):
+			return None
+		image = QImage(path)
+		if image.isNull():
+			return None
+		with self._disk_lock:
+			files = self._disk_index()
+			name = os.path.basename(path)
+			if name in files:
+				files.move_to_end(name)
+				try:
+					os.utime(path)
+				except OSError:
+					pass
+		return image
+
+	def save(self, media_path, timestamp, image):
+		# Called from the loader thread
+		path = self.disk_path(media_path, timestamp)
+		if path is None:
+			return
+		os.makedirs(self.directory, exist_ok=True)
+		temp_path = path + ".tmp"
+		if not image.save(temp_path, "JPG", 85):
+			return
+		os.replace(temp_path, path)
+		with self._disk_lock:
+			files = self._disk_index()
+			name = os.path.basename(path)
+			self._disk_bytes -= files.pop(name, 0)
+			files[name] = os.path.getsize(path)
+			self._disk_bytes += files[name]
+			while self._disk_bytes > self.max_disk_bytes and len(files) > 1:
+				evicted, size = files.popitem(last=False)
+				self._disk_bytes -= size
+				try:
+					os.remove(os.path.join(self.directory, evicted))
+				except OSError:
+					pass
+
+class ThumbnailLoader(QObject):
+	# Emitted from a pool thread with the decoded (or disk-cached) frame
+	thumbnail_ready = pyqtSignal(str, 'qint64', QImage)
+
+	def __init__(self, cache, pool=None, parent=None):
+		super().__init__(parent)
+		self._cache = cache
+		self._pool = pool or WorkerPool.instance()
+		self._lock = threading.Lock()  # Guards the grabber; pool threads take turns with it
+		self._grabber = None
+		self._token = None  # Cancels the previous request when a newer one arrives
+
+	def request(self, media_path, timestamp, decode=True):
+		# Only the latest hover target matters; older requests that have not started are skipped.
+		# Without decode, only previews already cached on disk are shown (no GStreamer)
+		if self._token is not None:
+			self._token.set()
+		token = self._token = threading.Event()
+		self._pool.submit(lambda: self._load(media_path, timestamp, token, decode), WORK_THUMBNAIL, token)
+
+	def close(self):
+		if self._token is not None:
+			self._token.set()
+		self._pool.submit(self._close_grabber, WORK_THUMBNAIL)
+
+	def _close_grabber(self):
+		with self._lock:
+			if self._grabber is not None:
+				self._grabber.close()
+				self._grabber = None
+
+	def _load(self, media_path, timestamp, token, decode):
+		image = self._cache.load(media_path, timestamp)
+		if image is None and decode:
+			with self._lock:
+				if token.is_set():
+					return
+				# Keep the pipeline open while the user hovers over the same file
+				if self._grabber is None or self._grabber.media_path != media_path:
+					if self._grabber is not None:
+						self._grabber.close()
+					self._grabber = FrameGrabber(media_path)
+				image = self._grabber.grab(timestamp)
+			if image is not None:
+				self._cache.save(media_path, timestamp, image)
+		if image is not None:
+			self.thumbnail_ready.emit(media_path, timestamp, image)
+
+class EventLoopMonitor(QObject):
+	# Measures how late a short repeating timer fires; the lateness is time the
+	# GUI thread spent away from the event loop
+	def __init__(self, interval_ms=EVENT_LOOP_PROBE_MS, parent=None):
+		super().__init__(parent)
+		self._interval_ms = interval_ms
+		self._timer = QTimer(self)
+		self._timer.setTimerType(Qt.PreciseTimer)
+		self._timer.setInterval(interval_ms)
+		self._timer.timeout.connect(self._tick)
+		self._last = None
+		self.lags = []  # Milliseconds beyond the interval, one per tick
+
+	def start(self):
+		self.lags = []
+		self._last = time.perf_counter()
+		self._timer.start()
+
+	def stop(self):
+		self._timer.stop()
+		return self.stats()
+
+	def _tick(self):
+		now = time.perf_counter()
+		self.lags.append(max(0.0, (now - self._last) * 1000 - self._interval_ms))
+		self._last = now
+
+	def stats(self):
+		lags = sorted(self.lags)
+		if not lags:
+			return {"ticks": 0}
+		return {
+			"ticks": len(lags),
+			"p95_ms": lags[min(len(lags) - 1, int(len(lags) * 0.95))],
+			"max_ms": lags[-1],
+			"over_budget": sum(1 for lag in lags if lag > EVENT_LOOP_BUDGET_MS),
+		}
+
+class StartupProfile(QObject):
+	def __init__(self, started=_startup_time):
+		super().__init__()
+		self.started = started
+		self.stages = []  # (name, seconds since started)
+		self._first_paint_seen = False
+
+	def mark(self, name):
+		self.stages.append((name, time.perf_counter() - self.started))
+
+	def watch_first_paint(self, window):
+		window.installEventFilter(self)
+
+	def eventFilter(self, obj, event):
+		if event.type() == QEvent.Paint and not self._first_paint_seen:
+			self._first_paint_seen = True
+			obj.removeEventFilter(self)
+			# Mark once the paint has been handled, then report after the window settles
+			QTimer.singleShot(0, lambda: self.mark("first paint"))
+			QTimer.singleShot(STARTUP_IDLE_MS, self.report)
+		return False
+
+	def report(self, stream=sys.stderr):
+		previous = 0.0
+		for name, elapsed in self.stages:
+			print(f"{elapsed * 1000:9.1f} ms  (+{(elapsed - previous) * 1000:7.1f})  {name}", file=stream)
+			previous = elapsed
+		print(f"idle RSS: {current_rss() / (1024 * 1024):.1f} MB", file=stream)
+
+def current_rss():
+	# Resident set size in bytes; falls back to the peak where /proc is unavailable
+	try:
+		with open("/proc/self/statm") as statm:
+			return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError, IndexError):
+		import resource
+		peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		return peak if sys.platform == "darwin" else peak * 1024
+
+class MultiViewPlayer(GstPlayer):
+	# Plays several files in one pipeline, so they run on one clock and every state change
+	# or seek applies to all of them. Each tile is scaled down in the pipeline before
+	# conversion, and one budget of decoder threads is split between the tiles
+	def __init__(self, parent=None, **options):
+		super().__init__(parent, **options)
+		self._decoder_threads_option = self._decoder_threads
+		self._tile_paths = []
+		self._tile_views = []
+		self._tile_sizes = []
+		self._tile_filters = []  # capsfilter per tile of the current pipeline
+		self._tile_decoders = {}  # Tile index -> its video decoder in the current pipeline
+		self._tile_latencies = {}  # Tile index -> recent decode latencies in milliseconds
+		self._frame_rate_cap = 0
+		self._skip_frames = False
+
+	def set_tiles(self, paths, views):
+		# Takes effect for the next setMedia; views are VideoFrameWidgets, one per path
+		count = len(paths)
+		self._tile_paths = list(paths)
+		self._tile_views = list(views)
+		self._tile_sizes = [MULTIVIEW_DEFAULT_TILE_SIZE] * count
+		# Every decoder owns its threads; without a split N tiles would start N times as many as cores
+		self._decoder_threads = self._decoder_threads_option or max(1, (os.cpu_count() or 1) // count)
+		# Degrade as the grid grows: cap the frame rate, then skip non-reference frames
+		_, self._frame_rate_cap, self._skip_frames = next(
+			step for step in MULTIVIEW_QUALITY_STEPS if count <= step[0])
+
+	def set_tile_sizes(self, sizes):
+		# Re-targeting a capsfilter while playing makes videoscale renegotiate
+		self._tile_sizes = [(max(16, width & ~1), max(16, height & ~1)) for width, height in sizes]
+		for capsfilter, size in zip(self._tile_filters, self._tile_sizes):
+			capsfilter.set_property("caps", tile_caps(size))
+
+	def create_buffering_pipeline(self, media_url):
+		# media_url is the first tile; the others come from set_tiles
+		pipeline = self.new_pipeline("multi-view")
+
+		# Audio comes from the first tile only
+		audio_queue = self.make_queue("audio-queue")
+		audio_convert = Gst.ElementFactory.make("audioconvert", "audio-convert")
+		volume = Gst.ElementFactory.make("volume", "audio-volume")
+		volume.set_property("volume", self._volume_level / 100.0)
+		volume.set_property("mute", self._muted)
+		audio_sink = self.make_sink(self.audio_sink_factory, "audio-sink")
+		for element in (audio_queue, audio_convert, volume, audio_sink):
+			pipeline.add(element)
+		audio_queue.link(audio_convert)
+		audio_convert.link(volume)
+		volume.link(audio_sink)
+		self._audio_queue = audio_queue
+		self._volume = volume
+
+		filters = []
+		for index, (path, view) in enumerate(zip(self._tile_paths, self._tile_views)):
+			source = Gst.ElementFactory.make("filesrc", f"file-source-{index}")
+			source.set_property("location", path)
+			decodebin = Gst.ElementFactory.make("decodebin", f"decode-bin-{index}")
+			video_queue = self.make_queue(f"video-queue-{index}")
+			elements = [source, decodebin, video_queue]
+			if self._frame_rate_cap:
+				# Drop frames before they are scaled or converted
+				video_rate = Gst.ElementFactory.make("videorate", f"video-rate-{index}")
+				video_rate.set_property("drop-only", True)
+				video_rate.set_property("max-rate", self._frame_rate_cap)
+				elements.append(video_rate)
+			# Scale first, so conversion only touches tile-sized frames; the tiles already
+			# run in parallel, so each scaler and converter keeps to one thread
+			video_scale = Gst.ElementFactory.make("videoscale", f"video-scale-{index}")
+			video_convert = Gst.ElementFactory.make("videoconvert", f"video-convert-{index}")
+			for element in (video_scale, video_convert):
+				if element.find_property("n-threads") is not None:
+					element.set_property("n-threads", 1)
+			capsfilter = Gst.ElementFactory.make("capsfilter", f"tile-size-{index}")
+			capsfilter.set_property("caps", tile_caps(self._tile_sizes[index]))
+			video_sink = Gst.ElementFactory.make("appsink", f"video-sink-{index}")
+			video_sink.set_property("sync", True)
+			FrameSink(video_sink, view)
+			configure_video_sink(video_sink)
+			elements += [video_scale, video_convert, capsfilter, video_sink]
+			for element in elements:
+				pipeline.add(element)
+			source.link(decodebin)
+			for upstream, downstream in zip(elements[2:], elements[3:]):
+				upstream.link(downstream)
+			decodebin.connect("pad-added", self._on_tile_pad_added, index, video_queue)
+			filters.append(capsfilter)
+		self._tile_filters = filters
+
+		pipeline.set_state(Gst.State.PAUSED)
+		return pipeline
+
+	def _on_tile_pad_added(self, decodebin, pad, index, video_queue):
+		# Runs on a streaming thread
+		caps = pad.get_current_caps() or pad.query_caps(None)
+		pad_link = caps[0].get_name()
+		if "video" in pad_link and not video_queue.get_static_pad("sink").is_linked():
+			target = video_queue
+			target.set_property("max-size-bytes", queue_limit_bytes(decoded_bytes_per_second(caps)))
+		elif "audio" in pad_link and index == 0 and not self._audio_queue.get_static_pad("sink").is_linked():
+			target = self._audio_queue
+		else:
+			# The other tiles' audio; an unlinked pad would stop that tile with not-linked
+			target = Gst.ElementFactory.make("fakesink", None)
+			target.set_property("sync", False)
+			target.set_property("async", False)
+			decodebin.get_parent().add(target)
+			target.sync_state_with_parent()
+		pad.link(target.get_static_pad("sink"))
+
+	def _on_element_added(self, pipeline, sub_bin, element):
+		super()._on_element_added(pipeline, sub_bin, element)
+		klass = element_klass(element)
+		if self._skip_frames and "Video" in klass and "Decoder" in klass \
+				and element.find_property("skip-frame") is not None:
+			element.set_property("skip-frame", 1)
+
+	def _decoder_added(self, decoder):
+		# Streaming thread; every tile has its own decoder, found through the decodebin it sits in
+		tile = 0
+		parent = decoder.get_parent()
+		while parent is not None:
+			name = parent.get_name()
+			if name.startswith("decode-bin-"):
+				tile = int(name[len("decode-bin-"):])
+				break
+			parent = parent.get_parent()
+		latencies = self._tile_latencies.setdefault(tile, deque(maxlen=DECODE_LATENCY_WINDOW))
+		self._watch_decode_latency(decoder, tile, latencies)
+		self._tile_decoders[tile] = decoder
+		self._video_decoder = decoder
+
+	def degrade_decoding(self):
+		for decoder in list(self._tile_decoders.values()):
+			if decoder.find_property("skip-frame") is not None:
+				decoder.set_property("skip-frame", 1)
+
+	def _teardown(self):
+		super()._teardown()
+		self._tile_filters = []
+		self._tile_decoders = {}
+		self._tile_latencies = {}
+
+	def tile_stats(self):
+		# Per tile: frames the sink dropped as late (QoS), painted, and replaced before they could be painted,
+		# and the tile's decoder with its recent mean decode latency
+		stats = []
+		for index, (path, view) in enumerate(zip(self._tile_paths, self._tile_views)):
+			decoder = self._tile_decoders.get(index)
+			latencies = list(self._tile_latencies.get(index, ()))
+			stats.append({
+				"path": path,
+				"dropped_frames": self._qos_dropped.get(f"video-sink-{index}", 0),
+				"frames_presented": view.frames_presented,
+				"frames_skipped": view.frames_skipped,
+				"decoder": decoder.get_factory().get_name() if decoder is not None else None,
+				"decode_latency_ms": sum(latencies) / len(latencies) if latencies else None,
+			})
+		return stats
+
+def tile_caps(size):
+	width, height = size
+	# videoscale letterboxes into the tile rather than stretching
+	return Gst.Caps.from_string(f"video/x-raw,width={width},height={height},pixel-aspect-ratio=1/1")
+
+class MultiViewWidget(QWidget):
+	# A grid of tiles for MultiViewPlayer, each with its own VideoFrameWidget and a caption
+	tilesResized = pyqtSignal(list)
+
+	def __init__(self, names, parent=None):
+		super().__init__(parent)
+		layout = QGridLayout(self)
+		layout.setContentsMargins(0, 0, 0, 0)
+		layout.setSpacing(MULTIVIEW_TILE_SPACING)
+		columns = math.ceil(math.sqrt(len(names)))
+		self._names = list(names)
+		self._tiles = []
+		self.views = []
+		self._captions = []
+		for index, name in enumerate(names):
+			tile = QWidget()
+			tile.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+			tile.installEventFilter(self)
+			self.views.append(VideoFrameWidget(tile))
+			caption = QLabel(name, tile)
+			caption.setStyleSheet("color: white; background: rgba(0, 0, 0, 128); padding: 2px;")
+			self._captions.append(caption)
+			self._tiles.append(tile)
+			layout.addWidget(tile, *divmod(index, columns))
+		# Coalesce the resize events of a window drag into one renegotiation
+		self._resize_timer = QTimer(self)
+		self._resize_timer.setSingleShot(True)
+		self._resize_timer.setInterval(MULTIVIEW_RESIZE_DELAY_MS)
+		self._resize_timer.timeout.connect(lambda: self.tilesResized.emit(self.tile_sizes()))
+
+	def tile_sizes(self):
+		return [(tile.width(), tile.height()) for tile in self._tiles]
+
+	def show_stats(self, stats):
+		for caption, name, tile in zip(self._captions, self._names, stats):
+			caption.setText(f"{name}: {tile['dropped_frames']} dropped")
+			caption.adjustSize()
+
+	def eventFilter(self, obj, event):
+		if event.type() == QEvent.Resize:
+			self._resize_timer.start()
+		return False
+
+# Playback backends selectable with --backend or the Play > Backend menu
+PLAYBACK_BACKENDS = {
+	"qt": QMediaPlayer,
+	"gstreamer": GstPlayer,
+}
+
+class PackedStrings:
+	# Strings stored back to back as UTF-8 in one bytearray with an array of end offsets;
+	# an entry costs its encoded length plus 8 bytes rather than a Python object
+	def __init__(self, text=b"", ends=None):
+		self._text = bytearray(text)
+		self._ends = array("Q") if ends is None else ends
+
+	def __len__(self):
+		return len(self._ends)
+
+	def __getitem__(self, index):
+		if index < 0:
+			index += len(self._ends)
+		start = self._ends[index - 1] if index > 0 else 0
+		return self._text[start:self._ends[index]].decode("utf-8", "surrogatepass")
+
+	def __iter__(self):
+		text = self._text
+		start = 0
+		for end in self._ends:
+			yield text[start:end].decode("utf-8", "surrogatepass")
+			start = end
+
+	def append(self, string):
+		self._text += string.encode("utf-8", "surrogatepass")
+		self._ends.append(len(self._text))
+
+	def copy(self):
+		return PackedStrings(self._text, array("Q", self._ends))
+
+	def permuted(self, order):
+		# A copy whose entry i is entry order[i] of this one
+		text, ends = self._text, self._ends
+		result = PackedStrings()
+		for index in order:
+			start = ends[index - 1] if index > 0 else 0
+			result._text += text[start:ends[index]]
+			result._ends.append(len(result._text))
+		return result
+
+	def nbytes(self):
+		return len(self._text) + self._ends.itemsize * len(self._ends)
+
+class PlaylistSnapshot:
+	# A PlaylistModel's entries as URL strings, safe to read from the session writer's thread
+	def __init__(self, locations, flags):
+		self._locations = locations
+		self._flags = flags
+
+	def __iter__(self):
+		for location, flags in zip(self._locations, self._flags):
+			yield QUrl.fromLocalFile(location).toString() if flags & PLAYLIST_LOCAL else location
+
+class PlaylistModel(QAbstractListModel):
+	# The playlist as packed arrays: local paths (or stream URLs) in PackedStrings, flags and
+	# durations in typed arrays beside them. Indexing builds a QUrl on demand, so MainWindow
+	# uses it like the list of QUrls it replaces; shuffle is a permutation of row numbers
+	DurationRole = Qt.UserRole + 1
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self._locations = PackedStrings()
+		self._flags = array("B")
+		self._durations = array("q")  # Milliseconds, -1 until known
+		self._fetched = 0  # Rows handed to views so far; they ask for more as they scroll
+		self._current = -1
+		self._order = None  # array("I") of rows in playback order while shuffled
+		self._order_position = None  # Row -> its place in _order
+		self.repeat = "off"  # One of REPEAT_MODES
+		self.duration_lookup = None  # Local path -> milliseconds or -1, for rows without a duration yet
+
+	def __len__(self):
+		return len(self._flags)
+
+	def __getitem__(self, row):
+		location = self._locations[row]
+		return QUrl.fromLocalFile(location) if self._flags[row] & PLAYLIST_LOCAL else QUrl(location)
+
+	def path(self, row):
+		# Like self[row].toLocalFile(), without building the QUrl
+		return self._locations[row] if self._flags[row] & PLAYLIST_LOCAL else ""
+
+	def is_local(self, row):
+		return bool(self._flags[row] & PLAYLIST_LOCAL)
+
+	def extend(self, urls):
+		first = len(self)
+		for url in urls:
+			if url.isLocalFile():
+				self._locations.append(url.toLocalFile())
+				self._flags.append(PLAYLIST_LOCAL)
+			else:
+				self._locations.append(url.toString())
+				self._flags.append(0)
+			self._durations.append(-1)
+		if self._order is not None:
+			# New entries are shuffled in after everything already in the order
+			rows = list(range(first, len(self)))
+			random.shuffle(rows)
+			self._order_position.frombytes(bytes(self._order_position.itemsize * len(rows)))
+			for row in rows:
+				self._order_position[row] = len(self._order)
+				self._order.append(row)
+		if self._fetched == first:
+			self._fetch_to(first + PLAYLIST_FETCH_BATCH)
+
+	def snapshot(self):
+		return PlaylistSnapshot(self._locations.copy(), bytes(self._flags))
+
+	def nbytes(self):
+		size = self._locations.nbytes() + len(self._flags) + self._durations.itemsize * len(self._durations)
+		if self._order is not None:
+			size += self._order.itemsize * len(self._order) * 2
+		return size
+
+	def duration(self, row):
+		duration = self._durations[row]
+		if duration < 0 and self.duration_lookup is not None and self._flags[row] & PLAYLIST_LOCAL:
+			duration = self._durations[row] = self.duration_lookup(self._locations[row])
+		return duration
+
+	def set_current(self, row):
+		previous, self._current = self._current, row
+		self._fetch_to(row + 1)
+		for changed in (previous, row):
+			if 0 <= changed < self._fetched:
+				index = self.index(changed)
+				self.dataChanged.emit(index, index, [Qt.FontRole])
+
+	def name(self, row):
+		location = self._locations[row]
+		if self._flags[row] & PLAYLIST_LOCAL:
+			return os.path.basename(location)
+		return QUrl(location).fileName() or location
+
+	# Qt model interface; views only ask about the rows they show
+
+	def rowCount(self, parent=QModelIndex()):
+		return 0 if parent.isValid() else self._fetched
+
+	def canFetchMore(self, parent):
+		return not parent.isValid() and self._fetched < len(self)
+
+	def fetchMore(self, parent):
+		self._fetch_to(self._fetched + PLAYLIST_FETCH_BATCH)
+
+	def _fetch_to(self, count):
+		count = min(count, len(self))
+		if count > self._fetched:
+			self.beginInsertRows(QModelIndex(), self._fetched, count - 1)
+			self._fetched = count
+			self.endInsertRows()
+
+	def data(self, index, role=Qt.DisplayRole):
+		row = index.row()
+		if not index.isValid() or row >= len(self):
+			return None
+		if role == Qt.DisplayRole:
+			return self.name(row)
+		if role == Qt.ToolTipRole:
+			duration = self.duration(row)
+			location = self._locations[row]
+			return f"{location} ({format_time(duration)})" if duration >= 0 else location
+		if role == Qt.FontRole and row == self._current:
+			font = QFont()
+			font.setBold(True)
+			return font
+		if role == self.DurationRole:
+			return self.duration(row)
+		return None
+
+	# Ordering
+
+	@property
+	def shuffled(self):
+		return self._order is not None
+
+	def set_shuffle(self, enabled, current=-1):
+		# The current row leads the new order, so what is playing carries on from there
+		if not enabled:
+			self._order = self._order_position = None
+			return
+		rows = list(range(len(self)))
+		random.shuffle(rows)
+		if current >= 0:
+			rows.remove(current)
+			rows.insert(0, current)
+		order = array("I", rows)
+		position = array("I", bytes(order.itemsize * len(order)))
+		for place, row in enumerate(order):
+			position[row] = place
+		self._order, self._order_position = order, position
+
+	def next_row(self, row, manual=False):
+		# The row after row in playback order, or -1 at the end; repeat "one" only holds
+		# for automatic advances, the Next button still moves on
+		if not len(self):
+			return -1
+		if self.repeat == "one" and row >= 0 and not manual:
+			return row
+		place = (self._order_position[row] if self._order is not None else row) + 1 if row >= 0 else 0
+		if place >= len(self):
+			if self.repeat == "off":
+				return -1
+			place = 0
+		return self._order[place] if self._order is not None else place
+
+	def previous_row(self, row, manual=False):
+		if not len(self) or row < 0:
+			return -1
+		if self.repeat == "one" and not manual:
+			return row
+		place = (self._order_position[row] if self._order is not None else row) - 1
+		if place < 0:
+			if self.repeat == "off":
+				return -1
+			place = len(self) - 1
+		return self._order[place] if self._order is not None else place
+
+	def sort_by(self, key, current=-1):
+		# key is "name" or "duration" (unknown last); returns the new row of current
+		count = len(self)
+		if key == "name":
+			names = [self.name(row).casefold() for row in range(count)]
+			order = sorted(range(count), key=names.__getitem__)
+		else:
+			durations = [self.duration(row) for row in range(count)]
+			order = sorted(range(count), key=lambda row: (durations[row] < 0, durations[row]))
+		new_current = order.index(current) if current >= 0 else -1
+		self.beginResetModel()
+		self._locations = self._locations.permuted(order)
+		self._flags = array("B", (self._flags[row] for row in order))
+		self._durations = array("q", (self._durations[row] for row in order))
+		self._current = new_current
+		if self._order is not None:
+			self.set_shuffle(True, new_current)
+		self.endResetModel()
+		return new_current
 
 class SeekSlider(QSlider):
+	# Emitted while the pointer moves over the slider without a button held
+	hovered = pyqtSignal(int, QPoint)
+	hoverLeft = pyqtSignal()
+
 	def __init__(self, total_duration, orientation=Qt.Horizontal):
 		super().__init__(orientation)
 		# Obtain the total duration from the QMediaPlayer
 		self.total_duration = total_duration  # Store the total duration
+		self.setMouseTracking(True)
 
 	def reset_position(self):
 		self.setValue(0)
+
+	def value_at(self, x):
+		return QStyle.sliderValueFromPosition(
+			self.minimum(),
+			self.maximum(),
+			x,
+			self.width()
+		)
 		
 	def mousePressEvent(self, event):
 		if event.button() == Qt.LeftButton:
-			value = QStyle.sliderValueFromPosition(
-				self.minimum(),
-				self.maximum(),
-				event.x(),
-				self.width()
-			)
-			self.setValue(value)
+			# Jump to the click, then hold the slider down so drags emit sliderMoved
+			self.setSliderPosition(self.value_at(event.x()))
+			self.setSliderDown(True)
 			event.accept()
 		else:
 			super().mousePressEvent(event)
 			
 	def mouseMoveEvent(self, event):
-		if event.buttons() & Qt.LeftButton:
-			value = QStyle.sliderValueFromPosition(
-				self.minimum(),
-				self.maximum(),
-				event.x(),
-				self.width()
-			)
-			self.setValue(value)
+		if event.buttons() & Qt.LeftButton and self.isSliderDown():
+			self.setSliderPosition(self.value_at(event.x()))
 			event.accept()
+		else:
+			if event.buttons() == Qt.NoButton:
+				self.hovered.emit(self.value_at(event.x()), event.globalPos())
+			super().mouseMoveEvent(event)
 
-		super().mouseMoveEvent(event)
+	def leaveEvent(self, event):
+		self.hoverLeft.emit()
+		super().leaveEvent(event)
+
+	def mouseReleaseEvent(self, event):
+		if event.button() == Qt.LeftButton and self.isSliderDown():
+			self.setSliderDown(False)
+			event.accept()
+		else:
+			super().mouseReleaseEvent(event)
 			
 class MainWindow(QMainWindow):
-	def __init__(self):
+	# Emitted from the indexing thread once a file's keyframes are known
+	keyframe_index_ready = pyqtSignal(str, object)
+	# Emitted from the session loading thread with the restored playlist and index
+	session_loaded = pyqtSignal(list, int)
+	# Emitted from a pool thread with the paths looked up, the store's records and a callback
+	_lookup_done = pyqtSignal(object, object, object)
+	# Backend name -> player class; the benchmark window adds a headless one
+	backends = PLAYBACK_BACKENDS
+
+	def __init__(self, backend="qt", seek_budget=SEEK_LATENCY_BUDGET_MS, profile=None, ui_refresh_hz=UI_REFRESH_HZ,
+			decoder_threads=0, late_frame_policy="drop", metrics_log=None, metrics_port=None, source_mode="filesrc",
+			read_block_size=READ_BLOCK_SIZE, network_buffer_seconds=NETWORK_BUFFER_SECONDS, max_bitrate=0,
+			restore_session=True):
 		super().__init__()
+		self._backend = backend  # Key into self.backends
+		# Passed to GStreamer backends; QMediaPlayer picks its own decoders
+		self._gstreamer_options = {
+			"decoder_threads": decoder_threads,
+			"late_frame_policy": late_frame_policy,
+			"source_mode": source_mode,
+			"read_block_size": read_block_size,
+			"network_buffer_seconds": network_buffer_seconds,
+			"max_bitrate": max_bitrate,
+		}
+		self._profile = profile  # StartupProfile when --startup-profile is given
+		self._seek_scheduler = SeekScheduler(self._issue_seek, seek_budget, self)
+		# Set on close; queued indexing and session work is skipped from then on
+		self._shutting_down = threading.Event()
+		self._pool = WorkerPool.instance()  # Shut down on close; a window opened later gets a new one
+		# Samples the GStreamer backends; QMediaPlayer exposes no pipeline bus
+		self._telemetry = PipelineTelemetry(log_path=metrics_log, parent=self)
+		if metrics_port:
+			self._telemetry.serve(metrics_port)
   
 		# Set the window icon
 		icon_path = 'sprite.png'  # Replace 'path_to_your_icon' with the actual path
 		self.setWindowIcon(QIcon(icon_path))
-  
-		self._media_player = QMediaPlayer()
-		self._mime_types = []  # Initialize the _mime_types attribute as an empty list
-		self._delay_timer = QTimer(self)
-		self._delay_timer.timeout.connect(self.start_media_playback)
-		self._slider = SeekSlider(Qt.Horizontal)  # Create a QSlider instance
-		self._playback_time_label = QLabel()  # Create a QLabel instance
-		self._total_duration_label = QLabel()  # Create a QLabel instance
-		self._video_widget = QVideoWidget()
-		
-		self._player = QMediaPlayer()
-		total_duration = self._player.duration()
-		
-		Gst.init(None)
-		
-		# Get the GStreamer bus
-		self._bus = Gst.Bus()
-
-		# Add the GStreamer bus watch
-		self._bus.add_signal_watch()
 
-		# Connect message handlers for debugging
-		self._bus.connect("message::error", self.on_error_message)
-		self._bus.connect("message::warning", self.on_warning_message)
 
-		# Create a QVideoWidget instance
-		self._video_widget = QVideoWidget()
-		# Add the video widget to the layout or set as central widget, etc.
-		self.setCentralWidget(self._video_widget)
-			 
-		self.video_position = 0  # Initialize video_position as an instance variable
-		
-		# Create a SeekSlider instance with the total duration
-		self._slider = SeekSlider(total_duration, Qt.Horizontal)
+		# Refresh the time labels and slider from one timer instead of on every positionChanged
+		self._ui_refresh_timer = QTimer(self)
+		self._ui_refresh_timer.setInterval(max(1, 1000 // ui_refresh_hz))
+		self._ui_refresh_timer.timeout.connect(self.refresh_ui)
+		self._shown_position = None  # Whole seconds currently displayed
+		self._shown_duration = None
 
 		self.fullscreen = False  # Initially not in fullscreen mode
 		self.tool_bar = QToolBar()  # Create a reference to the toolbar
+		self.setAcceptDrops(True)
 		
 		self.initUI()
 
+		# Bring back the last playlist once the window is idle
+		if restore_session:
+			QTimer.singleShot(STARTUP_IDLE_MS, self.restore_session)
+
 	def initUI(self):
-		# Create a QMediaPlayer instance
-		self._player = QMediaPlayer()  # Update the attribute name to "player"
-		self._video_widget = QLabel()
-		self._audio_output = QAudioOutput()  # Create a QAudioOutput instance
-		self._playlist = []  # FIXME 6.3: Replace by QMediaPlaylist?
+		# The playback backend is created on first open, once the window is up (see _ensure_player)
+		self._player = None
+		self._playlist = PlaylistModel(self)
+		self._playlist.duration_lookup = self._probed_duration
 		self._playlist_index = -1
 
 		# Make toolbar
-		tool_bar = QToolBar()
+		tool_bar = self.tool_bar
 		self.addToolBar(tool_bar)
 
 		file_menu = self.menuBar().addMenu("&File")
@@ -124,6 +3202,14 @@ class MainWindow(QMainWindow):
 		file_menu.addAction(open_action)
 		tool_bar.addAction(open_action)
 
+		icon = QIcon.fromTheme("folder-open")
+		open_folder_action = QAction(icon, "Open &Folder...", self, shortcut="Ctrl+Shift+O", triggered=self.open_folder)
+		file_menu.addAction(open_folder_action)
+
+		icon = QIcon.fromTheme("network-server")
+		open_url_action = QAction(icon, "Open &URL...", self, shortcut="Ctrl+U", triggered=self.open_url)
+		file_menu.addAction(open_url_action)
+
 		icon = QIcon.fromTheme("application-exit")
 		exit_action = QAction(icon, "E&xit", self, shortcut="Ctrl+Q", triggered=self.close)
 		file_menu.addAction(exit_action)
@@ -133,7 +3219,7 @@ class MainWindow(QMainWindow):
 
 		icon = QIcon.fromTheme("media-playback-start.png", style.standardIcon(QStyle.SP_MediaPlay))
 		self._play_action = tool_bar.addAction(icon, "Play")
-		self._play_action.triggered.connect(self._player.play)
+		self._play_action.triggered.connect(self.play_clicked)
 		play_menu.addAction(self._play_action)
 
 		icon = QIcon.fromTheme("media-skip-backward-symbolic.svg", style.standardIcon(QStyle.SP_MediaSkipBackward))
@@ -143,7 +3229,7 @@ class MainWindow(QMainWindow):
 
 		icon = QIcon.fromTheme("media-playback-pause.png", style.standardIcon(QStyle.SP_MediaPause))
 		self._pause_action = tool_bar.addAction(icon, "Pause")
-		self._pause_action.triggered.connect(self._player.pause)
+		self._pause_action.triggered.connect(self.pause_clicked)
 		play_menu.addAction(self._pause_action)
 
 		icon = QIcon.fromTheme("media-skip-forward-symbolic.svg", style.standardIcon(QStyle.SP_MediaSkipForward))
@@ -167,6 +3253,51 @@ class MainWindow(QMainWindow):
 
 		self.menuBar().addAction(self.fullscreen_action)  # Add action to the menu bar
 
+		# Create a QAction for gapless playback (pre-roll of the next entry)
+		self._gapless_action = QAction("&Gapless Playback", self, checkable=True)
+		self._gapless_action.setChecked(True)
+		self._gapless_action.toggled.connect(self.set_gapless)
+		play_menu.addAction(self._gapless_action)
+		self._preroll_player = None
+		self._preroll_index = -1
+		self.last_switch_ms = None  # Time from end of media to the next entry's first frame
+		self._switch_player = None  # Pre-rolled player whose first frame is being timed
+		self._switch_started = None
+		self._switch_signal = None  # framePresented, or positionChanged without a frame view
+
+		# Multi-view grid of the entries from the current one on, always on GStreamer
+		self._multiview_action = QAction("&Multi-View Grid", self, checkable=True, shortcut="Ctrl+M")
+		self._multiview_action.toggled.connect(self.set_multiview)
+		play_menu.addAction(self._multiview_action)
+		self._multiview = None  # MultiViewWidget while the grid is shown
+		self._multiview_timer = QTimer(self)
+		self._multiview_timer.setInterval(MULTIVIEW_STATS_INTERVAL_MS)
+		self._multiview_timer.timeout.connect(self.refresh_multiview)
+
+		# Background playback: GStreamer backends stop decoding video while the window is out of sight
+		self._video_mode_timer = QTimer(self)
+		self._video_mode_timer.setSingleShot(True)
+		self._video_mode_timer.setInterval(VIDEO_MODE_DELAY_MS)
+		self._video_mode_timer.timeout.connect(self.update_video_mode)
+
+		# Bookmarks jump back to review points; the GStreamer blocks and mmap source modes keep
+		# their bytes cached (filesrc reads around the segment cache)
+		play_menu.addSeparator()
+		play_menu.addAction(self.create_action("Add &Bookmark", self.add_bookmark, QKeySequence("Ctrl+B")))
+		play_menu.addAction(self.create_action("Next Boo&kmark", self.next_bookmark, QKeySequence("B")))
+		play_menu.addAction(self.create_action("&Remove Bookmark", self.remove_bookmark, QKeySequence("Shift+B")))
+		self._bookmarks = {}  # Local file path -> sorted positions in milliseconds
+
+		# Create a submenu for choosing the playback backend
+		backend_menu = play_menu.addMenu("&Backend")
+		backend_group = QActionGroup(self)
+		for name, label in (("qt", "Qt Multimedia"), ("gstreamer", "GStreamer")):
+			backend_action = QAction(label, self, checkable=True)
+			backend_action.setChecked(name == self._backend)
+			backend_action.triggered.connect(lambda checked, name=name: self.set_backend(name))
+			backend_group.addAction(backend_action)
+			backend_menu.addAction(backend_action)
+
 		# Create a QAction for mute
 		icon_path = "no-sound.png"  # Relative path to the icon
 		icon = QIcon(icon_path)
@@ -182,14 +3313,7 @@ class MainWindow(QMainWindow):
 				color: gray;  /* Change the text color to gray when checked */
 			}
 		""")
-		
-		self.media_player = QMediaPlayer()
-
-		self._video_widget = QVideoWidget()
-		self.setCentralWidget(self._video_widget)
 
-		self._player.stateChanged.connect(self.update_buttons)
-		self._player.setVideoOutput(self._video_widget)
 
 		self._volume_slider = QSlider(Qt.Horizontal)
 		self._volume_slider.setRange(0, 100)
@@ -212,35 +3336,29 @@ class MainWindow(QMainWindow):
 		tool_bar.addWidget(spacer)
 
 		tool_bar.addWidget(self._volume_slider)
-		
-		# Create a vertical layout for the video and slider
-		video_slider_layout = QVBoxLayout()
-
-		# Add the video widget to the layout
-		video_slider_layout.addWidget(self._video_widget)
-
-		# Create a horizontal layout for the slider
-		slider_layout = QHBoxLayout()
-		slider_layout.addWidget(self._playback_time_label)  # Add the playback time label to the layout
-		slider_layout.addWidget(self._slider)  # Add the slider to the layout
-		slider_layout.addWidget(self._total_duration_label)  # Add the total duration label to the layout
 
 		# Create the slider for controlling video position
-		self._slider = SeekSlider(Qt.Horizontal)
+		self._slider = SeekSlider(0, Qt.Horizontal)
 		self._slider.setRange(0, 1000)
 		self._slider.setValue(0)
 		self._slider.sliderMoved.connect(self.set_position)
-		self._slider.mousePressEvent = self.slider_mousePressEvent
+		self._slider.sliderReleased.connect(self.slider_released)
 
 		# Create a vertical layout for the video and slider
 		video_slider_layout = QVBoxLayout()
 
-		# Add the video widget to the layout
-		video_slider_layout.addWidget(self._video_widget)
+		# A second video widget for the pre-rolled next entry is stacked behind the first on the first pre-roll
+		self._video_widget = QVideoWidget()
+		self._preroll_video_widget = None
+		self._video_stack = QStackedWidget()
+		self._video_stack.addWidget(self._video_widget)
+
+		# Add the video widgets to the layout
+		video_slider_layout.addWidget(self._video_stack)
 
 		# Create labels for displaying playback time and total duration
-		self._playback_time_label = QLabel("0:00")
-		self._total_duration_label = QLabel("0:00")
+		self._playback_time_label = QLabel(format_time(0))
+		self._total_duration_label = QLabel(format_time(0))
 
 		# Create a horizontal layout for the slider and labels
 		slider_layout = QHBoxLayout()
@@ -258,226 +3376,857 @@ class MainWindow(QMainWindow):
 		# Set the video and slider widget as the central widget
 		self.setCentralWidget(video_slider_widget)
 
+		# Playlist dock; with uniform rows the view only asks the model about the rows on screen
+		self._playlist_view = QListView()
+		self._playlist_view.setModel(self._playlist)
+		self._playlist_view.setUniformItemSizes(True)
+		self._playlist_view.setLayoutMode(QListView.Batched)
+		self._playlist_view.activated.connect(lambda index: self._play_entry(index.row()))
+		self._playlist_dock = QDockWidget("Playlist", self)
+		self._playlist_dock.setObjectName("playlist-dock")
+		self._playlist_dock.setWidget(self._playlist_view)
+		self.addDockWidget(Qt.RightDockWidgetArea, self._playlist_dock)
+		self._playlist_dock.hide()
+
+		playlist_menu = self.menuBar().addMenu("P&laylist")
+		show_playlist_action = self._playlist_dock.toggleViewAction()
+		show_playlist_action.setShortcut("F9")
+		playlist_menu.addAction(show_playlist_action)
+		playlist_menu.addSeparator()
+		shuffle_action = QAction("&Shuffle", self, checkable=True, shortcut="Ctrl+H")
+		shuffle_action.toggled.connect(self.set_shuffle)
+		playlist_menu.addAction(shuffle_action)
+		repeat_menu = playlist_menu.addMenu("&Repeat")
+		repeat_group = QActionGroup(self)
+		for mode, label in zip(REPEAT_MODES, ("&Off", "&All", "&One")):
+			repeat_action = QAction(label, self, checkable=True)
+			repeat_action.setChecked(mode == self._playlist.repeat)
+			repeat_action.triggered.connect(lambda checked, mode=mode: self.set_repeat(mode))
+			repeat_group.addAction(repeat_action)
+			repeat_menu.addAction(repeat_action)
+		playlist_menu.addSeparator()
+		playlist_menu.addAction(self.create_action("Sort by &Name", lambda: self.sort_playlist("name")))
+		playlist_menu.addAction(self.create_action("Sort by &Duration", lambda: self.sort_playlist("duration")))
+
 		# Connect the sliderPressed signal to a custom slot
 		self._slider.sliderPressed.connect(self.slider_pressed)
 
-		# Connect the positionChanged and durationChanged signals to update labels
-		self._player.positionChanged.connect(self.update_playback_time)
-		self._player.durationChanged.connect(self.update_total_duration)
+		# Keyframe indexes of playlist entries, keyed by local file path
+		self._keyframe_indexes = {}
+		self._index_builds = {}  # Local file path -> threading.Event cancelling its index build
+		self.keyframe_index_ready.connect(self._store_keyframe_index)
+
+		# Probe files in the background as they are added to the playlist
+		self._media_info = {}  # Local file path -> MediaInfo
+		self._metadata_store = MetadataStore()
+		self._probe_service = ProbeService(self._metadata_store, parent=self)
+		self._probe_service.probed.connect(self._store_media_info)
+
+		# Resume positions and the playlist session, written in the background
+		self._store_writer = StoreWriter(self._metadata_store, parent=self)
+		self._resume_positions = {}  # Local file path -> milliseconds, from the store or this session
+		self._pending_resume = None  # Seek to this once the entry being opened has loaded
+		self._opening = False  # Between LoadingMedia and the first frame
+		self._resume_saved_at = 0
+		self._unresolved = set()  # Paths not looked up in the store yet
+		self._play_request = 0  # Bumped by every _play_entry; a lookup only opens the newest request
+		self.session_loaded.connect(self.session_restored)
+		self._lookup_done.connect(self._apply_lookup)
+
+		# Scan folders for media on a worker thread
+		self._folder_scanner = FolderScanner(parent=self)
+		self._folder_scanner.found.connect(self.scan_found)
+		self._folder_scanner.finished.connect(self.scan_finished)
+		self._scan_autoplay = False
+
+		# Show a preview of the hovered timestamp above the slider
+		self._thumbnail_cache = ThumbnailCache()
+		self._thumbnail_loader = ThumbnailLoader(self._thumbnail_cache, parent=self)
+		self._thumbnail_loader.thumbnail_ready.connect(self.show_thumbnail)
+		self._thumbnail_popup = QLabel(self, Qt.ToolTip)
+		self._hover_target = None  # (media_path, timestamp) under the pointer
+		self._hover_pos = QPoint()
+		self._slider.hovered.connect(self.slider_hovered)
+		self._slider.hoverLeft.connect(self.hide_thumbnail)
+		self.update_buttons(QMediaPlayer.StoppedState)
 			 
 		self.show()
 
-	def closeEvent(self, event):
-		if self._player.state() != QMediaPlayer.StoppedState:
-			self._player.stop()
-		
-	def start_media_playback(self):
+	def _ensure_player(self):
+		# Create the one playback backend on first use; GStreamer is only loaded if it is selected
+		if self._player is None:
+			self._player = self._create_backend(self._backend)
+			# Connect the player signals to update buttons and labels
+			self._attach_player(self._player)
+			if self._profile is not None:
+				self._profile.mark(f"{self._backend} backend created")
+		return self._player
+
+	def _uses_gstreamer(self):
+		# Probing, keyframe indexing and decoded hover previews load GStreamer, so they only
+		# run when a GStreamer backend is selected
+		return issubclass(self.backends[self._backend], GstPlayer)
+
+	def _create_backend(self, name):
+		backend = self.backends[name]
+		if issubclass(backend, GstPlayer):
+			return backend(**self._gstreamer_options)
+		return backend()
+
+	def _attach_player(self, player, set_output=True):
+		player.stateChanged.connect(self.update_buttons)
+		player.mediaStatusChanged.connect(self.handle_media_status)
+		player.error.connect(self._player_error)
+		player.positionChanged.connect(self.check_preroll)
+		player.durationChanged.connect(self.update_total_duration)
+		if set_output:
+			player.setVideoOutput(self._video_widget)
+		player.setVolume(self._volume_slider.value())
+		player.setMuted(self._mute_action.isChecked())
+		# GstPlayer reports the first frame after a seek; QMediaPlayer only a new position
+		if isinstance(player, GstPlayer):
+			player.seekFinished.connect(self._seek_scheduler.frame_ready)
+			player.busMessage.connect(self.on_bus_message)
+			self._telemetry.attach(player)
+		else:
+			player.positionChanged.connect(self._seek_scheduler.frame_ready)
+
+	def _detach_player(self, player):
+		player.stateChanged.disconnect(self.update_buttons)
+		player.mediaStatusChanged.disconnect(self.handle_media_status)
+		player.error.disconnect(self._player_error)
+		player.positionChanged.disconnect(self.check_preroll)
+		player.durationChanged.disconnect(self.update_total_duration)
+		if isinstance(player, GstPlayer):
+			player.seekFinished.disconnect(self._seek_scheduler.frame_ready)
+			player.busMessage.disconnect(self.on_bus_message)
+			self._telemetry.detach(player)
+		else:
+			player.positionChanged.disconnect(self._seek_scheduler.frame_ready)
+		self._seek_scheduler.reset()
+		player.stop()
+
+	def _dispose_player(self, player):
+		if player is self._switch_player:
+			self._stop_switch_timing()  # Replaced before its first frame; leave last_switch_ms as it was
+		# GstPlayer tears its pipeline down on its own worker
+		if isinstance(player, GstPlayer):
+			player.close()
+		player.deleteLater()
+
+	def set_backend(self, name):
+		if name == self._backend:
+			return
+		if self._player is None or self._multiview is not None:
+			# Nothing has been opened yet, or the grid is up; the backend is created on the next open
+			self._backend = name
+			return
+		# Carry the current media and position over to the new backend
+		self.discard_preroll()
+		was_playing = self._player.state() == QMediaPlayer.PlayingState
+		position = self._player.position()
+		self._detach_player(self._player)
+		self._dispose_player(self._player)
+		self._backend = name
+		self._player = self._create_backend(name)
+		self._attach_player(self._player)
 		if self._playlist_index >= 0:
+			self._apply_video_mode(self._player, self._playlist.path(self._playlist_index))
 			self._player.setMedia(QMediaContent(self._playlist[self._playlist_index]))
-			self._player.play()
-			
-	def create_buffering_pipeline(self, media_url):
-		# Create a GStreamer pipeline for buffering video
-		pipeline = Gst.Pipeline.new("buffered-player")
-		bus = pipeline.get_bus()
+			self._pending_resume = position  # Seek once the new backend has loaded the media
+			if was_playing:
+				self._player.play()
+		self.show_status_message(f"Playback backend: {name}")
 
-		# Create a GStreamer bus to handle media events
-		bus.add_signal_watch()
-		bus.connect("message::eos", self.handle_eos)
-		bus.connect("message::error", self.handle_error)
+	def play_clicked(self):
+		if self._player is None:
+			if self._playlist:
+				self._play_entry(max(0, self._playlist_index))
+			return
+		self._player.play()
 
-		# Define the filesrc element
-		filesrc = Gst.ElementFactory.make("filesrc", "file-source")
-		filesrc.set_property("location", media_url)
+	def pause_clicked(self):
+		if self._player is not None:
+			self._player.pause()
+			self.save_resume_position()
 
-		# Define the decodebin element
-		decodebin = Gst.ElementFactory.make("decodebin", "decode-bin")
+	def set_gapless(self, enabled):
+		if not enabled:
+			self.discard_preroll()
 
-		# Create a GStreamer video sink element
-		video_sink = Gst.ElementFactory.make("autovideosink", "video-sink")
+	def check_preroll(self, position):
+		# Open the next entry shortly before the current one ends
+		if not self._gapless_action.isChecked() or self._preroll_player is not None or self._multiview is not None:
+			return
+		next_index = self._playlist.next_row(self._playlist_index)
+		duration = self.current_duration()
+		if next_index < 0 or duration <= 0 or duration - position > PREROLL_LEAD_MS:
+			return
+		self._preroll_index = next_index
+		if self._preroll_video_widget is None:
+			self._preroll_video_widget = QVideoWidget()
+			self._video_stack.addWidget(self._preroll_video_widget)
+		self._preroll_player = self._create_backend(self._backend)
+		self._preroll_player.setVideoOutput(self._preroll_video_widget)
+		self._preroll_player.setMuted(True)
+		self._apply_video_mode(self._preroll_player, self._playlist.path(next_index))
+		self._preroll_player.setMedia(QMediaContent(self._playlist[next_index]))
+		self._preroll_player.pause()  # Decode up to the first frame and hold it
+		self.request_keyframe_index(self._playlist[next_index])
 
-		# Create a GStreamer audio sink element
-		audio_sink = Gst.ElementFactory.make("autoaudiosink", "audio-sink")
+	def discard_preroll(self):
+		if self._preroll_player is not None:
+			self._preroll_player.stop()
+			self._dispose_player(self._preroll_player)
+		self._preroll_player = None
+		self._preroll_index = -1
 
-		# Create a GStreamer video convert element
-		video_convert = Gst.ElementFactory.make("videoconvert", "video-convert")
+	def video_wanted(self, media_path):
+		# Nothing would show video while the window is minimised or hidden, or for audio files
+		if self.isMinimized() or not self.isVisible() or self._shutting_down.is_set():
+			return False
+		media_info = self._media_info.get(media_path)
+		return media_info is None or media_info.has_video
 
-		# Create a GStreamer audio convert element
-		audio_convert = Gst.ElementFactory.make("audioconvert", "audio-convert")
+	def _apply_video_mode(self, player, media_path):
+		# Only the GStreamer backends can leave video undecoded; the grid always shows video.
+		# QMediaPlayer (--backend qt) keeps decoding video while hidden, so it saves nothing here
+		if isinstance(player, GstPlayer) and not isinstance(player, MultiViewPlayer):
+			player.set_video_enabled(self.video_wanted(media_path))
 
-		# Create a GStreamer queue element for video buffering
-		video_queue = Gst.ElementFactory.make("queue", "video-queue")
-		video_queue.set_property("max-size-buffers", 0)  # Use 0 for an unlimited number of buffers
-		video_queue.set_property("max-size-bytes", 5000000)  # 5MB
+	def update_video_mode(self):
+		if self._shutting_down.is_set():
+			return
+		media_path = self._playlist.path(self._playlist_index) if self._playlist_index >= 0 else ""
+		if self._player is not None:
+			self._apply_video_mode(self._player, media_path)
+		if self._preroll_player is not None:
+			self._apply_video_mode(self._preroll_player, self._playlist.path(self._preroll_index))
 
-		# Create a GStreamer queue element for audio buffering
-		audio_queue = Gst.ElementFactory.make("queue", "audio-queue")
-		audio_queue.set_property("max-size-buffers", 0)  # Use 0 for an unlimited number of buffers
-		audio_queue.set_property("max-size-bytes", 5000000)  # 5MB
+	def changeEvent(self, event):
+		if event.type() == QEvent.WindowStateChange:
+			self._schedule_video_mode()
+		super().changeEvent(event)
 
-		# Add GStreamer elements to the pipeline
-		pipeline.add(filesrc)
-		pipeline.add(decodebin)
-		pipeline.add(video_queue)
-		pipeline.add(video_convert)
-		pipeline.add(video_sink)
-		pipeline.add(audio_queue)
-		pipeline.add(audio_convert)
-		pipeline.add(audio_sink)
+	def showEvent(self, event):
+		self._schedule_video_mode()
+		super().showEvent(event)
 
-		# Link the GStreamer elements
-		filesrc.link(decodebin)
-		decodebin.connect("pad-added", self.on_pad_added)
-		video_queue.link(video_convert)
-		video_convert.link(video_sink)
-		audio_queue.link(audio_convert)
-		audio_convert.link(audio_sink)
+	def hideEvent(self, event):
+		self._schedule_video_mode()
+		super().hideEvent(event)
 
-		# Set the GStreamer pipeline to the "paused" state
-		pipeline.set_state(Gst.State.PAUSED)
+	def _schedule_video_mode(self):
+		# Bring video back at once; drop it only once the window has stayed out of sight a moment
+		if self.isMinimized() or not self.isVisible():
+			self._video_mode_timer.start()
+		else:
+			self._video_mode_timer.stop()
+			self.update_video_mode()
 
-		return pipeline
+	def set_multiview(self, enabled):
+		# Swap the backend for a MultiViewPlayer over a grid of tiles, and back
+		if enabled == (self._multiview is not None):
+			return
+		if not enabled:
+			self._leave_multiview()
+			if self._playlist_index >= 0:
+				self._play_entry(self._playlist_index)
+			return
+		start = max(0, self._playlist_index)
+		urls = []
+		for row in range(start, len(self._playlist)):
+			if self._playlist.is_local(row):
+				urls.append(self._playlist[row])
+				if len(urls) == MULTIVIEW_MAX_TILES:
+					break
+		if len(urls) < 2:
+			self._multiview_action.setChecked(False)
+			self.show_status_message("Multi-view needs two or more local files from the current entry on")
+			return
+		self.save_resume_position()
+		self.discard_preroll()
+		if self._player is not None:
+			self._detach_player(self._player)
+			self._dispose_player(self._player)
+		self._multiview = MultiViewWidget([url.fileName() for url in urls])
+		self._video_stack.addWidget(self._multiview)
+		self._video_stack.setCurrentWidget(self._multiview)
+		player = self._player = MultiViewPlayer(**self._gstreamer_options)
+		self._attach_player(player, set_output=False)
+		player.set_tiles([url.toLocalFile() for url in urls], self._multiview.views)
+		self._multiview.tilesResized.connect(player.set_tile_sizes)
+		player.setMedia(QMediaContent(urls[0]))
+		player.play()
+		self._multiview_timer.start()
+		self.setWindowTitle(f"Multi-View ({len(urls)}) - Pot-O Video Player v0.1.0.1-alpha")
 
-	def open(self):
+	def _leave_multiview(self):
+		self._multiview_timer.stop()
+		self._detach_player(self._player)
+		self._dispose_player(self._player)
+		self._player = None  # The selected backend comes back on the next open
+		self._video_stack.setCurrentWidget(self._video_widget)
+		self._video_stack.removeWidget(self._multiview)
+		for view in self._multiview.views:
+			view.clear()
+		self._multiview.deleteLater()
+		self._multiview = None
+
+	def refresh_multiview(self):
+		if self._multiview is not None:
+			self._multiview.show_stats(self._player.tile_stats())
+
+	def _swap_to_preroll(self, started=None):
+		# Start the already-paused next entry and show its widget; no decoder is rebuilt.
+		# started: when the old entry reported end of media; the switch is timed from
+		# there to the new entry's first frame (see _switch_progressed)
+		self._pending_resume = None  # Gapless continuation always starts at the beginning
+		player = self._preroll_player
+		self._stop_switch_timing()
+		self._switch_player = player
+		self._switch_started = started if started is not None else time.perf_counter()
+		if isinstance(player, GstPlayer) and player.render_to_widget and player.video_enabled:
+			self._switch_signal = player.framePresented
+		else:
+			self._switch_signal = player.positionChanged
+			if not isinstance(player, GstPlayer):
+				player.setNotifyInterval(SWITCH_PROBE_INTERVAL_MS)  # positionChanged is all QMediaPlayer offers
+		self._switch_signal.connect(self._switch_progressed)
+		player.setMuted(self._mute_action.isChecked())
+		player.play()
+		self._video_stack.setCurrentWidget(self._preroll_video_widget)
+
+		old_player = self._player
+		self._detach_player(old_player)
+		self._dispose_player(old_player)
+		self._video_widget, self._preroll_video_widget = self._preroll_video_widget, self._video_widget
+		self._player = player
+		self._attach_player(player, set_output=False)
+		index = self._preroll_index
+		self._preroll_player = None
+		self._preroll_index = -1
+
+		# The old backend is gone; give the next pre-roll a fresh one
+		self._entry_changed(index)
+		self.update_buttons(player.state())
+
+	def _switch_progressed(self, position=None):
+		# The first presented frame ends the switch; without a frame view, the first position past 0
+		if position is not None and position <= 0:
+			return
+		self.last_switch_ms = (time.perf_counter() - self._switch_started) * 1000
+		self._stop_switch_timing()
+		self.show_status_message(f"Gapless switch: {self.last_switch_ms:.1f} ms")
+
+	def _stop_switch_timing(self):
+		player, self._switch_player = self._switch_player, None
+		if player is None:
+			return
+		self._switch_signal.disconnect(self._switch_progressed)
+		self._switch_signal = None
+		if not isinstance(player, GstPlayer):
+			player.setNotifyInterval(QT_NOTIFY_INTERVAL_MS)
+
+	def closeEvent(self, event):
+		self._shutting_down.set()
+		for cancel in self._index_builds.values():
+			cancel.set()
+		self.discard_preroll()
+		self.save_resume_position()
 		self._ensure_stopped()
+		if isinstance(self._player, GstPlayer):
+			self._player.close()
+		self._folder_scanner.cancel()
+		self._thumbnail_loader.close()
+		self._probe_service.shutdown()
+		self._store_writer.close()  # Flushes pending positions and the session
+		# Let pipeline teardown and the final store write finish and stop the threads before the
+		# store closes; a worker that outlives the shutdown timeout can no longer reopen it
+		self._pool.shutdown()
+		self._metadata_store.close()
+		self._telemetry.close()
+
+	def _play_entry(self, index):
+		if self._multiview is not None:
+			# Opening a single entry ends the grid
+			self._multiview_action.blockSignals(True)
+			self._multiview_action.setChecked(False)
+			self._multiview_action.blockSignals(False)
+			self._leave_multiview()
+		self.save_resume_position()
+		if self._preroll_player is not None and index == self._preroll_index:
+			self._swap_to_preroll()
+			return
+		self.discard_preroll()
+		self._play_request += 1
+		media_path = self._playlist.path(index)
+		if media_path in self._unresolved:
+			# The resume position is in the store; open once it has answered
+			request = self._play_request
+			def opened(cached):
+				if request == self._play_request and index < len(self._playlist) \
+						and self._playlist.path(index) == media_path:
+					self._open_entry(index)
+			self._lookup_entries([media_path], callback=opened, priority=WORK_INTERACTIVE)
+			return
+		self._open_entry(index)
+
+	def _open_entry(self, index):
+		media_path = self._playlist.path(index)
+		resume = self._resume_positions.get(media_path, 0)
+		self._pending_resume = resume if resume > 0 else None
+		player = self._ensure_player()
+		self._apply_video_mode(player, media_path)
+		player.setMedia(QMediaContent(self._playlist[index]))
+		player.play()
+		self._entry_changed(index)
+
+	def save_resume_position(self):
+		# Hand the current entry's position to the background writer
+		if self._player is None or self._playlist_index < 0 or self.player_state() == QMediaPlayer.StoppedState:
+			return
+		media_path = self._playlist.path(self._playlist_index)
+		if not media_path:
+			return
+		position = self._player.position()
+		duration = self.current_duration()
+		if position < RESUME_MIN_MS or (duration > 0 and duration - position < RESUME_END_MARGIN_MS):
+			position = 0
+		self._set_resume_position(media_path, position)
+
+	def _set_resume_position(self, media_path, position):
+		self._resume_saved_at = position
+		if self._resume_positions.get(media_path, 0) != position:
+			self._resume_positions[media_path] = position
+			self._store_writer.set_resume(media_path, position)
+
+	def restore_session(self):
+		# Files opened before the window went idle win over the last session
+		if self._playlist:
+			return
+		def load():
+			session = self._metadata_store.load_session()
+			if session is not None:
+				urls, index = session
+				self.session_loaded.emit([QUrl(url) for url in urls], index)
+		self._pool.submit(load, WORK_BACKGROUND, self._shutting_down)
+
+	def session_restored(self, urls, index):
+		# Entries are neither stat'ed nor probed here; _play_entry looks each one up when it is opened
+		if self._playlist or not urls:
+			return
+		self._playlist.extend(urls)
+		self._unresolved.update(url.toLocalFile() for url in urls if url.isLocalFile())
+		self._playlist_index = min(max(0, index), len(urls) - 1)
+		file_name = urls[self._playlist_index].fileName()
+		self.setWindowTitle(f"{file_name} - Pot-O Video Player v0.1.0.1-alpha")
+		self.update_buttons(self.player_state())
+		self.show_status_message(f"Restored {len(urls)} entries from the last session")
+
+	def _entry_changed(self, index):
+		self._playlist_index = index
+		self._store_writer.set_session(self._playlist.snapshot(), index)
+		self._playlist.set_current(index)
+		self._playlist_view.scrollTo(self._playlist.index(index))
+		url = self._playlist[index]
+		file_name = url.fileName()  # Extract the file name from the URL
+		self.setWindowTitle(f"{file_name} - Pot-O Video Player v0.1.0.1-alpha")  # Set window title
+		self.request_keyframe_index(url)
+		# Show the probed duration without waiting for the backend to load the file
+		self.update_total_duration(self.current_duration())
+
+	def request_keyframe_index(self, url):
+		# Build each file's index once, off the GUI thread. Only the current and pre-rolled
+		# entries are worth indexing; builds for anything else are cancelled
+		media_path = url.toLocalFile()
+		if not self._uses_gstreamer():
+			return
+		wanted = {self._playlist.path(index) for index in (self._playlist_index, self._preroll_index) if index >= 0}
+		for other in list(self._index_builds):
+			if other not in wanted and other != media_path:
+				self._index_builds.pop(other).set()
+				if self._keyframe_indexes.get(other) is None:
+					del self._keyframe_indexes[other]  # Still marked in progress; build it again when wanted
+		if not media_path or media_path in self._keyframe_indexes:
+			return
+		self._keyframe_indexes[media_path] = None  # Mark as in progress
+		cancel = self._index_builds[media_path] = threading.Event()
+		def build():
+			index = KeyframeIndex.build(media_path, cancel=cancel)
+			if cancel.is_set():
+				return
+			if index is not None:
+				self._metadata_store.store(media_path, keyframe_index=index)
+			self.keyframe_index_ready.emit(media_path, index)
+		self._pool.submit(build, WORK_INDEX, cancel)
+
+	def _store_keyframe_index(self, media_path, index):
+		self._index_builds.pop(media_path, None)
+		self._keyframe_indexes[media_path] = index
+		self._pin_bookmarks(media_path, self._bookmarks.get(media_path, ()))
+
+	def current_keyframe_index(self):
+		if self._playlist_index < 0:
+			return None
+		return self._keyframe_indexes.get(self._playlist.path(self._playlist_index))
+
+	def open(self):
 		file_dialog = QFileDialog(self)
+		file_dialog.setFileMode(QFileDialog.ExistingFiles)
 		is_windows = sys.platform == 'win32'
-
-		if not self._mime_types:
-			self._mime_types = get_supported_mime_types()
-		if is_windows:
-			if AVI not in self._mime_types:
-				self._mime_types.append(AVI)
-		elif MP4 not in self._mime_types:
-			self._mime_types.append(MP4)
-		if TS not in self._mime_types:
-			self._mime_types.append(TS)
-		if FLV not in self._mime_types:
-			self._mime_types.append(FLV)
-		if _3GP not in self._mime_types:
-			self._mime_types.append(_3GP)
-
-		file_dialog.setMimeTypeFilters(self._mime_types)
+		registry = self.mime_registry()
+		file_dialog.setMimeTypeFilters(registry.dialog_filters())
 		default_mimetype = AVI if is_windows else MP4
 
-		if default_mimetype in self._mime_types:
+		if default_mimetype in registry.mime_types:
 			file_dialog.selectMimeTypeFilter(default_mimetype)
 
 		movies_location = QStandardPaths.writableLocation(QStandardPaths.MoviesLocation)
 		file_dialog.setDirectory(movies_location)
 
 		if file_dialog.exec_() == QDialog.Accepted:
-			url = file_dialog.selectedUrls()[0]
-			file_name = url.fileName()  # Extract the file name from the URL
-			self.setWindowTitle(f"{file_name} - Pot-O Video Player v0.1.0.1-alpha")  # Set window title
-			self._playlist.append(url)
-			self._playlist_index = len(self._playlist) - 1
-			self._player.setMedia(QMediaContent(url))
-			self._player.play()
+			first_index = len(self._playlist)
+			self.add_to_playlist(file_dialog.selectedUrls())
+			if len(self._playlist) > first_index:
+				self._play_entry(first_index)
+
+	def open_url(self):
+		# HTTP progressive, HLS (.m3u8) or DASH (.mpd)
+		text, ok = QInputDialog.getText(self, "Open URL", "Stream URL:")
+		url = QUrl.fromUserInput(text.strip())
+		if not ok or not text.strip() or not url.isValid():
+			return
+		first_index = len(self._playlist)
+		self.add_to_playlist([url])
+		self._play_entry(first_index)
+
+	def open_folder(self):
+		movies_location = QStandardPaths.writableLocation(QStandardPaths.MoviesLocation)
+		directory = QFileDialog.getExistingDirectory(self, "Open Folder", movies_location)
+		if directory:
+			self.scan_paths([directory])
+
+	def scan_paths(self, paths):
+		# Fill the playlist from a worker thread; the first file found starts playing
+		self._scan_autoplay = True
+		self._folder_scanner.scan(paths, self.mime_registry())
+		self.show_status_message("Scanning...")
+
+	def scan_found(self, generation, entries):
+		if generation != self._folder_scanner.generation:
+			return  # Queued before its scan was abandoned
+		first_index = len(self._playlist)
+		self.add_to_playlist([QUrl.fromLocalFile(path) for path, _, _ in entries],
+			{path: (size, mtime_ns) for path, size, mtime_ns in entries})
+		if self._scan_autoplay:
+			self._scan_autoplay = False
+			self._play_entry(first_index)
+
+	def scan_finished(self, generation, count):
+		if generation == self._folder_scanner.generation:
+			self.show_status_message(f"Added {count} files")
+
+	def mime_registry(self):
+		# Built on first use, so startup never queries the multimedia backend
+		return MimeRegistry.instance()
+
+	def dragEnterEvent(self, event):
+		registry = self.mime_registry()
+		for url in event.mimeData().urls():
+			path = url.toLocalFile()
+			if path and (os.path.isdir(path) or registry.is_supported(path)):
+				event.acceptProposedAction()
+				return
+		event.ignore()
+
+	def dropEvent(self, event):
+		# Files are classified here; directories go to the scanner
+		registry = self.mime_registry()
+		first_index = len(self._playlist)
+		files, directories = [], []
+		for url in event.mimeData().urls():
+			path = url.toLocalFile()
+			if path and os.path.isdir(path):
+				directories.append(path)
+			elif path and registry.is_supported(path):
+				files.append(url)
+		if files:
+			self.add_to_playlist(files)
+			self._play_entry(first_index)
+		if directories:
+			self.scan_paths(directories)
+			self._scan_autoplay = not files
+		event.acceptProposedAction()
+
+	def add_to_playlist(self, urls, identities=None):
+		# Entries are usable at once; known files come from the store in one query
+		# and only the rest are handed to the probe service when a GStreamer backend is selected
+		self._playlist.extend(urls)
+		media_paths = [url.toLocalFile() for url in urls if url.isLocalFile()]
+		if media_paths:
+			self._unresolved.update(media_paths)
+			callback = None
+			if self._uses_gstreamer():
+				callback = lambda cached: self._probe_service.probe(
+					[media_path for media_path in media_paths if cached.get(media_path, (None,))[0] is None])
+			self._lookup_entries(media_paths, identities, callback)
+		self._store_writer.set_session(self._playlist.snapshot(), self._playlist_index)
+		self.update_buttons(self.player_state())
+
+	def _lookup_entries(self, media_paths, identities=None, callback=None, priority=WORK_PROBE):
+		# The lookup stats every file and waits for the store's lock, which probe workers hold
+		# while they commit; either can stall on a slow mount, so it runs on the pool and
+		# _apply_lookup takes the records, then calls callback(records), on the GUI thread
+		def lookup():
+			try:
+				cached = self._metadata_store.lookup_many(media_paths, identities)
+			except Exception:
+				sys.excepthook(*sys.exc_info())
+				cached = {}
+			self._lookup_done.emit(media_paths, cached, callback)
+		self._pool.submit(lookup, priority, self._shutting_down)
+
+	def _apply_lookup(self, media_paths, cached, callback):
+		for media_path, (media_info, index, resume_ms) in cached.items():
+			if media_info is not None:
+				self._media_info[media_path] = media_info
+			if index is not None:
+				self._keyframe_indexes[media_path] = index
+			if resume_ms > 0:
+				self._resume_positions.setdefault(media_path, resume_ms)
+		self._unresolved.difference_update(media_paths)
+		if callback is not None:
+			callback(cached)
+
+	def _probed_duration(self, media_path):
+		media_info = self._media_info.get(media_path)
+		return media_info.duration_ms if media_info is not None else -1
+
+	def set_shuffle(self, enabled):
+		# The pre-rolled entry may no longer come next
+		self.discard_preroll()
+		self._playlist.set_shuffle(enabled, self._playlist_index)
+
+	def set_repeat(self, mode):
+		self.discard_preroll()
+		self._playlist.repeat = mode
+
+	def sort_playlist(self, key):
+		self.discard_preroll()
+		self._playlist_index = self._playlist.sort_by(key, self._playlist_index)
+		self._store_writer.set_session(self._playlist.snapshot(), self._playlist_index)
+
+	def _store_media_info(self, media_path, media_info):
+		self._media_info[media_path] = media_info
+		if media_info is not None and self._playlist_index >= 0 \
+				and self._playlist.path(self._playlist_index) == media_path:
+			if self._player is None or self._player.duration() <= 0:
+				self.update_total_duration(media_info.duration_ms)
+			if not media_info.has_video:
+				self.update_video_mode()
+
+	def current_media_info(self):
+		if self._playlist_index < 0:
+			return None
+		return self._media_info.get(self._playlist.path(self._playlist_index))
+
+	def current_duration(self):
+		# Prefer the backend's figure; fall back to the probed one while it loads
+		duration = self._player.duration() if self._player is not None else 0
+		if duration <= 0:
+			media_info = self.current_media_info()
+			if media_info is not None:
+				duration = media_info.duration_ms
+		return duration
+
+	def player_state(self):
+		return self._player.state() if self._player is not None else QMediaPlayer.StoppedState
 
 	def _ensure_stopped(self):
-		if self._player.state() != QMediaPlayer.StoppedState:
+		if self.player_state() != QMediaPlayer.StoppedState:
+			self.save_resume_position()
 			self._player.stop()
 
 	def previous_clicked(self):
-		if self._player.position() <= 5000 and self._playlist_index > 0:
-			self._playlist_index -= 1
-			self._player.setMedia(QMediaContent(self._playlist[self._playlist_index]))
-			self._player.play()
+		if self._player is None:
+			return
+		previous_index = self._playlist.previous_row(self._playlist_index, manual=True)
+		if self._player.position() <= 5000 and previous_index >= 0:
+			self._play_entry(previous_index)
 		else:
 			self._player.setPosition(0)
 
 	def next_clicked(self):
-		if self._playlist_index < len(self._playlist) - 1:
-			self._playlist_index += 1
-			self._player.setMedia(QMediaContent(self._playlist[self._playlist_index]))
-			self._player.play()
+		next_index = self._playlist.next_row(self._playlist_index, manual=True)
+		if next_index >= 0:
+			self._play_entry(next_index)
 			
-	def handle_eos(self, bus, message):
-		# Handle End-of-Stream (EOS) message from GStreamer
+	def handle_eos(self):
+		# Handle End-of-Stream (EOS) reported by the playback backend
 		self.show_status_message("End of media")
-		self._pipeline.set_state(Gst.State.NULL)
 
-	def handle_error(self, bus, message):
-		# Handle error messages from GStreamer
-		error, debug_info = message.parse_error()
-		self.show_status_message(f"Error: {error.message} - {debug_info if debug_info else 'No debug info'}")
-		self._pipeline.set_state(Gst.State.NULL)
+	def handle_media_status(self, status):
+		# Opening runs in the background; say so until the first frame is ready
+		if status == QMediaPlayer.LoadingMedia:
+			self._opening = True
+			self.statusBar().showMessage("Opening\u2026")
+		elif self._opening and status != QMediaPlayer.StalledMedia:
+			self._opening = False
+			self.statusBar().clearMessage()
+		if status in (QMediaPlayer.LoadedMedia, QMediaPlayer.BufferedMedia) and self._pending_resume is not None:
+			position, self._pending_resume = self._pending_resume, None
+			self.seek(position, accurate=True)
+			self.show_status_message(f"Resumed at {format_time(position)}")
+		elif status == QMediaPlayer.EndOfMedia:
+			# Played to the end: start from the beginning next time
+			if self._playlist_index >= 0 and self._playlist.is_local(self._playlist_index):
+				self._set_resume_position(self._playlist.path(self._playlist_index), 0)
+			if self._preroll_player is not None:
+				self._swap_to_preroll(time.perf_counter())
+				return
+			self.handle_eos()
+			# Nothing was pre-rolled (too short, a stream, or the next entry was not ready); open the next one
+			if self._playlist_index < 0 or self._multiview is not None:
+				return
+			next_index = self._playlist.next_row(self._playlist_index)
+			if next_index >= 0:
+				self._play_entry(next_index)
 
-	def on_pad_added(self, decodebin, pad):
-		# Handle dynamic pad linking when decoding begins
-		pad_link = pad.get_current_caps()[0].get_name()
-		if "video" in pad_link:
-			pad.link(self._video_queue.get_static_pad("sink"))
-		elif "audio" in pad_link:
-			pad.link(self._audio_queue.get_static_pad("sink"))
+	def slider_value_to_position(self, value):
+		# Map a slider value onto the media timeline in milliseconds
+		return int(value * self.current_duration() / self._slider.maximum())
+
+	def seek(self, position, accurate):
+		# Coalesce seeks so at most one is in flight and only the newest target waits
+		self._seek_scheduler.request(position, accurate)
+
+	def _issue_seek(self, position, accurate):
+		# Fast seeks snap to a known keyframe so the backend decodes at most one GOP
+		index = self.current_keyframe_index()
+		if not accurate and index:
+			position = index.nearest(position)
+		if self._player is None:
+			return
+		if isinstance(self._player, GstPlayer):
+			self._player.seek(position, accurate)
+		else:
+			self._player.setPosition(position)
+
+	def add_bookmark(self):
+		if self._player is None or self._playlist_index < 0:
+			return
+		position = self._player.position()
+		bookmarks = self._bookmarks.setdefault(self._playlist.path(self._playlist_index), [])
+		if position not in bookmarks:
+			bisect.insort(bookmarks, position)
+		self._pin_bookmarks(self._playlist.path(self._playlist_index), [position])
+		self.show_status_message(f"Bookmark at {format_time(position)}")
+
+	def remove_bookmark(self):
+		# The bookmark nearest the current position
+		if self._player is None or self._playlist_index < 0:
+			return
+		media_path = self._playlist.path(self._playlist_index)
+		bookmarks = self._bookmarks.get(media_path)
+		if not bookmarks:
+			return
+		position = self._player.position()
+		removed = min(bookmarks, key=lambda bookmark: abs(bookmark - position))
+		bookmarks.remove(removed)
+		self._pin_bookmarks(media_path, [removed], pinned=False)
+		self.show_status_message(f"Removed bookmark at {format_time(removed)}")
+
+	def _pin_bookmarks(self, media_path, positions, pinned=True):
+		# Bookmarks are pinned in the segment cache by their keyframe's offset in the file, which
+		# needs the keyframe index; bookmarks sharing a keyframe share the pin
+		index = self._keyframe_indexes.get(media_path)
+		if (not isinstance(self._player, GstPlayer) or index is None or self._playlist_index < 0
+				or self._playlist.path(self._playlist_index) != media_path):
+			return
+		kept = {index.offset_before(bookmark) for bookmark in self._bookmarks.get(media_path, ())}
+		for position in positions:
+			offset = index.offset_before(position)
+			if offset is not None and (pinned or offset not in kept):
+				self._player.pin_offset(offset, pinned)
+
+	def next_bookmark(self):
+		# The first bookmark after the current position, wrapping to the start
+		if self._player is None or self._playlist_index < 0:
+			return
+		bookmarks = self._bookmarks.get(self._playlist.path(self._playlist_index))
+		if not bookmarks:
+			return
+		index = bisect.bisect_right(bookmarks, self._player.position() + 1000)
+		self.seek(bookmarks[index % len(bookmarks)], accurate=True)
 
 	def set_position(self, new_position):
-		# Calculate the actual video position based on the slider value
-		video_duration = self._player.duration()
-		video_position = 0  # Define video_position before the if statement
-		if video_duration > 0:
-			video_position = int(new_position * video_duration / 1000)
-			# Capture the current position before seeking
-			current_position = self._player.position()
-			self._player.setPosition(video_position)
-			
-		# Check if the position did not change as expected
-		if abs(self._player.position() - video_position) > 100:
-			print("Buffering error detected. Resetting buffer.")
-			self.reset_buffer()
-			
-			# Start the delay timer (e.g., 1000 milliseconds = 1 second)
-			self._delay_timer.start(1000)
-			
-		 # Add a message handler for debugging
-		self._bus.connect("message::error", self.on_error_message)
-		self._bus.connect("message::warning", self.on_warning_message)
-		
-	def slider_mousePressEvent(self, event):
-		new_value = event.x()  # You need to obtain new_value from the event
-		self.set_position(new_value)
+		# Snap to keyframes while the slider is being dragged
+		if self.current_duration() > 0:
+			self.seek(self.slider_value_to_position(new_position), accurate=False)
 		
 	# Add message handling functions
-	def on_error_message(self, bus, message):
-		error, debug_info = message.parse_error()
-		print(f"Error: {error.message}", file=sys.stderr)
-		if debug_info:
-			print(f"Debug info: {debug_info}", file=sys.stderr)
+	def on_bus_message(self, message):
+		# Errors already arrive through the backend's error signal (see _player_error)
+		if message.type == Gst.MessageType.WARNING:
+			self.on_warning_message(message)
 
-	def on_warning_message(self, bus, message):
+	def on_warning_message(self, message):
 		warning, debug_info = message.parse_warning()
 		print(f"Warning: {warning.message}", file=sys.stderr)
 		if debug_info:
 			print(f"Debug info: {debug_info}", file=sys.stderr)
 			
-	def reset_buffer(self):
-		self._pipeline.set_state(Gst.State.NULL)
-		self._pipeline.set_state(Gst.State.PAUSED)
-		
-		# After resetting, start the delay timer
-		self._delay_timer.start(1000)
+	def slider_pressed(self):
+		# SeekSlider has already moved to the clicked value
+		self.set_position(self._slider.sliderPosition())
 
-	def slider_mousePressEvent(self, event):
-		# Calculate the position where the slider was clicked
-		click_position = event.pos().x()
+	def slider_released(self):
+		# Land on the exact frame once the user lets go
+		if self.current_duration() > 0:
+			self.seek(self.slider_value_to_position(self._slider.sliderPosition()), accurate=True)
+		stats = self._seek_scheduler.stats()
+		if stats["count"]:
+			self.show_status_message(
+				f"Seek latency p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms "
+				f"({stats['dropped']} superseded, {stats['timeouts']} over budget)")
 
-		# Calculate the value corresponding to the click position
-		max_value = self._slider.maximum()
-		new_value = int((click_position / self._slider.width()) * max_value)
+	def thumbnail_timestamp(self, position):
+		# Key previews by the keyframe a fast seek would land on, so nearby hovers share one decode
+		index = self.current_keyframe_index()
+		if index:
+			return index.nearest(position)
+		slot = max(1, self.current_duration() // THUMBNAIL_SLOTS)
+		return position // slot * slot
 
-		# Set the slider value and update the video position
-		self._slider.setValue(new_value)
-		self.set_position(new_value)
+	def slider_hovered(self, value, global_pos):
+		if self._playlist_index < 0 or self.current_duration() <= 0:
+			return
+		media_path = self._playlist.path(self._playlist_index)
+		if not media_path:
+			return
+		timestamp = self.thumbnail_timestamp(self.slider_value_to_position(value))
+		self._hover_target = (media_path, timestamp)
+		self._hover_pos = global_pos
+		image = self._thumbnail_cache.get(media_path, timestamp)
+		if image is not None:
+			self.show_thumbnail(media_path, timestamp, image)
+		else:
+			self._thumbnail_loader.request(media_path, timestamp, decode=self._uses_gstreamer())
 
-		# Call the base class method to handle other mouse press events
-		super().mousePressEvent(event)
+	def show_thumbnail(self, media_path, timestamp, image):
+		self._thumbnail_cache.put(media_path, timestamp, image)
+		if self._hover_target != (media_path, timestamp):
+			return  # The pointer has moved on
+		self._thumbnail_popup.setPixmap(QPixmap.fromImage(image))
+		self._thumbnail_popup.adjustSize()
+		top = self._slider.mapToGlobal(QPoint(0, 0)).y() - self._thumbnail_popup.height() - 4
+		self._thumbnail_popup.move(self._hover_pos.x() - self._thumbnail_popup.width() // 2, top)
+		self._thumbnail_popup.show()
 
-	def slider_pressed(self):
-		click_position = QCursor.pos().x() - self._slider.mapToGlobal(QPoint(0, 0)).x()
-		max_value = self._slider.maximum()
-		new_value = int((click_position / self._slider.width()) * max_value)
-		self._player.setPosition(new_value)
+	def hide_thumbnail(self):
+		self._hover_target = None
+		self._thumbnail_popup.hide()
 
 	@pyqtSlot()
 	def reset_slider_position(self):
@@ -485,11 +4234,11 @@ class MainWindow(QMainWindow):
 			self._slider.reset_position()  # Reset the slider handle position to zero
 
 	def toggle_mute(self, checked):
+		if self._player is not None:
+			self._player.setMuted(checked)
 		if checked:
-			self._player.setMuted(True)
 			self._mute_action.setIcon(QIcon.fromTheme("audio-volume-muted"))
 		else:
-			self._player.setMuted(False)
 			self._mute_action.setIcon(QIcon.fromTheme("audio-volume-high"))
 
 	def create_action(self, text, slot=None, shortcut=None):
@@ -555,57 +4304,51 @@ class MainWindow(QMainWindow):
 
 	def set_volume(self, value):
 		volume = value / 100.0
-		self._player.setVolume(int(volume * 100))
+		if self._player is not None:
+			self._player.setVolume(int(volume * 100))
 		
-	def time_thread(self):
-		threading.Thread(target=self.update_time_).start()
-	
 	def update_total_duration(self, duration):
-		# Update the total duration label with the new duration in hour:minutes:seconds format
-		hours, remainder = divmod(duration // 1000, 3600)
-		minutes, seconds = divmod(remainder, 60)
-		self._total_duration_label.setText(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
+		# Update the total duration label only when the displayed second changes
+		seconds = max(0, duration) // 1000
+		if seconds != self._shown_duration:
+			self._shown_duration = seconds
+			self._total_duration_label.setText(format_seconds(seconds))
 		
 	def update_playback_time(self, position):
-		if self._player.state() == QMediaPlayer.StoppedState:
-			self._playback_time_label.setText("0:00:00")
-		else:
-			# Calculate hours, minutes, and seconds from the position in milliseconds
-			total_seconds = position // 1000
-			hours = total_seconds // 3600
-			minutes = (total_seconds % 3600) // 60
-			seconds = total_seconds % 60
+		# Update the playback time label only when the displayed second changes
+		seconds = max(0, position) // 1000
+		if seconds != self._shown_position:
+			self._shown_position = seconds
+			self._playback_time_label.setText(format_seconds(seconds))
 
-			# Format the time as "hh:mm:ss"
-			time_str = "{:02d}:{:02d}:{:02d}".format(hours, minutes, seconds)
-
-			# Set the playback time label text
-			self._playback_time_label.setText(time_str)
+	def refresh_ui(self):
+		# Driven by _ui_refresh_timer while playing, and once on every state change
+		position = self._player.position() if self.player_state() != QMediaPlayer.StoppedState else 0
+		duration = self.current_duration()
+		self.update_playback_time(position)
+		self.update_total_duration(duration)
+		if abs(position - self._resume_saved_at) >= RESUME_SAVE_INTERVAL_MS:
+			self.save_resume_position()
+		if duration > 0 and not self._slider.isSliderDown():
+			value = int(position * self._slider.maximum() / duration)
+			if value != self._slider.value():
+				self._slider.setValue(value)
 		
 	def update_buttons(self, state):
 		media_count = len(self._playlist)
 		self._play_action.setEnabled(media_count > 0 and state != QMediaPlayer.PlayingState)
 		self._pause_action.setEnabled(state == QMediaPlayer.PlayingState)
 		self._stop_action.setEnabled(state != QMediaPlayer.StoppedState)
-		self._previous_action.setEnabled(self._player.position() > 0)
+		current_position = self._player.position() if self._player is not None else 0  # Current position in milliseconds
+		self._previous_action.setEnabled(current_position > 0)
 		self._next_action.setEnabled(media_count > 1)
-		
-		# Update playback time label and total duration label
-		duration = self._player.duration()  # Total duration in milliseconds
-		current_position = self._player.position()  # Current position in milliseconds
-
-		# Calculate total duration in the format "m:ss"
-		total_minutes = duration // 60000
-		total_seconds = (duration % 60000) // 1000
-		total_duration_str = f"{total_minutes}:{total_seconds:02}"
-
-		# Calculate current playback time in the format "m:ss"
-		current_minutes = current_position // 60000
-		current_seconds = (current_position % 60000) // 1000
-		playback_time_str = f"{current_minutes}:{current_seconds:02}"
 
-		self._playback_time_label.setText(playback_time_str)
-		self._total_duration_label.setText(total_duration_str)
+		# Only poll the position while something is playing
+		if state == QMediaPlayer.PlayingState:
+			self._ui_refresh_timer.start()
+		else:
+			self._ui_refresh_timer.stop()
+		self.refresh_ui()
 
 	def show_status_message(self, message):
 		self.statusBar().showMessage(message, 5000)
@@ -616,10 +4359,201 @@ class MainWindow(QMainWindow):
 		print(error_string, file=sys.stderr)
 		self.show_status_message(error_string)
 
+# Contact sheets (--contact-sheets); a single frame gives a poster image
+CONTACT_SHEET_FRAMES = 9
+CONTACT_SHEET_COLUMNS = 3
+CONTACT_SHEET_TILE_WIDTH = 320
+CONTACT_SHEET_SPACING = 4
+CONTACT_SHEET_MANIFEST = "contact-sheets.json"  # Source identity and settings per sheet, for incremental runs
+
+def render_contact_sheet(media_path, output_path, frames, columns, tile_width, image_format, quality):
+	# Runs in a worker process: grab evenly spaced keyframes and tile them into one image
+	grabber = FrameGrabber(media_path, tile_width)
+	try:
+		duration = grabber.duration()
+		positions = [duration * (2 * i + 1) // (2 * frames) for i in range(frames)] if duration > 0 else [0]
+		images = [grabber.grab(position) for position in positions]
+	finally:
+		grabber.close()
+	images = [image for image in images if image is not None]
+	if not images:
+		return False
+	if len(images) == 1:
+		sheet = images[0]
+	else:
+		columns = min(columns, len(images))
+		rows = -(-len(images) // columns)
+		tile_height = max(image.height() for image in images)
+		sheet = QImage(columns * tile_width + (columns + 1) * CONTACT_SHEET_SPACING,
+			rows * tile_height + (rows + 1) * CONTACT_SHEET_SPACING, QImage.Format_RGB888)
+		sheet.fill(Qt.black)
+		painter = QPainter(sheet)
+		for i, image in enumerate(images):
+			row, column = divmod(i, columns)
+			painter.drawImage(CONTACT_SHEET_SPACING + column * (tile_width + CONTACT_SHEET_SPACING),
+				CONTACT_SHEET_SPACING + row * (tile_height + CONTACT_SHEET_SPACING), image)
+		painter.end()
+	os.makedirs(os.path.dirname(output_path), exist_ok=True)
+	temp_path = output_path + ".tmp"
+	if not sheet.save(temp_path, image_format.upper(), quality):
+		return False
+	os.replace(temp_path, output_path)
+	return True
+
+def _render_contact_sheet_job(job):
+	# Process pool entry point; never lets an exception take the whole run down
+	media_path, size, mtime_ns, output_path, settings = job
+	try:
+		ok = render_contact_sheet(media_path, output_path, **settings)
+	except Exception as error:
+		print(f"{media_path}: {error}", file=sys.stderr)
+		ok = False
+	return media_path, size, mtime_ns, ok
+
+def run_contact_sheets(roots, output_dir, frames=CONTACT_SHEET_FRAMES, columns=CONTACT_SHEET_COLUMNS,
+		tile_width=CONTACT_SHEET_TILE_WIDTH, image_format="jpg", quality=80, jobs=None):
+	# Headless: sheets for every supported file under roots, mirrored under output_dir
+	import multiprocessing
+	from concurrent.futures import ProcessPoolExecutor
+	from PyQt5.QtGui import QImageWriter
+	if image_format.encode() not in (bytes(name) for name in QImageWriter.supportedImageFormats()):
+		print(f"This Qt build cannot write {image_format} images", file=sys.stderr)
+		return 1
+
+	settings = {"frames": frames, "columns": columns, "tile_width": tile_width,
+		"image_format": image_format, "quality": quality}
+	manifest_path = os.path.join(output_dir, CONTACT_SHEET_MANIFEST)
+	try:
+		with open(manifest_path) as manifest_file:
+			manifest = json.load(manifest_file)
+	except (OSError, ValueError):
+		manifest = {}
+
+	started = time.perf_counter()
+	jobs_list = []
+	skipped = 0
+	base = os.path.commonpath([os.path.abspath(root) for root in roots])
+	for media_path, size, mtime_ns in iter_media_files(roots, MimeRegistry.instance(), threading.Event()):
+		relative = os.path.relpath(os.path.abspath(media_path), base)
+		output_path = os.path.join(output_dir, f"{relative}.{image_format}")
+		if manifest.get(media_path) == [size, mtime_ns, settings] and os.path.exists(output_path):
+			skipped += 1
+			continue
+		jobs_list.append((media_path, size, mtime_ns, output_path, settings))
+
+	done = failed = 0
+	# Spawned workers start clean: no GStreamer or Qt state is inherited from this process
+	with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("spawn")) as executor:
+		for media_path, size, mtime_ns, ok in executor.map(_render_contact_sheet_job, jobs_list, chunksize=4):
+			if ok:
+				done += 1
+				manifest[media_path] = [size, mtime_ns, settings]
+			else:
+				failed += 1
+				manifest.pop(media_path, None)
+	os.makedirs(output_dir, exist_ok=True)
+	with open(manifest_path + ".tmp", "w") as manifest_file:
+		json.dump(manifest, manifest_file)
+	os.replace(manifest_path + ".tmp", manifest_path)
+
+	elapsed = time.perf_counter() - started
+	rate = done / elapsed if elapsed else 0.0
+	print(f"{done} sheets written, {skipped} unchanged, {failed} failed in {elapsed:.1f} s ({rate:.2f} files/s)",
+		file=sys.stderr)
+	return 0 if not failed else 2
+
+# Default length of each clip --benchmark generates
+BENCHMARK_CLIP_SECONDS = 10
+
+def load_benchmarks():
+	# The benchmarks and self-checks live in benchmarks.py next to this script and are only loaded
+	# for --benchmark and --self-test; registering this module first keeps them from loading it again
+	import importlib.util
+	sys.modules.setdefault("pot_o_player", sys.modules[__name__])
+	spec = importlib.util.spec_from_file_location("benchmarks",
+		os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks.py"))
+	benchmarks = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(benchmarks)
+	return benchmarks
+
+def parse_args(argv):
+	parser = argparse.ArgumentParser(description="Pot-O Video Player")
+	parser.add_argument("--backend", choices=sorted(PLAYBACK_BACKENDS), default="qt",
+		help="playback backend to use (default: qt)")
+	parser.add_argument("--startup-profile", action="store_true",
+		help="print startup stage timings and idle RSS to stderr")
+	parser.add_argument("--ui-refresh-hz", type=int, default=UI_REFRESH_HZ, metavar="HZ",
+		help=f"time label and slider refresh rate while playing (default: {UI_REFRESH_HZ})")
+	parser.add_argument("--seek-budget", type=int, default=SEEK_LATENCY_BUDGET_MS, metavar="MS",
+		help=f"max time a seek may stay in flight before a newer one is issued (default: {SEEK_LATENCY_BUDGET_MS})")
+	parser.add_argument("--benchmark", metavar="PATH",
+		help="run the headless playback benchmarks and write a JSON report to PATH ('-' for stdout)")
+	parser.add_argument("--self-test", action="store_true",
+		help="check the playlist, seek scheduling, worker pool and caches without GStreamer or a window, and exit")
+	parser.add_argument("--benchmark-seconds", type=int, default=BENCHMARK_CLIP_SECONDS, metavar="SECONDS",
+		help=f"length of each generated benchmark clip (default: {BENCHMARK_CLIP_SECONDS})")
+	parser.add_argument("--decoder-threads", type=int, default=0, metavar="N",
+		help="threads per video decoder on the GStreamer backends (default: 0, the decoder's choice)")
+	parser.add_argument("--late-frame-policy", choices=LATE_FRAME_POLICIES, default="drop",
+		help="what the GStreamer backends do when video falls behind: drop late frames, "
+			"skip to the next keyframe, or also skip B-frames until the next file (default: drop)")
+	parser.add_argument("--metrics-log", metavar="PATH",
+		help="append GStreamer pipeline telemetry to PATH as JSON lines")
+	parser.add_argument("--metrics-port", type=int, metavar="PORT",
+		help="serve GStreamer pipeline telemetry as JSON on http://127.0.0.1:PORT/metrics")
+	parser.add_argument("--source-mode", choices=SOURCE_MODES, default="filesrc",
+		help="how the GStreamer backends read files: filesrc, large pread blocks, or mmap; only blocks and mmap "
+			"keep bookmarked segments cached (default: filesrc)")
+	parser.add_argument("--read-block-size", type=int, default=READ_BLOCK_SIZE, metavar="BYTES",
+		help=f"read size for the blocks and mmap source modes (default: {READ_BLOCK_SIZE})")
+	parser.add_argument("--network-buffer", type=int, default=NETWORK_BUFFER_SECONDS, metavar="SECONDS",
+		help="media buffered ahead of playback for HTTP, HLS and DASH streams on the GStreamer backends "
+			f"(default: {NETWORK_BUFFER_SECONDS})")
+	parser.add_argument("--max-bitrate", type=int, default=0, metavar="BPS",
+		help="highest HLS/DASH rendition bitrate the GStreamer backends may pick (default: no limit)")
+	parser.add_argument("--contact-sheets", nargs="+", metavar="DIR",
+		help="write contact sheets for every supported file under DIR (no window) and exit")
+	parser.add_argument("--sheet-output", default="contact-sheets", metavar="DIR",
+		help="where contact sheets and their manifest go (default: ./contact-sheets)")
+	parser.add_argument("--sheet-frames", type=int, default=CONTACT_SHEET_FRAMES, metavar="N",
+		help=f"frames per sheet; 1 writes a poster frame (default: {CONTACT_SHEET_FRAMES})")
+	parser.add_argument("--sheet-format", choices=("jpg", "webp"), default="jpg",
+		help="contact sheet image format (default: jpg)")
+	parser.add_argument("--jobs", type=int, default=None, metavar="N",
+		help="worker processes for --contact-sheets (default: one per CPU)")
+	# Leave unknown arguments for Qt (e.g. -style, -platform)
+	options, qt_args = parser.parse_known_args(argv[1:])
+	return options, argv[:1] + qt_args
+
 if __name__ == '__main__':
-	app = QApplication(sys.argv)
-	main_win = MainWindow()
+	options, qt_argv = parse_args(sys.argv)
+	if options.contact_sheets:
+		# No window, but the same application name and profile paths as the player
+		app = QCoreApplication(qt_argv)
+		sys.exit(run_contact_sheets(options.contact_sheets, options.sheet_output, frames=options.sheet_frames,
+			image_format=options.sheet_format, jobs=options.jobs))
+	if options.self_test:
+		app = QCoreApplication(qt_argv)
+		sys.exit(load_benchmarks().self_test(app))
+	if options.benchmark:
+		sys.exit(load_benchmarks().run_benchmarks(options.benchmark, options.benchmark_seconds, decoder_threads=options.decoder_threads,
+			late_frame_policy=options.late_frame_policy, source_mode=options.source_mode,
+			read_block_size=options.read_block_size, network_buffer_seconds=options.network_buffer))
+	profile = StartupProfile() if options.startup_profile else None
+	if profile is not None:
+		profile.mark("imports")
+	app = QApplication(qt_argv)
 	app.setApplicationDisplayName("Pot-O Video Player v0.1.0.1-alpha")
+	if profile is not None:
+		profile.mark("QApplication")
+	main_win = MainWindow(backend=options.backend, seek_budget=options.seek_budget, profile=profile,
+		ui_refresh_hz=options.ui_refresh_hz, decoder_threads=options.decoder_threads,
+		late_frame_policy=options.late_frame_policy, metrics_log=options.metrics_log, metrics_port=options.metrics_port,
+		source_mode=options.source_mode, read_block_size=options.read_block_size,
+		network_buffer_seconds=options.network_buffer, max_bitrate=options.max_bitrate)
+	if profile is not None:
+		profile.mark("window built")
+		profile.watch_first_paint(main_win)
 	available_geometry = main_win.screen().availableGeometry()
 	main_win.resize(int(available_geometry.width() / 1.5), int(available_geometry.height() / 1.3))
 	main_win.show()
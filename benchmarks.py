@@ -0,0 +1,808 @@
+# Headless playback benchmarks (--benchmark) and self-checks (--self-test) for Pot-O Video Player.
+# The player loads this module only for those options; run on its own, it runs the self-checks
+import os
+import sys
+import threading
+import random
+import json
+import sqlite3
+import time
+import importlib.util
+from array import array
+from PyQt5.QtCore import QCoreApplication, QStandardPaths, QUrl, QT_VERSION_STR
+from PyQt5.QtWidgets import QWidget, QApplication
+from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
+
+PLAYER_SCRIPT = "Pot-O_Video_Player_0.1.0.1.py"
+PLAYER_MODULE = "pot_o_player"  # Name the player script is loaded (or registers itself) under
+
+def load_player():
+	# The script's file name is not importable, so it is loaded from its path next to this file;
+	# when the player runs --benchmark or --self-test it has already registered itself
+	module = sys.modules.get(PLAYER_MODULE)
+	if module is None:
+		spec = importlib.util.spec_from_file_location(PLAYER_MODULE,
+			os.path.join(os.path.dirname(os.path.abspath(__file__)), PLAYER_SCRIPT))
+		module = importlib.util.module_from_spec(spec)
+		sys.modules[PLAYER_MODULE] = module
+		spec.loader.exec_module(module)
+	return module
+
+pot_o = load_player()
+
+# Set by load_gstreamer(); every measurement loads GStreamer before touching it, the self-checks never do
+Gst = None
+
+def load_gstreamer():
+	global Gst
+	Gst = pot_o.load_gstreamer()
+	return Gst
+
+class HeadlessGstPlayer(pot_o.GstPlayer):
+	# Clock-synchronised fake sinks, for running without a display or sound card
+	video_sink_factory = "fakesink"
+	audio_sink_factory = "fakeaudiosink"
+	render_to_widget = False
+
+	def make_sink(self, factory, name):
+		sink = Gst.ElementFactory.make(factory, name)
+		if sink is None:
+			# fakeaudiosink needs GStreamer 1.18
+			sink = Gst.ElementFactory.make("fakesink", name)
+		sink.set_property("sync", True)
+		return sink
+
+# Clip formats for --benchmark, tried in order until every element is installed
+BENCHMARK_FORMATS = [
+	("mp4", "x264enc speed-preset=ultrafast key-int-max=30", "avenc_aac", "mp4mux"),
+	("mkv", "x264enc speed-preset=ultrafast key-int-max=30", "vorbisenc", "matroskamux"),
+	("webm", "vp8enc deadline=1 keyframe-max-dist=30", "vorbisenc", "webmmux"),
+	("ogv", "theoraenc", "vorbisenc", "oggmux"),
+]
+BENCHMARK_SEEKS = 20
+BENCHMARK_TIMEOUT_SECONDS = 30
+MULTIVIEW_BENCHMARK_TILES = (1, 4, 9)
+PLAYLIST_BENCHMARK_ENTRIES = 100000
+
+# Timeouts and failed measurements of the current --benchmark run; any entry makes it exit non-zero
+benchmark_errors = []
+
+def find_clip_format():
+	load_gstreamer()
+	for clip_format in BENCHMARK_FORMATS:
+		factories = [description.split()[0] for description in clip_format[1:]]
+		if all(Gst.ElementFactory.find(factory) is not None for factory in factories):
+			return clip_format
+	raise RuntimeError("No usable encoder/muxer combination for benchmark clips")
+
+def run_to_eos(pipeline):
+	# Play a pipeline to completion on the calling thread; raises on error
+	bus = pipeline.get_bus()
+	pipeline.set_state(Gst.State.PLAYING)
+	message = bus.timed_pop_filtered(Gst.CLOCK_TIME_NONE, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+	pipeline.set_state(Gst.State.NULL)
+	if message.type == Gst.MessageType.ERROR:
+		error, debug_info = message.parse_error()
+		raise RuntimeError(f"{error.message} - {debug_info}")
+
+def generate_clip(directory, name, width, height, fps, seconds, pattern="smpte"):
+	extension, video_encoder, audio_encoder, muxer = find_clip_format()
+	path = os.path.join(directory, f"{name}.{extension}")
+	run_to_eos(Gst.parse_launch(
+		f"videotestsrc num-buffers={seconds * fps} pattern={pattern} "
+		f"! video/x-raw,width={width},height={height},framerate={fps}/1 "
+		f"! videoconvert ! {video_encoder} ! queue ! {muxer} name=mux ! filesink location=\"{path}\" "
+		f"audiotestsrc num-buffers={seconds * 100} samplesperbuffer=441 ! audio/x-raw,rate=44100 "
+		f"! audioconvert ! audioresample ! {audio_encoder} ! queue ! mux."))
+	return path
+
+def measure_decode_fps(path, decoder_threads=0):
+	# Decode the video stream as fast as possible, without a clock
+	load_gstreamer()
+	pipeline = Gst.parse_launch(
+		f"filesrc location=\"{path}\" ! decodebin ! video/x-raw ! fakesink name=sink sync=false")
+	frames = [0]
+
+	def configure_decoder(pipeline, sub_bin, element):
+		if "Decoder" in pot_o.element_klass(element):
+			pot_o.set_decoder_threads(element, decoder_threads)
+
+	def count_frame(pad, info):
+		frames[0] += 1
+		return Gst.PadProbeReturn.OK
+
+	pipeline.connect("deep-element-added", configure_decoder)
+	pipeline.get_by_name("sink").get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, count_frame)
+	started = time.perf_counter()
+	run_to_eos(pipeline)
+	elapsed = time.perf_counter() - started
+	return {"frames": frames[0], "seconds": elapsed, "fps": frames[0] / elapsed if elapsed else 0.0,
+		"decoder_threads": decoder_threads}
+
+def measure_source_throughput(path, mode, block_size=pot_o.READ_BLOCK_SIZE):
+	# Read a whole file through one source mode into a fakesink; reads are syscalls (or mmap slices)
+	load_gstreamer()
+	pipeline = Gst.Pipeline.new("source-benchmark")
+	sink = Gst.ElementFactory.make("fakesink", "sink")
+	sink.set_property("sync", False)
+	stats = {"mode": mode, "block_size": block_size, "reads": 0, "bytes": 0}
+	file_source = None
+	if mode == "filesrc":
+		source = Gst.ElementFactory.make("filesrc", "source")
+		source.set_property("location", path)
+		source.set_property("blocksize", block_size)
+
+		def count_read(pad, info):
+			stats["reads"] += 1
+			stats["bytes"] += info.get_buffer().get_size()
+			return Gst.PadProbeReturn.OK
+
+		source.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, count_read)
+	else:
+		source = Gst.ElementFactory.make("appsrc", "source")
+		source.set_property("blocksize", block_size)  # The size need-data asks for, as filesrc reads
+		file_source = pot_o.BlockFileSource(path, block_size, use_mmap=mode == "mmap")
+		file_source.attach(source)
+	pipeline.add(source)
+	pipeline.add(sink)
+	source.link(sink)
+	started = time.perf_counter()
+	try:
+		run_to_eos(pipeline)
+	finally:
+		if file_source is not None:
+			file_source.close()
+	elapsed = time.perf_counter() - started
+	if file_source is not None:
+		stats = file_source.stats()
+	stats["seconds"] = elapsed
+	stats["mb_per_second"] = stats["bytes"] / elapsed / 1e6 if elapsed else None
+	return stats
+
+class _RenderBenchmarkPlayer(HeadlessGstPlayer):
+	# Real-time playback into a VideoFrameWidget, with a fake audio sink
+	render_to_widget = True
+
+def measure_render(app, path, copy_frames=False):
+	# Play a clip through the widget render path; CPU time is for the whole process
+	player = _RenderBenchmarkPlayer()
+	player.copy_frames = copy_frames
+	container = QWidget()
+	container.resize(1280, 720)
+	container.show()
+	player.setVideoOutput(container)
+	view = player._frame_view
+	started = time.perf_counter()
+	cpu_started = time.process_time()
+	player.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+	player.play()
+	mode = "copy" if copy_frames else "mapped"
+	wait_for(app, f"render ({mode}) to play to the end",
+		lambda: player.mediaStatus() in (QMediaPlayer.EndOfMedia, QMediaPlayer.InvalidMedia),
+		timeout=BENCHMARK_TIMEOUT_SECONDS * 2)
+	cpu = time.process_time() - cpu_started
+	elapsed = time.perf_counter() - started
+	frames = view.frames_presented
+	if not frames:
+		benchmark_errors.append(f"render ({mode}): no frames presented ({player.errorString() or 'no error'})")
+	stats = {"mode": mode, "frames_presented": frames,
+		"frames_skipped": view.frames_skipped, "dropped_frames": player.dropped_frames,
+		"fps": frames / elapsed if elapsed else 0.0,
+		"cpu_ms_per_frame": cpu * 1000 / frames if frames else None,
+		"copied_bytes_per_frame": player._frame_sink.copied_bytes / frames if frames and player._frame_sink else 0,
+		"zero_copy": player.zero_copy_frames}
+	player.close()
+	container.close()
+	app.processEvents()
+	return stats
+
+def measure_background_playback(app, path, seconds):
+	# Process CPU while playing with video decoded and with it left undecoded (what a minimised
+	# window gets), then the time to bring video back at the same position
+	results = {}
+	for video in (True, False):
+		player = HeadlessGstPlayer()
+		player.set_video_enabled(video)
+		player.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+		player.play()
+		if wait_for(app, f"background playback ({'video' if video else 'audio only'}) to start",
+				lambda: player.mediaStatus() == QMediaPlayer.BufferedMedia) is None:
+			player.close()
+			continue  # An idle process would be measured instead
+		started = time.perf_counter()
+		cpu_started = time.process_time()
+		while time.perf_counter() - started < seconds:
+			app.processEvents()
+			time.sleep(0.01)  # Coarse, so the wait itself adds little CPU
+		cpu = time.process_time() - cpu_started
+		results["video" if video else "audio_only"] = {
+			"cpu_ms_per_second": cpu * 1000 / (time.perf_counter() - started)}
+		if not video:
+			player.set_video_enabled(True)
+			if wait_for(app, "video to be reattached", lambda: player.last_reattach_ms is not None) is not None:
+				results["reattach_ms"] = player.last_reattach_ms
+		player.close()
+		app.processEvents()
+	if "video" in results and "audio_only" in results and results["video"]["cpu_ms_per_second"]:
+		results["cpu_saved_percent"] = 100 * (1 - results["audio_only"]["cpu_ms_per_second"]
+			/ results["video"]["cpu_ms_per_second"])
+	return results
+
+def measure_playlist(count=PLAYLIST_BENCHMARK_ENTRIES):
+	# A large synthetic library in PlaylistModel, against the list of QUrls it replaced
+	paths = [f"/media/library/{i % 997:03d}/clip-{i:06d}.mp4" for i in range(count)]
+	rss = pot_o.current_rss()
+	started = time.perf_counter()
+	urls = [QUrl.fromLocalFile(path) for path in paths]
+	url_list_seconds = time.perf_counter() - started
+	url_list_bytes = pot_o.current_rss() - rss  # Only approximate: QUrl keeps its data on the C++ heap
+
+	model = pot_o.PlaylistModel()
+	generator = random.Random(0)
+	durations = {path: generator.randrange(10000, 7200000) for path in paths}
+	model.duration_lookup = durations.get
+	timings = {}
+	started = time.perf_counter()
+	model.extend(urls)
+	timings["load_s"] = time.perf_counter() - started
+	del urls
+	for key in ("name", "duration"):
+		started = time.perf_counter()
+		model.sort_by(key, count // 2)
+		timings[f"sort_{key}_s"] = time.perf_counter() - started
+	started = time.perf_counter()
+	model.set_shuffle(True, 0)
+	timings["shuffle_s"] = time.perf_counter() - started
+	started = time.perf_counter()
+	row, steps = 0, 0
+	while row >= 0:
+		row = model.next_row(row)
+		steps += 1
+	timings["walk_order_s"] = time.perf_counter() - started
+	return {
+		"entries": count,
+		"model_bytes_per_entry": model.nbytes() / count,  # Exact: packed paths, flags, durations and the order
+		"url_list_bytes_per_entry": url_list_bytes / count,
+		"url_list_build_s": url_list_seconds,
+		"order_steps": steps,
+		**timings,
+	}
+
+class _HeadlessMultiViewPlayer(pot_o.MultiViewPlayer):
+	audio_sink_factory = "fakeaudiosink"
+	make_sink = HeadlessGstPlayer.make_sink
+
+def measure_multiview(app, path, counts=MULTIVIEW_BENCHMARK_TILES):
+	# The same clip in every tile; shows how playback holds up as the grid grows
+	results = []
+	for count in counts:
+		grid = pot_o.MultiViewWidget([os.path.basename(path)] * count)
+		grid.resize(1280, 720)
+		grid.show()
+		app.processEvents()
+		player = _HeadlessMultiViewPlayer()
+		player.set_tiles([path] * count, grid.views)
+		player.set_tile_sizes(grid.tile_sizes())
+		started = time.perf_counter()
+		cpu_started = time.process_time()
+		player.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+		player.play()
+		wait_for(app, f"a {count}-tile grid to play to the end",
+			lambda: player.mediaStatus() in (QMediaPlayer.EndOfMedia, QMediaPlayer.InvalidMedia),
+			timeout=BENCHMARK_TIMEOUT_SECONDS * 2)
+		cpu = time.process_time() - cpu_started
+		elapsed = time.perf_counter() - started
+		tiles = player.tile_stats()
+		if not any(tile["frames_presented"] for tile in tiles):
+			benchmark_errors.append(f"a {count}-tile grid presented no frames ({player.errorString() or 'no error'})")
+		results.append({
+			"tiles": count,
+			"tile_size": list(player._tile_sizes[0]),
+			"fps_per_tile": sum(tile["frames_presented"] for tile in tiles) / count / elapsed,
+			"dropped_frames": [tile["dropped_frames"] for tile in tiles],
+			"skipped_frames": [tile["frames_skipped"] for tile in tiles],
+			"decoders": [tile["decoder"] for tile in tiles],
+			"decode_latency_ms": [tile["decode_latency_ms"] for tile in tiles],
+			"cpu_ms_per_second": cpu * 1000 / elapsed,
+		})
+		player.close()
+		grid.close()
+		grid.deleteLater()
+		app.processEvents()
+	return results
+
+# Network benchmarks: HLS renditions (width, height, kbit/s) and the stand-in server's write size
+HLS_RENDITIONS = ((640, 360, 800), (1280, 720, 2500), (1920, 1080, 5000))
+HLS_SEGMENT_SECONDS = 2
+STAND_IN_CHUNK_BYTES = 16 * 1024
+
+class StandInServer:
+	# Serves a directory on 127.0.0.1 in place of a real media server. rate_bps throttles
+	# each connection and can be changed while streams are playing; 0 means unthrottled
+	def __init__(self, directory, rate_bps=0):
+		from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+		import re
+		range_pattern = re.compile(r"bytes=(\d*)-(\d*)")
+		server = self
+		self.rate_bps = rate_bps
+		self.requests = 0
+		self.bytes_sent = 0
+
+		class StandInHandler(SimpleHTTPRequestHandler):
+			def __init__(self, *args, **kwargs):
+				super().__init__(*args, directory=directory, **kwargs)
+
+			def send_head(self):
+				# Single byte ranges, so progressive streams can seek and find a trailing index
+				self._remaining = None
+				server.requests += 1
+				path = self.translate_path(self.path)
+				match = range_pattern.fullmatch(self.headers.get("Range", "").strip())
+				if match is None or not os.path.isfile(path) or match.groups() == ("", ""):
+					return super().send_head()
+				size = os.path.getsize(path)
+				first, last = match.groups()
+				if first:
+					start, end = int(first), min(int(last), size - 1) if last else size - 1
+				else:
+					start, end = max(0, size - int(last)), size - 1
+				if start >= size or start > end:
+					self.send_error(416)
+					return None
+				source = open(path, "rb")
+				source.seek(start)
+				self.send_response(206)
+				self.send_header("Content-Type", self.guess_type(path))
+				self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+				self.send_header("Content-Length", str(end - start + 1))
+				self.end_headers()
+				self._remaining = end - start + 1
+				return source
+
+			def end_headers(self):
+				self.send_header("Accept-Ranges", "bytes")
+				super().end_headers()
+
+			def copyfile(self, source, outputfile):
+				remaining = self._remaining
+				try:
+					while remaining is None or remaining > 0:
+						chunk = source.read(STAND_IN_CHUNK_BYTES if remaining is None
+							else min(STAND_IN_CHUNK_BYTES, remaining))
+						if not chunk:
+							break
+						if remaining is not None:
+							remaining -= len(chunk)
+						outputfile.write(chunk)
+						server.bytes_sent += len(chunk)
+						if server.rate_bps:
+							time.sleep(len(chunk) * 8 / server.rate_bps)
+				except (BrokenPipeError, ConnectionResetError):
+					pass  # The player closed the connection, e.g. to seek
+
+			def log_message(self, format, *args):
+				pass
+
+		self._server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+		self.url = f"http://127.0.0.1:{self._server.server_port}/"
+		threading.Thread(target=self._server.serve_forever, name="stand-in-server", daemon=True).start()
+
+	def close(self):
+		self._server.shutdown()
+		self._server.server_close()
+
+def generate_hls(directory, seconds, renditions=HLS_RENDITIONS):
+	# One H.264 rendition per entry plus a master playlist; returns its path, or None
+	# when x264enc, h264parse or hlssink2 is missing
+	load_gstreamer()
+	if any(Gst.ElementFactory.find(factory) is None for factory in ("x264enc", "h264parse", "hlssink2")):
+		return None
+	master = ["#EXTM3U"]
+	for width, height, kbps in renditions:
+		rendition_dir = os.path.join(directory, f"{height}p")
+		os.makedirs(rendition_dir, exist_ok=True)
+		# Noise keeps the encoder at its bitrate, so the renditions really differ in size
+		run_to_eos(Gst.parse_launch(
+			f"videotestsrc num-buffers={seconds * 30} pattern=snow "
+			f"! video/x-raw,width={width},height={height},framerate=30/1 ! videoconvert "
+			f"! x264enc speed-preset=ultrafast bitrate={kbps} key-int-max={HLS_SEGMENT_SECONDS * 30} ! h264parse "
+			f"! hlssink2 location=\"{os.path.join(rendition_dir, 'segment%05d.ts')}\" "
+			f"playlist-location=\"{os.path.join(rendition_dir, 'playlist.m3u8')}\" "
+			f"target-duration={HLS_SEGMENT_SECONDS} max-files=0 playlist-length=0"))
+		master.append(f"#EXT-X-STREAM-INF:BANDWIDTH={kbps * 1000},RESOLUTION={width}x{height}")
+		master.append(f"{height}p/playlist.m3u8")
+	path = os.path.join(directory, "master.m3u8")
+	with open(path, "w") as master_file:
+		master_file.write("\n".join(master) + "\n")
+	return path
+
+def measure_stream(app, url, server, rates, timeout, network_buffer_seconds=pot_o.NETWORK_BUFFER_SECONDS):
+	# Play url to the end while applying rates, [(seconds after open, bits/s)], to the stand-in server
+	player = HeadlessGstPlayer(network_buffer_seconds=network_buffer_seconds)
+	plan = list(rates)
+	server.rate_bps = plan.pop(0)[1]
+	started = time.perf_counter()
+	player.setMedia(QMediaContent(QUrl(url)))
+	player.play()
+	startup_ms = wait_for(app, f"{url} to start",
+		lambda: player.mediaStatus() in (QMediaPlayer.BufferedMedia, QMediaPlayer.InvalidMedia) and not player.stalled,
+		timeout=timeout)
+	switch_latencies = []
+	changed_at = switches_before = None
+	deadline = started + timeout
+	while player.mediaStatus() not in (QMediaPlayer.EndOfMedia, QMediaPlayer.InvalidMedia) \
+			and time.perf_counter() < deadline:
+		if plan and time.perf_counter() - started >= plan[0][0]:
+			server.rate_bps = plan.pop(0)[1]
+			changed_at, switches_before = time.perf_counter(), player.rendition_switches
+		if changed_at is not None and player.rendition_switches > switches_before:
+			switch_latencies.append((player.renditions[-1][0] - changed_at) * 1000)
+			changed_at = None
+		app.processEvents()
+		time.sleep(0.001)
+	if player.mediaStatus() != QMediaPlayer.EndOfMedia:
+		benchmark_errors.append(f"{url} did not play to the end ({player.errorString() or 'timed out'})")
+	stats = {
+		"completed": player.mediaStatus() == QMediaPlayer.EndOfMedia,
+		"error": player.errorString() or None,
+		"startup_ms": startup_ms,
+		"rebuffers": player.rebuffers,
+		"rendition_switches": player.rendition_switches,
+		"switch_latency_ms": switch_latencies,  # From a rate change to the next resolution change
+		"bandwidth_estimate_bps": player.bandwidth_bps,
+		"requests": server.requests,
+		"bytes_served": server.bytes_sent,
+	}
+	player.close()
+	app.processEvents()
+	return stats
+
+def measure_network(app, directory, progressive_clip, seconds, network_buffer_seconds=pot_o.NETWORK_BUFFER_SECONDS):
+	# Throttled playback from a local stand-in server: ample, then starved, then ample again
+	server = StandInServer(directory)
+	try:
+		timeout = seconds * 4 + BENCHMARK_TIMEOUT_SECONDS
+		clip_bps = os.path.getsize(progressive_clip) * 8 / seconds
+		results = {"progressive": measure_stream(app, server.url + os.path.basename(progressive_clip), server,
+			[(0, clip_bps * 2), (seconds / 3, clip_bps / 2), (seconds * 2 / 3, clip_bps * 2)],
+			timeout, network_buffer_seconds)}
+		hls_seconds = seconds * 3
+		master = generate_hls(os.path.join(directory, "hls"), hls_seconds)
+		if master is None:
+			results["hls"] = None  # No H.264 encoder or hlssink2
+		else:
+			server.requests = server.bytes_sent = 0
+			top_bps, bottom_bps = HLS_RENDITIONS[-1][2] * 1000, HLS_RENDITIONS[0][2] * 1000
+			results["hls"] = measure_stream(app, server.url + "hls/master.m3u8", server,
+				[(0, top_bps * 2), (hls_seconds / 3, bottom_bps * 1.5), (hls_seconds * 2 / 3, top_bps * 2)],
+				timeout + hls_seconds, network_buffer_seconds)
+		return results
+	finally:
+		server.close()
+
+def peak_rss():
+	import resource
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak if sys.platform == "darwin" else peak * 1024
+
+def process_until(app, predicate, timeout):
+	# Spin the Qt event loop until predicate() holds; returns elapsed ms or None on timeout
+	started = time.perf_counter()
+	deadline = started + timeout
+	while not predicate():
+		if time.perf_counter() > deadline:
+			return None
+		app.processEvents()
+		time.sleep(0.001)
+	return (time.perf_counter() - started) * 1000
+
+def wait_for(app, what, predicate, timeout=BENCHMARK_TIMEOUT_SECONDS):
+	# process_until for the benchmarks; a timeout is recorded in benchmark_errors as "timed out: <what>"
+	elapsed = process_until(app, predicate, timeout)
+	if elapsed is None:
+		benchmark_errors.append(f"timed out after {timeout:g} s: {what}")
+	return elapsed
+
+def expect(actual, expected, what):
+	if actual != expected:
+		raise AssertionError(f"{what}: got {actual!r}, expected {expected!r}")
+
+# Self-checks for the parts that need neither GStreamer nor a display (--self-test, and
+# the start of every --benchmark run). Each raises AssertionError on the first mismatch
+
+def check_playlist_order(app, directory):
+	strings = pot_o.PackedStrings()
+	for text in ("a", "\u00e9t\u00e9", ""):
+		strings.append(text)
+	expect(list(strings), ["a", "\u00e9t\u00e9", ""], "PackedStrings iteration")
+	expect((strings[1], strings[-1], len(strings)), ("\u00e9t\u00e9", "", 3), "PackedStrings indexing")
+	expect(list(strings.permuted([2, 0, 1])), ["", "a", "\u00e9t\u00e9"], "PackedStrings.permuted")
+
+	model = pot_o.PlaylistModel()
+	model.extend([QUrl.fromLocalFile(f"/media/{name}.mp4") for name in ("b", "c", "a")])
+	model.extend([QUrl("http://example.com/d.m3u8")])
+	expect([model.next_row(row) for row in (-1, 0, 1, 2, 3)], [0, 1, 2, 3, -1], "next_row in list order")
+	expect([model.previous_row(row) for row in (0, 3)], [-1, 2], "previous_row in list order")
+	expect((model.is_local(0), model.path(3), model[3].toString()), (True, "", "http://example.com/d.m3u8"),
+		"local and stream entries")
+	model.repeat = "all"
+	expect((model.next_row(3), model.previous_row(0)), (0, 3), "repeat all wraps")
+	model.repeat = "one"
+	expect((model.next_row(1), model.next_row(1, manual=True)), (1, 2), "repeat one holds automatic advances")
+	model.repeat = "off"
+
+	durations = {"/media/a.mp4": 3000, "/media/b.mp4": -1, "/media/c.mp4": 1000}
+	model.duration_lookup = lambda path: durations.get(path, -1)
+	expect(model.sort_by("name", 0), 1, "sort_by name keeps the current row")
+	expect([model.name(row) for row in range(len(model))], ["a.mp4", "b.mp4", "c.mp4", "d.m3u8"], "sort_by name")
+	model.sort_by("duration")
+	expect([model.name(row) for row in range(len(model))], ["c.mp4", "a.mp4", "b.mp4", "d.m3u8"],
+		"sort_by duration, unknown last")
+
+	model.set_shuffle(True, 2)
+	model.extend([QUrl.fromLocalFile(f"/media/{name}.mp4") for name in ("e", "f")])
+	walk = [2]
+	while len(walk) <= len(model) and model.next_row(walk[-1]) >= 0:
+		walk.append(model.next_row(walk[-1]))
+	expect(sorted(walk), list(range(len(model))), "shuffled order visits every row once")
+	expect(walk[-2:] in ([4, 5], [5, 4]), True, "appended rows are shuffled in at the end")
+	back = [walk[-1]]
+	while model.previous_row(back[-1]) >= 0:
+		back.append(model.previous_row(back[-1]))
+	expect(back, walk[::-1], "previous_row reverses the shuffled order")
+	expect(len(model._order_position), len(model), "one order position per row")
+	expect(model.nbytes(), model._locations.nbytes() + len(model) * (1 + 8 + 4 + 4), "PlaylistModel.nbytes")
+
+def check_seek_scheduler(app, directory):
+	issued = []
+	scheduler = pot_o.SeekScheduler(lambda position, accurate: issued.append(position), latency_budget=50)
+	scheduler.request(1, True)
+	scheduler.request(2, True)
+	scheduler.request(3, False)
+	expect((issued, scheduler.dropped), ([1], 1), "one seek in flight, the newest target waits")
+	scheduler.frame_ready()
+	expect((issued, len(scheduler.latencies)), ([1, 3], 1), "a presented frame issues the waiting seek")
+	scheduler.request(4, True)
+	process_until(app, lambda: scheduler.timeouts, 1)
+	expect((issued, scheduler.timeouts), ([1, 3, 4], 1), "the latency budget lets the next seek through")
+	scheduler.reset()
+	scheduler.frame_ready()
+	expect((issued, len(scheduler.latencies)), ([1, 3, 4], 1), "frames after reset are ignored")
+
+def check_worker_pool(app, directory):
+	pool = pot_o.WorkerPool({pot_o.WORK_INTERACTIVE: 1, pot_o.WORK_BACKGROUND: 1})
+	order = []
+	gate = threading.Event()
+	pool.submit(gate.wait, pot_o.WORK_BACKGROUND)
+	pool.submit(lambda: order.append("background"), pot_o.WORK_BACKGROUND)
+	pool.submit(lambda: order.append("interactive"), pot_o.WORK_INTERACTIVE).result(timeout=5)
+	expect(order, ["interactive"], "a full background class does not hold interactive work back")
+	token = threading.Event()
+	token.set()
+	skipped = pool.submit(lambda: order.append("cancelled"), pot_o.WORK_BACKGROUND, token)
+	gate.set()
+	pool.shutdown()
+	expect((order, skipped.cancelled()), (["interactive", "background"], True),
+		"queued work finishes on shutdown, cancelled work is skipped")
+
+	pool = pot_o.WorkerPool({pot_o.WORK_BACKGROUND: 4})
+	queue = pot_o.SerialQueue(pool, pot_o.WORK_BACKGROUND)
+	results = []
+	for i in range(50):
+		queue.submit(lambda i=i: results.append(i))
+	pool.shutdown()
+	expect(results, list(range(50)), "SerialQueue runs tasks one at a time in order")
+
+	class ProcessPool(pot_o.WorkerPool):
+		_instance = None  # Stands in for the process-wide pool without touching it
+	closed = ProcessPool.instance()
+	closed.shutdown()
+	expect(ProcessPool.instance() is not closed, True, "instance() replaces a shut-down pool")
+	queue = pot_o.SerialQueue(closed, pot_o.WORK_BACKGROUND)
+	queue.submit(lambda: None)
+	expect(queue._active, False, "a queue on a shut-down pool is not left waiting for a drain")
+	queue = pot_o.SerialQueue(ProcessPool.instance(), pot_o.WORK_BACKGROUND)
+	results = []
+	for i in range(2):
+		queue.submit(lambda i=i: results.append(i))
+	ProcessPool.instance().shutdown()
+	expect(results, [0, 1], "work submitted after a shutdown runs on the new pool")
+
+def check_metadata_store(app, directory):
+	media_path = os.path.join(directory, "clip.mp4")
+	with open(media_path, "wb") as media:
+		media.write(bytes(1024))
+	store = pot_o.MetadataStore(os.path.join(directory, "store", pot_o.METADATA_DB_NAME), max_entries=2)
+	try:
+		store.store(media_path, pot_o.MediaInfo(duration_ms=1234, width=640, height=360),
+			pot_o.KeyframeIndex(array("q", [0, 2000]), array("q", [0, 512])))
+		store.store_resume_many({media_path: 5000})
+		media_info, index, resume = store.lookup_many([media_path])[media_path]
+		expect((media_info.duration_ms, media_info.width, list(index.timestamps), index.offset_before(2500), resume),
+			(1234, 640, [0, 2000], 512, 5000), "a stored record reads back")
+		with open(media_path, "ab") as media:
+			media.write(b"\0")
+		expect(store.lookup_many([media_path]), {}, "a changed file is not served its old record")
+		store.save_session(["file:///media/a.mp4"], 0)
+		expect(store.load_session(), (["file:///media/a.mp4"], 0), "the session reads back")
+		paths = []
+		for i in range(4):
+			paths.append(os.path.join(directory, f"clip-{i}.mp4"))
+			with open(paths[-1], "wb") as media:
+				media.write(bytes(i + 1))
+			store.store(paths[-1], pot_o.MediaInfo(duration_ms=i + 1))
+		store.evict()
+		expect(len(store.lookup_many(paths)) <= 2, True, "eviction keeps max_entries records")
+	finally:
+		store.close()
+	try:
+		store.store(media_path, pot_o.MediaInfo(duration_ms=1))
+		reopened = True
+	except sqlite3.ProgrammingError:
+		reopened = False
+	expect(reopened, False, "a closed store is not reopened")
+
+def check_segment_cache(app, directory):
+	cache = pot_o.SegmentCache(max_bytes=40)
+	key = ("clip.mp4", 0, 10)  # (path, mtime_ns, segment size), as BlockFileSource keys files
+	for index in range(4):
+		cache.put(key, index, bytes(10))
+	cache.get(key, 0)
+	cache.put(key, 4, bytes(10))
+	expect((cache.get(key, 1), cache.get(key, 0) is not None), (None, True), "the least recently used segment goes")
+	cache.pin(key, 2, 3)
+	for index in range(5, 9):
+		cache.put(key, index, bytes(10))
+	kept = [index for index in range(9) if cache.get(key, index) is not None]
+	expect(kept, [2, 3, 7, 8], "pinned segments survive eviction")
+	cache.unpin(key, 2, 3)
+	cache.put(key, 9, bytes(10))
+	expect(cache.get(key, 2), None, "an unpinned segment can be evicted")
+	cache.pin(key, 7, 8)
+	cache.forget_stale(("clip.mp4", 1, 10))
+	expect([index for index in range(10) if cache.get(key, index) is not None], [],
+		"a rewritten file's old segments and pins are dropped")
+
+SELF_CHECKS = (check_playlist_order, check_seek_scheduler, check_worker_pool, check_metadata_store,
+	check_segment_cache)
+
+def run_self_checks(app):
+	# {check name: None, or the failure as text}
+	import tempfile
+	import traceback
+	results = {}
+	for check in SELF_CHECKS:
+		with tempfile.TemporaryDirectory(prefix="pot-o-self-check-") as directory:
+			try:
+				check(app, directory)
+				results[check.__name__] = None
+			except Exception as error:
+				results[check.__name__] = "".join(traceback.format_exception_only(type(error), error)).strip()
+	return results
+
+class _BenchmarkWindow(pot_o.MainWindow):
+	# Plays through fake sinks; headless is not offered by --backend or the menu
+	backends = dict(pot_o.PLAYBACK_BACKENDS, headless=HeadlessGstPlayer)
+
+def run_benchmarks(output_path, seconds=pot_o.BENCHMARK_CLIP_SECONDS, seeks=BENCHMARK_SEEKS, decoder_threads=0,
+		late_frame_policy="drop", source_mode="filesrc", read_block_size=pot_o.READ_BLOCK_SIZE,
+		network_buffer_seconds=pot_o.NETWORK_BUFFER_SECONDS):
+	# Headless playback benchmarks; writes a JSON report to output_path ("-" for stdout)
+	import tempfile
+	os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+	app = QApplication.instance() or QApplication(sys.argv[:1])
+	QStandardPaths.setTestModeEnabled(True)  # Keep caches and the metadata store out of the user's profile
+	load_gstreamer()
+	benchmark_errors.clear()
+	results = {"self_checks": run_self_checks(app)}
+	benchmark_errors.extend(f"{name}: {failure}" for name, failure in results["self_checks"].items() if failure)
+	with tempfile.TemporaryDirectory(prefix="pot-o-benchmark-") as directory:
+		started = time.perf_counter()
+		clips = [generate_clip(directory, f"clip-{pattern}", 1280, 720, 30, seconds, pattern)
+			for pattern in ("smpte", "ball", "snow")]
+		decode_clip = generate_clip(directory, "decode-1080p", 1920, 1080, 30, seconds)
+		render_clip = generate_clip(directory, "render-1080p60", 1920, 1080, 60, seconds)
+		results["clip_generation_s"] = time.perf_counter() - started
+
+		window = _BenchmarkWindow(backend="headless", decoder_threads=decoder_threads, late_frame_policy=late_frame_policy,
+			source_mode=source_mode, read_block_size=read_block_size, restore_session=False)
+		window.add_to_playlist([QUrl.fromLocalFile(path) for path in clips])
+
+		def buffered(index):
+			player = window._player
+			return (window._playlist_index == index and player is not None
+				and player.mediaStatus() == QMediaPlayer.BufferedMedia
+				and player.state() == QMediaPlayer.PlayingState)
+
+		monitor = pot_o.EventLoopMonitor()
+		monitor.start()
+		started = time.perf_counter()
+		window._play_entry(0)
+		if wait_for(app, "the first entry to play", lambda: buffered(0)) is not None:
+			results["open_to_first_frame_ms"] = (time.perf_counter() - started) * 1000
+		wait_for(app, "the first entry's duration", lambda: window.current_duration() > 0)
+
+		scheduler = window._seek_scheduler
+		generator = random.Random(0)
+		for _ in range(seeks):
+			completed = len(scheduler.latencies) + scheduler.timeouts
+			window.set_position(generator.randrange(window._slider.maximum()))
+			wait_for(app, "a seek to complete", lambda: len(scheduler.latencies) + scheduler.timeouts > completed)
+		results["seek"] = scheduler.stats()
+		cache = pot_o.SegmentCache.instance()
+		results["segment_cache"] = {"hits": cache.hits, "misses": cache.misses}  # Only filled in blocks/mmap mode
+
+		switches = []
+		for index in range(1, len(clips)):
+			started = time.perf_counter()
+			window.next_clicked()
+			if wait_for(app, f"entry {index} to play", lambda: buffered(index)) is not None:
+				switches.append((time.perf_counter() - started) * 1000)
+		results["track_switch_ms"] = switches
+		results["event_loop_lag"] = monitor.stop()  # Across open, seeks and switches
+
+		# Gapless: play out the last seconds of the first entry into a pre-rolled second one
+		window._gapless_action.setChecked(True)
+		window._play_entry(0)
+		wait_for(app, "the first entry to play again", lambda: buffered(0) and window.current_duration() > 0)
+		window.seek(max(0, window.current_duration() - pot_o.PREROLL_LEAD_MS // 2), True)
+		window.last_switch_ms = None
+		if wait_for(app, "a gapless switch", lambda: window.last_switch_ms is not None,
+				timeout=seconds + BENCHMARK_TIMEOUT_SECONDS) is not None:
+			results["gapless_switch_ms"] = window.last_switch_ms
+
+		dropped_frames = window._player.dropped_frames
+		window._telemetry.sample()
+		telemetry = window._telemetry.snapshot()["latest"]
+
+		# The measurements below bring their own players; the window's stays open but stopped,
+		# so nothing they need is shut down with it and it does not compete for CPU
+		window.discard_preroll()
+		window._ensure_stopped()
+		app.processEvents()
+		# Widget render path at 1080p60: frames wrapped in place against copied out of the buffer
+		results["render_1080p60"] = [measure_render(app, render_clip, copy_frames) for copy_frames in (False, True)]
+		results["multiview"] = measure_multiview(app, decode_clip)
+		results["background_playback"] = measure_background_playback(app, decode_clip, seconds / 2)
+		results["network"] = measure_network(app, directory, decode_clip, seconds, network_buffer_seconds)
+		window.close()
+		app.processEvents()
+		results["decode_1080p"] = measure_decode_fps(decode_clip, decoder_threads)
+		# The clips live in the temp directory; point TMPDIR at a tmpfs or a mount to compare storage
+		results["source"] = [measure_source_throughput(decode_clip, mode, block_size)
+			for mode in pot_o.SOURCE_MODES for block_size in (64 * 1024, read_block_size)]
+		results["dropped_frames"] = dropped_frames
+		results["telemetry"] = telemetry
+		results["playlist"] = measure_playlist()
+
+	results["peak_rss_bytes"] = peak_rss()
+	report = {
+		"generated": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"platform": sys.platform,
+		"python": sys.version.split()[0],
+		"qt": QT_VERSION_STR,
+		"gstreamer": Gst.version_string(),
+		"clip_format": find_clip_format()[0],
+		"clip_seconds": seconds,
+		"results": results,
+		"errors": list(benchmark_errors),  # Timed-out waits and measurements that produced nothing
+	}
+	text = json.dumps(report, indent=2)
+	if output_path == "-":
+		print(text)
+	else:
+		with open(output_path, "w") as output:
+			output.write(text + "\n")
+	for error in benchmark_errors:
+		print(f"benchmark: {error}", file=sys.stderr)
+	return 1 if benchmark_errors else 0
+
+def self_test(app):
+	# --self-test: prints each failed check to stderr and returns the exit status
+	failures = {name: failure for name, failure in run_self_checks(app).items() if failure}
+	for name, failure in failures.items():
+		print(f"{name}: {failure}", file=sys.stderr)
+	return 1 if failures else 0
+
+if __name__ == '__main__':
+	sys.exit(self_test(QCoreApplication(sys.argv)))